@@ -1,7 +1,7 @@
 from flask import Flask
 from flask_session import Session
 import os
-from .views.views import UserModelView, MotionEventModelView, MotionSizeModelView, MotionPositionModelView, TokenModelView, GoogleDriveTokenModelView, ObjectTypeModelView, DetectedObjectModelView, MyAdminIndexView
+from .views.views import UserModelView, MotionEventModelView, MotionSizeModelView, MotionPositionModelView, TokenModelView, GoogleDriveTokenModelView, ObjectTypeModelView, DetectedObjectModelView, MyAdminIndexView, PipelineMetricsView
 from app.extensions.extensions import db, migrate, login_manager, csrf, admin
 from flask_mail import Mail
 from flask_apscheduler import APScheduler
@@ -63,6 +63,9 @@ def create_app():
     from .routes.routes_video_management import blueprint_video_management
     app.register_blueprint(blueprint_video_management)
 
+    from .routes.routes_pipeline_metrics import blueprint_pipeline_metrics
+    app.register_blueprint(blueprint_pipeline_metrics)
+
     # init flask-sqlalchemy database
     db.init_app(app)
     # init flask-migrate
@@ -87,6 +90,7 @@ def create_app():
     admin.add_view(MotionPositionModelView(Position, db.session))  
     admin.add_view(TokenModelView(GmailToken, db.session))
     admin.add_view(GoogleDriveTokenModelView(GoogleDriveToken, db.session))
+    admin.add_view(PipelineMetricsView(name='Pipeline Metrics', endpoint='pipeline_metrics'))
 
     # adds cli commands 
     from scripts.cli_commands import init_default_roles_command  
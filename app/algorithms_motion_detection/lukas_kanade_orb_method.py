@@ -5,6 +5,14 @@ import cv2
 """ START - Documentation and research materials were used in the development of the code, 
 including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
 
+# constants
+TARGET_KEYPOINTS = 120  # points kept by GridLukasKanadeOrb
+GRID_SIZE = (4, 4)  # (columns, rows) of cells keypoints are spread over
+REDETECTION_RATIO = 0.75  # empty cells are refilled when fewer than this share of target points is left
+FORWARD_BACKWARD_THRESHOLD = 1.0  # pixels a point may miss its start when tracked back, larger errors are dropped
+ORB_FEATURES = 2 * TARGET_KEYPOINTS  # enough candidates to fill empty cells, ORB_create() default is 500
+
+
 class LukasKanadeOrb:
     #  initialize method with parameters
     def __init__(self, points_of_interest_detector, lucas_kanade_parameters, motion_detection_threshold):
@@ -59,8 +67,119 @@ class LukasKanadeOrb:
             return substantial_motion, self.previous_points
         return False, self.previous_points
 
+
+# keeps about target_keypoints points spread over grid, only empty cells are searched for new points,
+# points are checked by tracking them back and pyramid of current frame is reused as previous pyramid by next call
+# (python binding of calcOpticalFlowPyrLK does not take pyramids, levels are tracked coarse to fine like OpenCV does internally)
+class GridLukasKanadeOrb(LukasKanadeOrb):
+    def __init__(self, points_of_interest_detector, lucas_kanade_parameters, motion_detection_threshold, target_keypoints=TARGET_KEYPOINTS,
+                 grid_size=GRID_SIZE, forward_backward_threshold=FORWARD_BACKWARD_THRESHOLD, cache_pyramids=True):
+        super().__init__(points_of_interest_detector, lucas_kanade_parameters, motion_detection_threshold)
+        self.target_keypoints = target_keypoints
+        self.grid_size = grid_size
+        self.points_per_cell = max(1, -(-target_keypoints // (grid_size[0] * grid_size[1])))
+        self.forward_backward_threshold = forward_backward_threshold
+        # frames are recognised by identity, shared memory views change content in place and need cache_pyramids=False
+        self.cache_pyramids = cache_pyramids
+        self.cached_frame, self.cached_pyramid = None, None
+
+        # every pyramid level is tracked on its own, so maxLevel is taken from pyramid and other parameters are passed as they are
+        self.window_size = lucas_kanade_parameters.get('winSize', (21, 21))
+        self.max_level = lucas_kanade_parameters.get('maxLevel', 3)
+        self.tracking_parameters = {key: value for key, value in lucas_kanade_parameters.items() if key not in ('maxLevel', 'flags')}
+
+    # returns optical flow pyramid of frame, pyramid built for current frame of last call is reused
+    def _get_pyramid(self, frame):
+        if self.cache_pyramids and frame is self.cached_frame:
+            return self.cached_pyramid
+        number_of_levels, pyramid = cv2.buildOpticalFlowPyramid(frame, self.window_size, self.max_level, withDerivatives=False)
+        return pyramid[:number_of_levels + 1]
+
+    # pyramidal Lucas-Kanade on prebuilt pyramids, flow of coarser level is initial flow of next level
+    def _calculate_flow(self, previous_pyramid, current_pyramid, points):
+        top_level = len(previous_pyramid) - 1
+        estimated_points = points / (1 << top_level)
+        valid = np.ones(len(points), dtype=bool)
+        for level in range(top_level, -1, -1):
+            level_points = points / (1 << level)
+            estimated_points, status, _ = cv2.calcOpticalFlowPyrLK(
+                previous_pyramid[level], current_pyramid[level], level_points, estimated_points, maxLevel=0,
+                flags=cv2.OPTFLOW_USE_INITIAL_FLOW, **self.tracking_parameters
+            )
+            valid &= status.ravel() == 1
+            if level > 0:
+                estimated_points = estimated_points * 2
+        return estimated_points, valid
+
+    # grid cell index of every point
+    def _get_cell_indexes(self, points, frame_shape):
+        frame_height, frame_width = frame_shape[:2]
+        columns = np.clip((points[:, 0] * self.grid_size[0] / frame_width).astype(np.int32), 0, self.grid_size[0] - 1)
+        rows = np.clip((points[:, 1] * self.grid_size[1] / frame_height).astype(np.int32), 0, self.grid_size[1] - 1)
+        return rows * self.grid_size[0] + columns
+
+    # detects keypoints only in cells without points and keeps strongest points_per_cell of each cell
+    def _fill_empty_cells(self, frame):
+        points = self.previous_points.reshape(-1, 2) if self.previous_points is not None else np.empty((0, 2), dtype=np.float32)
+        number_of_cells = self.grid_size[0] * self.grid_size[1]
+        occupied_cells = np.bincount(self._get_cell_indexes(points, frame.shape), minlength=number_of_cells) > 0
+        if occupied_cells.all():
+            return
+
+        # detector searches mask of empty cells only
+        frame_height, frame_width = frame.shape[:2]
+        cell_mask = np.repeat(np.repeat((~occupied_cells).reshape(self.grid_size[1], self.grid_size[0]), -(-frame_height // self.grid_size[1]), axis=0),
+                              -(-frame_width // self.grid_size[0]), axis=1)[:frame_height, :frame_width]
+        detected_keypoints = self.points_of_interest_detector.detect(frame, cell_mask.astype(np.uint8))
+        if not detected_keypoints:
+            return
+
+        # strongest keypoints first, each empty cell takes up to points_per_cell of them
+        detected_points = np.float32([keypoint.pt for keypoint in detected_keypoints])
+        order = np.argsort([-keypoint.response for keypoint in detected_keypoints], kind='stable')
+        detected_points = detected_points[order]
+        cell_indexes = self._get_cell_indexes(detected_points, frame.shape)
+        sorted_order = np.argsort(cell_indexes, kind='stable')
+        sorted_cells = cell_indexes[sorted_order]
+        rank_in_cell = np.arange(len(sorted_cells)) - np.searchsorted(sorted_cells, sorted_cells)
+        new_points = detected_points[sorted_order[(rank_in_cell < self.points_per_cell) & ~occupied_cells[sorted_cells]]]
+        self.previous_points = np.concatenate([points, new_points]).reshape(-1, 1, 2).astype(np.float32)
+
+    def detect_initial_keypoints(self, current_frame):
+        self.previous_points = None
+        self._fill_empty_cells(current_frame)
+
+    def track_points_of_interest(self, previous_frame_gray, current_frame):
+        substantial_motion = False
+
+        # nothing can move between a frame and itself (history right after setup)
+        if self.previous_points is not None and len(self.previous_points) > 0 and previous_frame_gray is not current_frame:
+            previous_pyramid, current_pyramid = self._get_pyramid(previous_frame_gray), self._get_pyramid(current_frame)
+            if self.cache_pyramids:
+                # current frame is previous frame of next call
+                self.cached_frame, self.cached_pyramid = current_frame, current_pyramid
+
+            # forward and backward flow of all points at once
+            new_points, status = self._calculate_flow(previous_pyramid, current_pyramid, self.previous_points)
+            back_points, back_status = self._calculate_flow(current_pyramid, previous_pyramid, new_points)
+
+            # point is kept if it was found both ways and came back close to where it started
+            forward_backward_error = np.linalg.norm((self.previous_points - back_points).reshape(-1, 2), axis=1)
+            good = status & back_status & (forward_backward_error < self.forward_backward_threshold)
+
+            points_displacement = np.linalg.norm((new_points - self.previous_points).reshape(-1, 2)[good], axis=1)
+            substantial_motion = bool(np.any(points_displacement > self.motion_detection_threshold))
+            self.previous_points = new_points[good].reshape(-1, 1, 2)
+
+        # lost points are replaced in their cells before too few are left
+        if self.previous_points is None or len(self.previous_points) < self.target_keypoints * REDETECTION_RATIO:
+            self._fill_empty_cells(current_frame)
+        return substantial_motion, self.previous_points
+
 # References:
 # https://docs.opencv.org/master/d4/dee/tutorial_optical_flow.html
+# https://docs.opencv.org/4.x/dc/d6b/group__video__track.html#ga86640c1c470f87b2660c096d2b22b2ce
+# https://www.researchgate.net/publication/220930077_Forward-Backward_Error_Automatic_Detection_of_Tracking_Failures
 # https://docs.opencv.org/3.4/db/d8e/tutorial_threshold.html
 # https://docs.opencv.org/3.4/db/d27/tutorial_py_table_of_contents_feature2d.html
 # https://pyimagesearch.com/2016/02/08/opencv-shape-detection/
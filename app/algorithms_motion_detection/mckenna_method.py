@@ -7,71 +7,113 @@ including but not limited to academic papers, articles, blog posts, and YouTube
 
 # constants
 RGB_FACTOR = 255.0
-OFFSET_CHROMATICITY_DIVISOR = 1e-6
-INDEX_CHANNEL_RED = 0
-INDEX_CHANNEL_BLUE = 2
+OFFSET_CHROMATICITY_DIVISOR = 1 / RGB_FACTOR  # one grey level, ratios of dark pixels stay below 255 (fits float16)
 INDEX_CHANNEL_GREEN = 1
+CHROMATICITY_CHANNELS = slice(0, 3, 2)  # red and blue (frame is BGR, order does not matter for the model), view instead of copy
+GRADIENT_KERNEL_SIZE = 1  # [-1, 0, 1] kernel, with scale 0.5 same central difference as np.gradient
+GRADIENT_SCALE = 0.5 / RGB_FACTOR
+MIN_CHROMATICITY_VARIANCE = 1e-3  # noise floor, pixels of still background never get zero variance
+MIN_EDGE_VARIANCE = 1e-3
+STATISTICS_PRECISIONS = {'float32': np.float32, 'float16': np.float16}
 
+
+# per pixel running mean and variance of chromaticity (r/g, b/g) and x/y edges, every buffer is allocated once per frame size
 class McKennaMethod:
     #  initialize method with parameters
-    def __init__(self, alpha=0.8, beta=0.1, chromaticity_edge_thresholds=(3, 1)):
+    def __init__(self, alpha=0.05, beta=0.05, chromaticity_edge_thresholds=(3, 3), precision='float32'):
         self.alpha = alpha  # learning rate for updating gaussian model
         self.beta = beta  # learning rate for updating edge model
-        self.chromaticity_edge_thresholds = chromaticity_edge_thresholds  # chromaticity_value and edge chromaticity_edge_thresholds
-        self.mean_gaussian = None  # gaussian model mean
+        self.chromaticity_edge_thresholds = chromaticity_edge_thresholds  # allowed standard deviations of chromaticity and edges
+        self.statistics_dtype = STATISTICS_PRECISIONS[precision]  # float16 halves memory of the model, float32 is updated by opencv
+        self.mean_gaussian = None  # gaussian model mean, shape (height, width, 2)
         self.variance_gaussian = None  # gaussian model variance
-        self.mean_edge = None  # edge mean
+        self.mean_edge = None  # edge mean, x edges in upper half and y edges in lower half, shape (2 * height, width)
         self.variance_edge = None  # edge variance
+        self.frame_shape = None
+
+    def _allocate_buffers(self, frame):
+        height, width = frame.shape[:2]
+        self.frame_shape = frame.shape
+
+        # gray frame keeps dtype of frame, uint8 frames are never converted to float
+        self.gray_frame = np.empty((height, width), dtype=frame.dtype)
+        self.green_channel = np.empty((height, width, 1), dtype=np.float32)
+        self.chromaticity_value = np.empty((height, width, 2), dtype=np.float32)
+        self.edges = np.empty((2 * height, width), dtype=np.float32)
+
+        # difference to mean, squared difference and threshold of each model
+        self.chromaticity_buffers = [np.empty((height, width, 2), dtype=np.float32) for _ in range(3)]
+        self.edge_buffers = [np.empty((2 * height, width), dtype=np.float32) for _ in range(3)]
+        self.chromaticity_foreground = np.empty((height, width, 2), dtype=bool)
+        self.edge_foreground = np.empty((2 * height, width), dtype=bool)
+        self.foreground = np.empty((height, width), dtype=bool)
+        self.mckenna_foreground_mask = np.empty((height, width, 3), dtype=np.uint8)
+
+        # model starts from first frame with variance of noise floor
+        self._calculate_features(frame)
+        self.mean_gaussian = self.chromaticity_value.astype(self.statistics_dtype)
+        self.variance_gaussian = np.full_like(self.mean_gaussian, MIN_CHROMATICITY_VARIANCE)
+        self.mean_edge = self.edges.astype(self.statistics_dtype)
+        self.variance_edge = np.full_like(self.mean_edge, MIN_EDGE_VARIANCE)
+
+    # chromaticity and edges of frame, written into preallocated buffers
+    def _calculate_features(self, frame):
+        # (r / 255) / (g / 255 + offset) without converting whole frame to float
+        np.add(frame[:, :, INDEX_CHANNEL_GREEN, np.newaxis], RGB_FACTOR * OFFSET_CHROMATICITY_DIVISOR, out=self.green_channel, dtype=np.float32)
+        np.divide(frame[:, :, CHROMATICITY_CHANNELS], self.green_channel, out=self.chromaticity_value, dtype=np.float32)
+
+        # x,y gradient of gray frame to indicate x,y edges in the frame
+        height = frame.shape[0]
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray_frame)
+        cv2.Sobel(self.gray_frame, cv2.CV_32F, 1, 0, dst=self.edges[:height], ksize=GRADIENT_KERNEL_SIZE, scale=GRADIENT_SCALE)
+        cv2.Sobel(self.gray_frame, cv2.CV_32F, 0, 1, dst=self.edges[height:], ksize=GRADIENT_KERNEL_SIZE, scale=GRADIENT_SCALE)
 
-    # processes one frame (RBG image)
+    # marks values further than threshold standard deviations from mean, then moves mean and variance towards values
+    def _classify_and_update(self, values, mean, variance, buffers, learning_rate, threshold, min_variance, foreground):
+        difference, squared_difference, variance_threshold = buffers
+        np.subtract(values, mean, out=difference)
+        np.multiply(difference, difference, out=squared_difference)
+
+        # (value - mean)^2 > threshold^2 * variance, compared without square root
+        np.maximum(variance, min_variance, out=variance_threshold)
+        variance_threshold *= threshold * threshold
+        np.greater(squared_difference, variance_threshold, out=foreground)
+
+        if mean.dtype == np.float32:
+            cv2.accumulateWeighted(values, mean, learning_rate)
+            cv2.accumulateWeighted(squared_difference, variance, learning_rate)
+        else:
+            # opencv has no float16 accumulation, same update with numpy
+            difference *= learning_rate
+            np.add(mean, difference, out=mean, casting='same_kind')
+            variance *= 1 - learning_rate
+            squared_difference *= learning_rate
+            np.add(variance, squared_difference, out=variance, casting='same_kind')
+
+    # processes one frame (BGR image), returned mask buffer is reused by next frame
     def process_one_frame(self, frame):
-        # processes one frame 
-        frame = frame.astype(np.float32) / RGB_FACTOR
-        
-        # calculates chromaticity_value values for the frame
-        chromaticity_value = frame[:, :, [INDEX_CHANNEL_RED, INDEX_CHANNEL_BLUE]] / (frame[:, :, INDEX_CHANNEL_GREEN][:, :, np.newaxis] + OFFSET_CHROMATICITY_DIVISOR)
-
-        # calculates x,y gradient to indicate x,y edges in the frame
-        x_gradient, y_gradient = np.gradient(frame, axis=(0, 1))
-        x_edges, y_edges = x_gradient, y_gradient
-   
-        if self.mean_gaussian is None:
-            # calculate mean and variance for chromaticity and edges
-            self.mean_gaussian = np.mean(chromaticity_value, axis=(0, 1))
-            self.variance_gaussian = np.var(chromaticity_value, axis=(0, 1))
-            self.mean_edge = np.mean(np.stack([x_edges, y_edges]), axis=(0, 1, 2))
-            self.variance_edge = np.var(np.stack([x_edges, y_edges]), axis=(0, 1, 2))
-
-        # by using calculated means/variances updates gaussian and edge models 
-        self.mean_gaussian = self.alpha * np.mean(chromaticity_value, axis=(0, 1)) + (1 - self.alpha) * self.mean_gaussian
-        self.variance_gaussian = self.alpha * np.var(chromaticity_value, axis=(0, 1)) + (1 - self.alpha) * self.variance_gaussian
-        self.mean_edge = self.beta * np.mean(np.stack([x_edges, y_edges]), axis=(0, 1, 2)) + (1 - self.beta) * self.mean_edge
-        self.variance_edge = self.beta * np.var(np.stack([x_edges, y_edges]), axis=(0, 1, 2)) + (1 - self.beta) * self.variance_edge
-
-        # calculate difference for chromaticity_value
-        chromaticity_difference = np.abs(chromaticity_value - self.mean_gaussian)
-        
-        # calculate difference for edge
-        edge_difference_x = np.abs(x_edges - self.mean_edge)
-        edge_difference_y = np.abs(y_edges - self.mean_edge)
-        edge_difference_sum = np.sum(np.stack([edge_difference_x, edge_difference_y]), axis=-1)
-  
-        # make sures that compatible for broadcasting - shape: (360, 640, 1)
-        edge_difference_sum = edge_difference_sum[..., np.newaxis]  
-
-        # make sure that it's scalar for broadcasting
-        scalar_edge_variance = self.variance_edge if np.isscalar(self.variance_edge) else np.mean(self.variance_edge)
-
-        # pixels classification (foreground or background) based on the calculated thresholds
-        mckenna_foreground_mask = (chromaticity_difference > self.chromaticity_edge_thresholds[0] * self.variance_gaussian) | \
-                        (edge_difference_sum > self.chromaticity_edge_thresholds[1] * scalar_edge_variance)
-     
-        # update shape and convert to a three channel image
-        mckenna_foreground_mask = mckenna_foreground_mask.any(axis=-1).astype(np.uint8)
-        mckenna_foreground_mask = cv2.cvtColor(mckenna_foreground_mask, cv2.COLOR_GRAY2BGR)
-      
+        if self.frame_shape != frame.shape or self.gray_frame.dtype != frame.dtype:
+            self._allocate_buffers(frame)
+            self.mckenna_foreground_mask.fill(0)
+            return self.mckenna_foreground_mask
+
+        self._calculate_features(frame)
+        self._classify_and_update(self.chromaticity_value, self.mean_gaussian, self.variance_gaussian, self.chromaticity_buffers,
+                                  self.alpha, self.chromaticity_edge_thresholds[0], MIN_CHROMATICITY_VARIANCE, self.chromaticity_foreground)
+        self._classify_and_update(self.edges, self.mean_edge, self.variance_edge, self.edge_buffers,
+                                  self.beta, self.chromaticity_edge_thresholds[1], MIN_EDGE_VARIANCE, self.edge_foreground)
+
+        # pixel is foreground if chromaticity or any edge changed
+        height = frame.shape[0]
+        np.logical_or(self.chromaticity_foreground[:, :, 0], self.chromaticity_foreground[:, :, 1], out=self.foreground)
+        np.logical_or(self.foreground, self.edge_foreground[:height], out=self.foreground)
+        np.logical_or(self.foreground, self.edge_foreground[height:], out=self.foreground)
+
+        # convert to a three channel image with values 0 and 1
+        cv2.cvtColor(self.foreground.view(np.uint8), cv2.COLOR_GRAY2BGR, dst=self.mckenna_foreground_mask)
+
         # return foreground mask with detected motion
-        return mckenna_foreground_mask
+        return self.mckenna_foreground_mask
 
 # References:
 # https://www.researchgate.net/profile/Zoran-Duric/publication/221292566_Tracking_Interacting_People/links/00b49517ed34926c3c000000/Tracking-Interacting-People.pdf
@@ -94,6 +136,9 @@ class McKennaMethod:
 # https://machinelearningmastery.com/learning-rate-for-deep-learning-neural-networks/
 # https://stackoverflow.com/questions/54170933/convert-a-one-dimensional-dataframe-into-a-3-dimensional-for-rgb-image
 # https://de.mathworks.com/help/matlab/ref/im2frame.html
+# https://docs.opencv.org/4.x/d7/df3/group__imgproc__motion.html#ga4f9552b541187f61f6818e8d2d826bc7
+# https://numpy.org/doc/stable/reference/ufuncs.html#output-arguments
+# https://docs.opencv.org/4.x/d4/d86/group__imgproc__filter.html#gacea54f142e81b6758cb6f375ce782c8d
 
 """ END - Documentation and research materials were used in the development of the code, 
 including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -0,0 +1,169 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+MAX_BATCH_SIZE = 8  # frames run through detection model in one call
+MAX_BATCH_WAIT_TIME = 0.02  # seconds the first frame of a batch waits for more frames
+RESULT_TIMEOUT = 10.0  # seconds a caller waits for detections of its frame
+DETECTION_OUTPUT_KEYS = ('detection_boxes', 'detection_scores', 'detection_classes')
+SERVING_SIGNATURE = 'serving_default'
+
+
+# checks input signature of SavedModel, models exported with batch size 1 can not run batches
+def model_supports_batching(detection_model):
+    try:
+        _, input_signature = detection_model.signatures[SERVING_SIGNATURE].structured_input_signature
+        for tensor_spec in input_signature.values():
+            batch_size = tensor_spec.shape[0]
+            if batch_size is not None and batch_size == 1:
+                return False
+    except Exception:
+        # signature is unknown (e.g. model is not a SavedModel), first batch call decides
+        pass
+    return True
+
+# converts model outputs (tensors) to numpy arrays, only keys needed for filtering are converted
+def convert_detections_to_numpy(object_detections):
+    return {key: np.asarray(object_detections[key]) for key in DETECTION_OUTPUT_KEYS}
+
+
+# collects frames from all cameras into batches limited by size and waiting time and runs model once per batch
+class BatchedInferenceService(object):
+    def __init__(self, detection_model, max_batch_size=MAX_BATCH_SIZE, max_batch_wait_time=MAX_BATCH_WAIT_TIME):
+        self.detection_model = detection_model
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait_time = max_batch_wait_time
+        self.supports_batching = None  # checked when first batch is run, model may still be loading before
+
+        # jobs are (frame, future)
+        self.inference_jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.worker_thread = None
+        self.is_running = False
+
+        self.processed_batches = 0
+        self.processed_frames = 0
+
+    # queues RGB frame and returns future with detections of the frame (arrays keep batch axis of size 1)
+    def submit(self, frame):
+        future = Future()
+        self._start_worker()
+        self.inference_jobs.put((frame, future))
+        return future
+
+    # runs detection for frame and waits for result, used instead of calling detection model directly
+    def detect(self, frame, timeout=RESULT_TIMEOUT):
+        return self.submit(frame).result(timeout=timeout)
+
+    # worker is started on first use
+    def _start_worker(self):
+        with self.lock:
+            if self.worker_thread is None or not self.worker_thread.is_alive():
+                self.is_running = True
+                self.worker_thread = threading.Thread(target=self._run_batches_in_thread, daemon=True)
+                self.worker_thread.start()
+
+    def stop(self):
+        self.is_running = False
+        # wakes worker waiting for jobs
+        self.inference_jobs.put(None)
+        if self.worker_thread is not None:
+            self.worker_thread.join(timeout=RESULT_TIMEOUT)
+            self.worker_thread = None
+
+    def _run_batches_in_thread(self):
+        while self.is_running:
+            batch_jobs = self._collect_batch()
+            if batch_jobs:
+                self.run_batch(batch_jobs)
+
+    # waits for first job, then collects more jobs until batch is full or waiting time is over
+    def _collect_batch(self):
+        first_job = self.inference_jobs.get()
+        if first_job is None:
+            return []
+
+        batch_jobs = [first_job]
+        if self.supports_batching is None:
+            self.supports_batching = model_supports_batching(self.detection_model)
+        batch_size = self.max_batch_size if self.supports_batching else 1
+        deadline = time.monotonic() + self.max_batch_wait_time
+        while len(batch_jobs) < batch_size:
+            remaining_time = deadline - time.monotonic()
+            if remaining_time <= 0:
+                break
+            try:
+                job = self.inference_jobs.get(timeout=remaining_time)
+            except queue.Empty:
+                break
+            if job is None:
+                self.is_running = False
+                break
+            batch_jobs.append(job)
+        return batch_jobs
+
+    # runs model for collected jobs and completes their futures
+    def run_batch(self, batch_jobs):
+        # frames of same size are stacked into one tensor, cameras with other resolution get their own call
+        jobs_by_shape = {}
+        for frame, future in batch_jobs:
+            jobs_by_shape.setdefault(frame.shape, []).append((frame, future))
+
+        for jobs in jobs_by_shape.values():
+            try:
+                batch_detections = self._run_model([frame for frame, _ in jobs])
+            except Exception as e:
+                logging.error(f"Error! Batched object detection failed: {str(e)}")
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+
+            # every frame gets its own slice of outputs, batch axis is kept so results look like single frame calls
+            for batch_index, (_, future) in enumerate(jobs):
+                future.set_result({key: value[batch_index:batch_index + 1] for key, value in batch_detections.items()})
+
+        self.processed_batches += 1
+        self.processed_frames += len(batch_jobs)
+
+    def _run_model(self, frames):
+        import tensorflow as tf
+
+        if len(frames) > 1 and self.supports_batching:
+            try:
+                return convert_detections_to_numpy(self.detection_model(tf.convert_to_tensor(np.stack(frames), dtype=tf.uint8)))
+            except Exception as e:
+                # model accepts one frame only, frames are processed one by one from now on
+                logging.warning(f"Detection model does not accept batches, running frames one by one: {str(e)}")
+                self.supports_batching = False
+
+        frame_detections = [
+            convert_detections_to_numpy(self.detection_model(tf.convert_to_tensor(frame[np.newaxis], dtype=tf.uint8)))
+            for frame in frames
+        ]
+        return {key: np.concatenate([detections[key] for detections in frame_detections]) for key in DETECTION_OUTPUT_KEYS}
+
+    def get_statistics(self):
+        return {
+            'supports_batching': self.supports_batching,
+            'processed_batches': self.processed_batches,
+            'processed_frames': self.processed_frames,
+            'queued_frames': self.inference_jobs.qsize()
+        }
+
+# References:
+# https://www.tensorflow.org/api_docs/python/tf/saved_model/load
+# https://www.tensorflow.org/guide/saved_model#specifying_signatures_during_export
+# https://www.tensorflow.org/tfx/serving/serving_config#batching_configuration
+# https://docs.python.org/3/library/concurrent.futures.html#future-objects
+# https://docs.python.org/3/library/queue.html
+# https://numpy.org/doc/stable/reference/generated/numpy.stack.html
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -1,10 +1,14 @@
 import os
 import cv2
-import time
+import queue
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import numpy as np
-import tensorflow as tf
 import logging
+from app.algorithms_object_detection.region_of_interest import create_detection_crops, map_boxes_to_frame, suppress_duplicate_detections, CROP_INPUT_SIZE
+from app.computer_vision.frame_pyramid import letterbox, map_letterboxed_boxes_to_frame
+from app.metrics.pipeline_metrics import timed_stage
 
 """ START - Documentation and research materials were used in the development of the code, 
 including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -19,53 +23,121 @@ OBJECT_TYPE_CLASS_NAME = {
 COLOR_CONVERSION = cv2.COLOR_BGR2RGB
 RECT_COLOR = (0, 0, 255)  # red color in BGR
 RECT_THICKNESS = 2  # rectangle border thickness
-WARMUP_FRAMES = 2  # skippped frames during camera "warm-up"
-IMG_PROCESSING_INTERVAL = 1  # image processing interval
-SLEEP_TIME = 0.01  # sleep lengh (seconds) between batch processing 
-processed_images = set() # to keep track of processed images 
+DETECTION_QUEUE_SIZE = 8  # pending detection jobs, new jobs are rejected when queue is full
+PROCESSED_IMAGES_REGISTRY_SIZE = 256  # processed images remembered for deduplication, oldest are evicted
+DETECTION_QUEUE_TIMEOUT = 0.5  # seconds worker waits for a job before checking if it should stop
+MAX_MODEL_WAIT_ATTEMPTS = 120  # times job is queued again while model is loading (each waits up to queue timeout)
+PROCESSED_IMAGE_PREFIX = "processed_"
+PROCESSED_IMAGE_EXTENSION = ".jpg"
+
+# returns ids of classes that are reported (person, dog etc.)
+def get_reported_class_ids(category_index):
+    return np.array([class_id for class_id, category in category_index.items() if category['name'] in OBJECT_TYPE_CLASS_NAME], dtype=np.int64)
+
+# filters detections of one frame in a batch with vectorized numpy operations instead of looping over all detections
+def filter_detections(object_detections, category_index, detection_threshold, batch_index=0):
+    scores = np.atleast_1d(np.asarray(object_detections['detection_scores'])[batch_index])
+    class_ids = np.atleast_1d(np.asarray(object_detections['detection_classes'])[batch_index]).astype(np.int64)
+    boxes = np.atleast_2d(np.asarray(object_detections['detection_boxes'])[batch_index])
+
+    # keeps detections above threshold that belong to reported classes
+    selected_indexes = np.flatnonzero((scores > detection_threshold) & np.isin(class_ids, get_reported_class_ids(category_index)))
+
+    filtered_results = []
+    for i in selected_indexes:
+        class_name = category_index[int(class_ids[i])]['name']
+        filtered_results.append({
+            'class_name': class_name,
+            'object_type': OBJECT_TYPE_CLASS_NAME[class_name],
+            'score': float(scores[i]),
+            'bounding_box': boxes[i]
+        })
+    return filtered_results
+
+# models behind a DetectionModelHandle are ready once loaded in background, other models are always ready
+def is_detection_model_ready(detection_model):
+    is_ready = getattr(type(detection_model), 'is_ready', None)
+    return is_ready(detection_model) if is_ready is not None else True
+
+# runs detection for RGB frames [N, H, W, 3], returns detections (arrays with batch axis of 1) of every frame
+def run_detection_model(frames, detection_model, inference_service=None):
+    if inference_service is not None:
+        # all frames are submitted before waiting so they are batched together (and with frames of other cameras)
+        futures = [inference_service.submit(frame) for frame in frames]
+        return [future.result() for future in futures]
+
+    import tensorflow as tf
+
+    # converts frames to a TensorFlow tensor, object detection on processed frames one by one
+    return [detection_model(tf.convert_to_tensor(frame[np.newaxis], dtype=tf.uint8)) for frame in frames]
+
+# runs detector on crops of RGB frame and returns detections with boxes in full frame coordinates
+def detect_objects_in_crops(frame, crops, detection_model, category_index, detection_threshold, inference_service=None):
+    frame_height, frame_width = frame.shape[:2]
+
+    # merged crops are not square, they are letterboxed so objects keep their proportions and crops run as one batch
+    letterboxed_crops = [letterbox(frame[y_min:y_max, x_min:x_max], CROP_INPUT_SIZE) for x_min, y_min, x_max, y_max in crops]
+    crop_frames = np.stack([crop_frame for crop_frame, _ in letterboxed_crops])
+
+    if inference_service is not None:
+        # crops run as one batch
+        crop_detections = run_detection_model(crop_frames, detection_model, inference_service)
+    else:
+        # without batching service crops are run one by one (SavedModel is exported with batch size 1)
+        crop_detections = [run_detection_model(crop_frame[np.newaxis], detection_model)[0] for crop_frame in crop_frames]
+
+    detections = []
+    for crop, (_, letterbox_geometry), object_detections in zip(crops, letterboxed_crops, crop_detections):
+        crop_width, crop_height = crop[2] - crop[0], crop[3] - crop[1]
+        for detection in filter_detections(object_detections, category_index, detection_threshold):
+            crop_box = map_letterboxed_boxes_to_frame(detection['bounding_box'], letterbox_geometry, crop_width, crop_height, CROP_INPUT_SIZE)
+            detection['bounding_box'] = map_boxes_to_frame(crop_box, crop, frame_width, frame_height)[0]
+            detections.append(detection)
+
+    # same object can be found in two merged crops
+    return suppress_duplicate_detections(detections)
 
 # handles object recognition 
-def object_recognition(frame, detection_model, category_index, detection_threshold):
+@timed_stage('object_recognition')
+def object_recognition(frame, detection_model, category_index, detection_threshold, draw_detections=True, inference_service=None, motion_regions=None):
     # verifies that input frame is valid
     if frame is None or not isinstance(frame, np.ndarray):
         # if frame is not valid, returns original frame and an empty list 
         return frame, []
 
-    # verifies that detection model is loaded
-    if detection_model is None:
-        # if the detection model is not loaded, returns original frame 
-        return frame
+    # verifies that detection model is loaded (model handle may still be loading in background)
+    if detection_model is None or not is_detection_model_ready(detection_model):
+        # if the detection model is not loaded, returns original frame and an empty list
+        return frame, []
 
     try:
-        # converts frame to RGB format and uint8 data type 
-        frame_processed = cv2.cvtColor(frame, COLOR_CONVERSION)
-        frame_processed = frame_processed.astype(np.uint8)
-
-        # converts frame to a TensorFlow tensor
-        tf_input_tensor = tf.convert_to_tensor([frame_processed], dtype=tf.uint8)
-
-        # object detection on processed frame
-        object_detections = detection_model(tf_input_tensor)
-
-        # filters specified classes (person, dog etc.)
-        filtered_results = []
-        for i in range(len(object_detections['detection_boxes'][0])):
-            score = object_detections['detection_scores'][0][i]
-            if score > detection_threshold:
-                class_id = int(object_detections['detection_classes'][0][i])
-                class_name = category_index[class_id]['name']
-                if class_name in OBJECT_TYPE_CLASS_NAME:
-                    object_type = OBJECT_TYPE_CLASS_NAME[class_name]
-                    bounding_box = object_detections['detection_boxes'][0][i]
-                    
-                    # filtered detection are appended to the list
-                    filtered_results.append({
-                        'class_name': class_name,
-                        'object_type': object_type,
-                        'score': score,
-                        'bounding_box': bounding_box
-                    })
+        # merges motion regions into a few crops, no crops means full frame is used
+        crops = create_detection_crops(motion_regions, frame.shape[1], frame.shape[0]) if motion_regions else []
+
+        if crops:
+            # converts frame to RGB format and uint8 data type 
+            frame_processed = cv2.cvtColor(frame, COLOR_CONVERSION)
+            frame_processed = frame_processed.astype(np.uint8)
+
+            # detector runs only on motion crops (more resolution for small objects, less compute for quiet frames)
+            filtered_results = detect_objects_in_crops(frame_processed, crops, detection_model, category_index, detection_threshold, inference_service)
+        else:
+            # letterboxed frame keeps proportions of objects and has detector input size for every camera resolution
+            detector_input, letterbox_geometry = letterbox(frame.astype(np.uint8, copy=False), CROP_INPUT_SIZE)
+            detector_input = cv2.cvtColor(detector_input, COLOR_CONVERSION)
+            object_detections = run_detection_model(detector_input[np.newaxis], detection_model, inference_service)[0]
+
+            # filters specified classes (person, dog etc.)
+            filtered_results = filter_detections(object_detections, category_index, detection_threshold)
+            for detection in filtered_results:
+                detection['bounding_box'] = map_letterboxed_boxes_to_frame(
+                    detection['bounding_box'], letterbox_geometry, frame.shape[1], frame.shape[0], CROP_INPUT_SIZE
+                )[0]
         
+        # read only frames (e.g. from shared frame bus) are returned without drawing
+        if not draw_detections:
+            return frame, filtered_results
+
         # draws bounding boxes on the original frame 
         frame_with_detections_boxes_labels = draw_boxes_labels_on_detections(frame, filtered_results)
 
@@ -108,57 +180,131 @@ def draw_boxes_labels_on_detections(np_image, object_detections):
     return np_image
 
 
-# performs image processing in it's own thread to help with video lag
-def perform_image_processing_in_thread(video_camera_instance, path_for_saving_raw_images, path_for_saving_processed_image, detection_model, category_index, detection_threshold):
-    # initialize frame counter
-    counter = 0
-
-    # set video_camera_warmup to True
-    video_camera_warmup = True
-
-    while True:
+# bounded queue of detection jobs fed directly by camera motion path with frame arrays (no directory scan)
+class ObjectDetectionQueue(object):
+    def __init__(self, detection_model, category_index, detection_threshold, path_for_saving_processed_image,
+                 max_queue_size=DETECTION_QUEUE_SIZE, registry_size=PROCESSED_IMAGES_REGISTRY_SIZE, inference_service=None):
+        self.detection_model = detection_model
+        self.inference_service = inference_service  # optional service batching frames of all cameras
+        self.category_index = category_index
+        self.detection_threshold = detection_threshold
+        self.path_for_saving_processed_image = path_for_saving_processed_image
+        self.registry_size = registry_size
+
+        # jobs are (image key, frame, motion regions, attempts), queue size gives backpressure to camera
+        self.detection_jobs = queue.Queue(maxsize=max_queue_size)
+
+        # keys of queued jobs and processed images (image key -> detected objects), used for deduplication
+        self.pending_image_keys = set()
+        self.processed_images = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.rejected_jobs = 0
+        self.worker_thread = None
+        self.is_running = False
+
+    # adds frame to queue, returns False if image was already queued/processed or queue is full
+    # motion regions (x, y, w, h) limit detection to crops around motion, None means full frame
+    def submit(self, image_key, frame, motion_regions=None):
+        if frame is None or not isinstance(frame, np.ndarray):
+            return False
+
+        with self.lock:
+            if image_key in self.pending_image_keys or image_key in self.processed_images:
+                return False
+            try:
+                # frame is copied because camera reuses its frame buffers
+                self.detection_jobs.put_nowait((image_key, frame.copy(), motion_regions, 0))
+            except queue.Full:
+                # camera is not blocked, job is dropped and image can still be read from disk later
+                self.rejected_jobs += 1
+                logging.warning(f"Object detection queue is full, image {image_key} was not queued.")
+                return False
+            self.pending_image_keys.add(image_key)
+            return True
+
+    # returns detected objects of processed image or None if image was not processed
+    def get_detected_objects(self, image_key):
+        with self.lock:
+            return self.processed_images.get(image_key)
+
+    # runs detection for one queued job, returns False if no job arrived before timeout
+    def process_next_job(self, timeout=DETECTION_QUEUE_TIMEOUT):
         try:
-            current_time = time.time()
-
-            if video_camera_warmup:
-                # skip frames until warmup frames threshold is reached
-                if counter >= WARMUP_FRAMES:
-                    video_camera_warmup = False   # finished warmup 
-                counter += 1
-                continue # skip frame during warmup
-
-            if current_time - video_camera_instance.last_processed_time >= IMG_PROCESSING_INTERVAL:
-                for raw_image_name in sorted(os.listdir(path_for_saving_raw_images)):
-                    counter += 1
-
-                    image_path_raw = os.path.join(path_for_saving_raw_images, raw_image_name)
+            image_key, frame, motion_regions, attempts = self.detection_jobs.get(timeout=timeout)
+        except queue.Empty:
+            return False
 
-                    # verify if image was processed
-                    if image_path_raw in processed_images:
-                        continue
+        # jobs taken while model is loading wait for it and are queued again, so first motion events are not lost
+        if not is_detection_model_ready(self.detection_model):
+            self.detection_model.get_model(timeout=timeout)
+            if not is_detection_model_ready(self.detection_model):
+                self._requeue_job(image_key, frame, motion_regions, attempts)
+                return True
 
-                    frame = cv2.imread(image_path_raw)
-
-                    if frame is not None and isinstance(frame, np.ndarray):
-                        # do object detection on the frame
-                        frame_processed, _ = object_recognition(frame, detection_model, category_index, detection_threshold)
-
-                         # save processed frame in a folder
-                        image_name_processed = f"processed_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                        image_path_processed = os.path.join(path_for_saving_processed_image, image_name_processed)
-                        cv2.imwrite(image_path_processed, frame_processed)
-                
-
-                        # adds processed image to the set
-                        processed_images.add(image_path_raw)
-
-                    video_camera_instance.last_processed_time = current_time
-
-            # sleep before processing next batch 
-            time.sleep(SLEEP_TIME)
+        try:
+            # do object detection on the frame
+            frame_processed, detected_objects = object_recognition(
+                frame, self.detection_model, self.category_index, self.detection_threshold, inference_service=self.inference_service, motion_regions=motion_regions
+            )
+
+            # save processed frame in a folder
+            image_name_processed = f"{PROCESSED_IMAGE_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}{PROCESSED_IMAGE_EXTENSION}"
+            cv2.imwrite(os.path.join(self.path_for_saving_processed_image, image_name_processed), frame_processed)
         except Exception as e:
             logging.error(f"Error in the image processing thread: {str(e)}")
-            break
+            detected_objects = []
+
+        self._register_processed_image(image_key, detected_objects)
+        return True
+
+    # queues job again while model is loading, job is rejected if loading failed, took too long or queue is full
+    def _requeue_job(self, image_key, frame, motion_regions, attempts):
+        with self.lock:
+            if not self.detection_model.ready_event.is_set() and attempts < MAX_MODEL_WAIT_ATTEMPTS:
+                try:
+                    self.detection_jobs.put_nowait((image_key, frame, motion_regions, attempts + 1))
+                    return
+                except queue.Full:
+                    pass
+            self.pending_image_keys.discard(image_key)
+            self.rejected_jobs += 1
+        logging.warning(f"Object detection model is not ready, image {image_key} was not processed.")
+
+    # remembers processed image, evicts oldest when registry is full
+    def _register_processed_image(self, image_key, detected_objects):
+        with self.lock:
+            self.pending_image_keys.discard(image_key)
+            self.processed_images[image_key] = detected_objects
+            self.processed_images.move_to_end(image_key)
+            while len(self.processed_images) > self.registry_size:
+                self.processed_images.popitem(last=False)
+
+    # starts worker thread, does nothing if it is already running
+    def start(self):
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            return
+        self.is_running = True
+        self.worker_thread = threading.Thread(target=self._process_jobs_in_thread, daemon=True)
+        self.worker_thread.start()
+
+    def stop(self, timeout=None):
+        self.is_running = False
+        if self.worker_thread is not None and self.worker_thread is not threading.current_thread():
+            self.worker_thread.join(timeout=timeout)
+        self.worker_thread = None
+
+    # performs image processing in it's own thread to help with video lag, blocks on queue instead of polling
+    def _process_jobs_in_thread(self):
+        while self.is_running:
+            self.process_next_job()
+
+    def get_statistics(self):
+        return {
+            'queued_jobs': self.detection_jobs.qsize(),
+            'rejected_jobs': self.rejected_jobs,
+            'processed_images': len(self.processed_images)
+        }
 
 # References:
 # https://github.com/tensorflow/models/blob/master/research/object_detection/configs/tf2/ssd_mobilenet_v2_320x320_coco17_tpu-8.config
@@ -199,6 +345,9 @@ def perform_image_processing_in_thread(video_camera_instance, path_for_saving_ra
 # https://forum.opencv.org/t/opencv-box-not-showing-up-in-opencv-for-image-detection-or-realtime-detection/10583
 # https://www.researchgate.net/profile/Sidra-Mehtab/publication/343282935_Object_Detection_and_Tracking_Using_OpenCV_in_Python/links/5f21672b299bf134048f8907/Object-Detection-and-Tracking-Using-OpenCV-in-Python.pdf
 # https://www.programiz.com/python-programming/methods/built-in/set
+# https://docs.python.org/3/library/queue.html
+# https://numpy.org/doc/stable/reference/generated/numpy.isin.html
+# https://docs.python.org/3/library/collections.html#collections.OrderedDict
 # https://note.nkmk.me/en/python-opencv-bgr-rgb-cvtcolor/
 # https://www.geeksforgeeks.org/python-opencv-cv2-cvtcolor-method/
 # https://github.com/tensorflow/models/issues/4682
@@ -0,0 +1,105 @@
+import numpy as np
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+REGION_PADDING_RATIO = 0.25  # motion rect is enlarged on every side so the whole object is in the crop
+MIN_CROP_SIZE = 96  # pixels, smaller crops would be upscaled too much
+MAX_NUMBER_OF_CROPS = 3  # more regions are merged so detector runs at most this many times per frame
+MAX_CROP_AREA_RATIO = 0.6  # crops covering more of the frame are replaced by full frame
+CROP_INPUT_SIZE = 320  # crops are letterboxed to detector input size so they can be batched together
+NMS_IOU_THRESHOLD = 0.5  # detections of same class in overlapping crops above this IoU are duplicates
+
+
+# enlarges motion rect (x, y, w, h) by padding and makes it square because detector input is square
+def pad_region(region, frame_width, frame_height, padding_ratio=REGION_PADDING_RATIO, min_crop_size=MIN_CROP_SIZE):
+    x, y, w, h = region
+    center_x, center_y = x + w / 2, y + h / 2
+    crop_size = max(w, h) * (1 + 2 * padding_ratio)
+    crop_size = min(max(crop_size, min_crop_size), frame_width, frame_height)
+
+    # square is moved inside the frame instead of being cut at the border
+    x_min = int(round(min(max(center_x - crop_size / 2, 0), frame_width - crop_size)))
+    y_min = int(round(min(max(center_y - crop_size / 2, 0), frame_height - crop_size)))
+    return x_min, y_min, x_min + int(crop_size), y_min + int(crop_size)
+
+def do_crops_overlap(crop_1, crop_2):
+    return crop_1[0] < crop_2[2] and crop_2[0] < crop_1[2] and crop_1[1] < crop_2[3] and crop_2[1] < crop_1[3]
+
+def merge_two_crops(crop_1, crop_2):
+    return min(crop_1[0], crop_2[0]), min(crop_1[1], crop_2[1]), max(crop_1[2], crop_2[2]), max(crop_1[3], crop_2[3])
+
+def get_crop_area(crop):
+    return (crop[2] - crop[0]) * (crop[3] - crop[1])
+
+# merges motion rects into a few padded crops (x_min, y_min, x_max, y_max), empty list means full frame should be used
+def create_detection_crops(motion_regions, frame_width, frame_height, max_number_of_crops=MAX_NUMBER_OF_CROPS, max_crop_area_ratio=MAX_CROP_AREA_RATIO):
+    # square crop can not hold region longer than short side of frame
+    if any(max(w, h) > min(frame_width, frame_height) for _, _, w, h in motion_regions):
+        return []
+    crops = [pad_region(region, frame_width, frame_height) for region in motion_regions]
+
+    # merges overlapping crops until no crops overlap
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(crops)):
+            for j in range(i + 1, len(crops)):
+                if do_crops_overlap(crops[i], crops[j]):
+                    crops[i] = merge_two_crops(crops[i], crops[j])
+                    del crops[j]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    # merges pair giving smallest crop until number of crops is within limit
+    while len(crops) > max_number_of_crops:
+        pairs = [(get_crop_area(merge_two_crops(crops[i], crops[j])), i, j) for i in range(len(crops)) for j in range(i + 1, len(crops))]
+        _, i, j = min(pairs)
+        crops[i] = merge_two_crops(crops[i], crops[j])
+        del crops[j]
+
+    # cropping saves nothing when crops cover most of the frame
+    if sum(get_crop_area(crop) for crop in crops) > max_crop_area_ratio * frame_width * frame_height:
+        return []
+    return crops
+
+# converts normalized [y_min, x_min, y_max, x_max] boxes of a crop to normalized boxes of the full frame
+def map_boxes_to_frame(boxes, crop, frame_width, frame_height):
+    x_min, y_min, x_max, y_max = crop
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    scale = np.array([(y_max - y_min) / frame_height, (x_max - x_min) / frame_width] * 2, dtype=np.float32)
+    offset = np.array([y_min / frame_height, x_min / frame_width] * 2, dtype=np.float32)
+    return boxes * scale + offset
+
+# intersection over union of one box with many boxes, all [y_min, x_min, y_max, x_max]
+def calculate_iou(box, boxes):
+    y_min = np.maximum(box[0], boxes[:, 0])
+    x_min = np.maximum(box[1], boxes[:, 1])
+    y_max = np.minimum(box[2], boxes[:, 2])
+    x_max = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(y_max - y_min, 0, None) * np.clip(x_max - x_min, 0, None)
+    box_area = (box[2] - box[0]) * (box[3] - box[1])
+    boxes_area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum(box_area + boxes_area - intersection, 1e-9)
+
+# removes duplicates of same object found in overlapping crops, keeps detection with highest score
+def suppress_duplicate_detections(detections, iou_threshold=NMS_IOU_THRESHOLD):
+    kept_detections = []
+    for detection in sorted(detections, key=lambda detection: detection['score'], reverse=True):
+        same_class_boxes = [kept['bounding_box'] for kept in kept_detections if kept['class_name'] == detection['class_name']]
+        if same_class_boxes and np.max(calculate_iou(detection['bounding_box'], np.array(same_class_boxes))) > iou_threshold:
+            continue
+        kept_detections.append(detection)
+    return kept_detections
+
+# References:
+# https://en.wikipedia.org/wiki/Region_of_interest
+# https://en.wikipedia.org/wiki/Jaccard_index
+# https://learnopencv.com/non-maximum-suppression-theory-and-implementation-in-pytorch/
+# https://docs.opencv.org/4.x/dd/d49/tutorial_py_contour_features.html
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -0,0 +1,250 @@
+import logging
+import threading
+import time
+import wave
+import numpy as np
+import pyaudio
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+SOUND_FORMAT = pyaudio.paInt16  # samples are read and stored as 16 bit integers
+AUDIO_CHUNK_SIZE = 1024  # samples per channel read from device at once
+DEFAULT_AUDIO_PRE_ROLL_DURATION = 3.0  # seconds of sound kept before motion, same as video pre-roll
+RING_BUFFER_MARGIN = 1.0  # extra seconds in ring buffer so pre-roll is complete when recording starts late
+READ_RETRY_INTERVAL = 0.5  # seconds reader waits after failed read before trying again
+
+
+# keeps last seconds of sound in preallocated array, memory does not grow while recording
+class AudioRingBuffer(object):
+    def __init__(self, capacity, number_of_channels, sample_rate):
+        self.capacity = capacity  # samples per channel
+        self.number_of_channels = number_of_channels
+        self.sample_rate = sample_rate
+        self.samples = np.zeros((capacity, number_of_channels), dtype=np.int16)
+        self.write_position = 0
+        self.number_of_samples = 0  # valid samples in buffer
+        self.end_time = None  # capture time of last sample
+
+    def __len__(self):
+        return self.number_of_samples
+
+    # copies interleaved samples into buffer, oldest samples are overwritten
+    def write(self, samples, end_time):
+        samples = samples.reshape(-1, self.number_of_channels)[-self.capacity:]
+        number_of_new_samples = samples.shape[0]
+
+        # copy is split in two when it reaches end of array
+        first_part = min(number_of_new_samples, self.capacity - self.write_position)
+        self.samples[self.write_position:self.write_position + first_part] = samples[:first_part]
+        self.samples[:number_of_new_samples - first_part] = samples[first_part:]
+
+        self.write_position = (self.write_position + number_of_new_samples) % self.capacity
+        self.number_of_samples = min(self.number_of_samples + number_of_new_samples, self.capacity)
+        self.end_time = end_time
+
+    # returns samples captured after start time (oldest first) and capture time of first returned sample
+    def get_samples_since(self, start_time):
+        if self.end_time is None:
+            return self.samples[:0].copy(), None
+
+        number_of_samples = min(self.number_of_samples, max(0, int(round((self.end_time - start_time) * self.sample_rate))))
+        start_position = (self.write_position - number_of_samples) % self.capacity
+        if start_position + number_of_samples <= self.capacity:
+            samples = self.samples[start_position:start_position + number_of_samples].copy()
+        else:
+            samples = np.concatenate((self.samples[start_position:], self.samples[:self.write_position]))
+        return samples, self.end_time - number_of_samples / self.sample_rate
+
+
+# writes sound straight into WAV file while recording, used when sound is merged with ffmpeg after recording
+class WaveFileSink(object):
+    def __init__(self, path, sample_rate, number_of_channels, sample_width):
+        self.path = path
+        self.wave_file = wave.open(path, 'wb')
+        self.wave_file.setnchannels(number_of_channels)
+        self.wave_file.setsampwidth(sample_width)
+        self.wave_file.setframerate(sample_rate)
+        self.number_of_bytes = 0
+
+    def write_audio(self, sound_frame, timestamp=None):
+        # header is updated once on close, not after every chunk
+        self.wave_file.writeframesraw(sound_frame)
+        self.number_of_bytes += len(sound_frame)
+
+    # closes file, returns True if any sound was written
+    def close(self):
+        self.wave_file.close()
+        return self.number_of_bytes > 0
+
+
+# only one thread reads each input device, recordings of all cameras attach to it as sinks
+class AudioCaptureDevice(object):
+    def __init__(self, device_index=None, chunk_size=AUDIO_CHUNK_SIZE, pre_roll_duration=DEFAULT_AUDIO_PRE_ROLL_DURATION):
+        self.device_index = device_index  # None means default input device
+        self.chunk_size = chunk_size
+        self.pre_roll_duration = pre_roll_duration
+
+        self.audio, self.sound_stream = None, None
+        self.sample_rate, self.number_of_channels, self.sample_width = None, None, None
+        self.ring_buffer = None
+
+        # sinks have write_audio(sound_frame, timestamp), e.g. StreamingVideoMuxer or WaveFileSink
+        self.sinks = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.reader_thread = None
+        self.number_of_users = 0  # cameras sharing this device
+
+        self.read_chunks, self.read_failures = 0, 0
+
+    def is_running(self):
+        return self.reader_thread is not None and self.reader_thread.is_alive()
+
+    # opens device and starts reader thread, returns False if there is no usable input device
+    def start(self):
+        if self.is_running():
+            return True
+        try:
+            self.audio = pyaudio.PyAudio()
+
+            # get/set sample rate and channels dynamically based on device abilities
+            device_index = self.device_index if self.device_index is not None else self.audio.get_default_input_device_info()['index']
+            device_information = self.audio.get_device_info_by_index(device_index)
+            self.sample_rate = int(device_information['defaultSampleRate'])
+            self.number_of_channels = int(device_information['maxInputChannels'])
+            self.sample_width = self.audio.get_sample_size(SOUND_FORMAT)
+
+            self.sound_stream = self.audio.open(
+                format=SOUND_FORMAT,
+                channels=self.number_of_channels,
+                rate=self.sample_rate,
+                input=True,
+                input_device_index=device_index,
+                frames_per_buffer=self.chunk_size
+            )
+        except Exception as e:
+            logging.error(f"Error! Can not open sound input device: {e}")
+            self._close_device()
+            return False
+
+        ring_buffer_capacity = int((self.pre_roll_duration + RING_BUFFER_MARGIN) * self.sample_rate)
+        self.ring_buffer = AudioRingBuffer(ring_buffer_capacity, self.number_of_channels, self.sample_rate)
+        self.stop_event.clear()
+        self.reader_thread = threading.Thread(target=self._read_sound_input, name='audio_capture', daemon=True)
+        self.reader_thread.start()
+        logging.info(f"Sound input opened ({self.sample_rate} Hz, {self.number_of_channels} channels).")
+        return True
+
+    def _read_sound_input(self):
+        while not self.stop_event.is_set():
+            try:
+                sound_frame = self.sound_stream.read(self.chunk_size, exception_on_overflow=False)
+            except Exception as e:
+                if self.stop_event.is_set():
+                    break
+                self.read_failures += 1
+                logging.error(f"Error reading sound frame: {e}")
+                self.stop_event.wait(READ_RETRY_INTERVAL)
+                continue
+
+            # read returns when last sample of chunk arrived, ring buffer is indexed by this end time
+            end_time = time.time()
+            samples = np.frombuffer(sound_frame, dtype=np.int16)
+            # capture time of first sample in chunk, used by sinks to keep sound in sync with video
+            start_time = end_time - samples.size / self.number_of_channels / self.sample_rate
+
+            with self.lock:
+                self.ring_buffer.write(samples, end_time)
+                self.read_chunks += 1
+                for sink in list(self.sinks):
+                    self._write_to_sink(sink, sound_frame, start_time)
+
+    def _write_to_sink(self, sink, sound_frame, timestamp):
+        try:
+            sink.write_audio(sound_frame, timestamp)
+        except Exception as e:
+            # broken sink must not stop sound of other recordings
+            logging.error(f"Error! Sound was not written, sink removed: {e}")
+            self.sinks.remove(sink)
+
+    # sink starts receiving sound, with start time it first gets buffered sound captured since then (pre-roll)
+    def attach(self, sink, start_time=None):
+        with self.lock:
+            if start_time is not None and self.ring_buffer is not None:
+                samples, first_sample_time = self.ring_buffer.get_samples_since(start_time)
+                if samples.size:
+                    self._write_to_sink(sink, samples.tobytes(), first_sample_time)
+            self.sinks.append(sink)
+
+    # after detach returns, sink gets no more sound and can be closed
+    def detach(self, sink):
+        with self.lock:
+            if sink in self.sinks:
+                self.sinks.remove(sink)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.reader_thread is not None:
+            self.reader_thread.join()
+            self.reader_thread = None
+        self._close_device()
+
+    def _close_device(self):
+        try:
+            if self.sound_stream is not None:
+                self.sound_stream.stop_stream()
+                self.sound_stream.close()
+            if self.audio is not None:
+                self.audio.terminate()
+        except Exception as e:
+            logging.error(f"Error! Closing sound input device: {e}")
+        self.audio, self.sound_stream = None, None
+
+    def get_statistics(self):
+        return {
+            'read_chunks': self.read_chunks,
+            'read_failures': self.read_failures,
+            'buffered_seconds': len(self.ring_buffer) / self.sample_rate if self.ring_buffer is not None else 0.0,
+            'sinks': len(self.sinks)
+        }
+
+
+# devices shared by cameras of this process
+audio_capture_devices = {}
+audio_capture_devices_lock = threading.Lock()
+
+
+# returns running capture of input device, None if device can not be opened
+def acquire_audio_capture(device_index=None, pre_roll_duration=DEFAULT_AUDIO_PRE_ROLL_DURATION):
+    with audio_capture_devices_lock:
+        audio_capture = audio_capture_devices.get(device_index)
+        if audio_capture is None:
+            audio_capture = AudioCaptureDevice(device_index, pre_roll_duration=pre_roll_duration)
+            if not audio_capture.start():
+                return None
+            audio_capture_devices[device_index] = audio_capture
+        audio_capture.number_of_users += 1
+        return audio_capture
+
+
+# device is closed when last camera using it releases it
+def release_audio_capture(audio_capture):
+    with audio_capture_devices_lock:
+        audio_capture.number_of_users -= 1
+        if audio_capture.number_of_users > 0:
+            return
+        audio_capture_devices.pop(audio_capture.device_index, None)
+    audio_capture.stop()
+
+# References:
+# https://people.csail.mit.edu/hubert/pyaudio/docs/#pyaudio.PyAudio.open
+# https://people.csail.mit.edu/hubert/pyaudio/docs/#pyaudio.Stream.read
+# https://docs.python.org/3/library/wave.html#wave.Wave_write.writeframesraw
+# https://en.wikipedia.org/wiki/Circular_buffer
+# https://stackoverflow.com/questions/10733903/pyaudio-input-overflowed
+# https://stackoverflow.com/questions/63673551/pyaudio-audio-recording-python
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
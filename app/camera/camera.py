@@ -1,16 +1,31 @@
 import os
 import cv2
 import time
+import numpy as np
 from datetime import datetime 
+from collections import OrderedDict
 from app.tensorFlow.tf_model_utilities import DETECTION_MODEL, CATEGORY_INDEX
-from config import PATH_FOR_SAVING_PROCESSED_IMAGE, PATH_FOR_SAVING_IMAGE, VIDEO_DIRECTORY
+from config import PATH_FOR_SAVING_PROCESSED_IMAGE, PATH_FOR_SAVING_IMAGE, VIDEO_DIRECTORY, OBJECT_DETECTION_MODE, ADAPTIVE_ANALYSIS, ANALYSIS_BUDGET, MOTION_MASK_SCALE, VIDEO_MUXER, PRE_ROLL_SECONDS, PRE_ROLL_MAX_BYTES, PRE_ROLL_JPEG_QUALITY, RECORDING_MODE, SEGMENT_DIRECTORY, SEGMENT_DURATION, SEGMENT_RETENTION_HOURS, EVENT_CLIP_DURATION
 from app.email_notifications.email_token_bucket import TokenBucket
-from app.computer_vision.motion_analysis_utilities import process_and_buffer_motion_data, get_detection_mode_for_user, process_initial_frame, convert_frame_to_jpeg
+from app.computer_vision.motion_analysis_utilities import process_and_buffer_motion_data, get_detection_mode_for_user, convert_frame_to_jpeg, get_video_metadata
+from app.computer_vision.frame_pyramid import FramePyramid, scale_regions, ANALYSIS_FRAME_SIZE
+from app.computer_vision.blob_analysis import find_motion_blobs
+from app.computer_vision.adaptive_analysis_scheduler import AdaptiveAnalysisScheduler
+from app.computer_vision.encode_profiles import ENCODE_PROFILES, DEFAULT_STREAM_PROFILE, ARCHIVE_PROFILE
 from app.algorithms_motion_detection.mckenna_method import McKennaMethod
-from app.algorithms_motion_detection.lukas_kanade_orb_method import LukasKanadeOrb
+from app.algorithms_motion_detection.lukas_kanade_orb_method import GridLukasKanadeOrb, ORB_FEATURES
 from app.computer_vision.motion_detection_processor import ModeProcessor
-import pyaudio
-import wave
+from app.camera.frame_ring_buffer import FrameRingBuffer, FrameRingConsumer
+from app.camera.shared_frame_bus import SharedFrameBus
+from app.camera.video_muxer import StreamingVideoMuxer, is_muxer_available
+from app.camera.pre_roll_buffer import PreRollBuffer, decode_frame, calculate_pre_roll_max_bytes, DEFAULT_PRE_ROLL_MAX_BYTES
+from app.camera.segment_recorder import SegmentRecorder, extract_clip
+from app.camera.live_stream import LiveStream
+from app.camera.mjpeg_broadcaster import MjpegBroadcaster
+from app.camera.audio_capture import WaveFileSink, acquire_audio_capture, release_audio_capture
+from app.camera.clip_finalisation import ClipFinalisationPool, ClipFinalisationJob, MUXING_STATE, RELEASING_STATE, READY_STATE
+from app.algorithms_object_detection.object_detection_utilities import ObjectDetectionQueue
+from app.metrics.pipeline_metrics import pipeline_metrics
 import subprocess
 import threading
 import logging
@@ -26,8 +41,9 @@ logging.basicConfig(level=logging.DEBUG, format='%(asctime)s [%(levelname)s] %(m
 class VideoCamera(object):
     # video constants
     FOURCC = cv2.VideoWriter_fourcc(*'avc1')
-    VIDEO_WIDTH = 640
+    VIDEO_WIDTH = 640  # used until camera reports its native resolution
     VIDEO_HEIGHT = 360
+    MAX_FRAME_WIDTH = 1920  # bigger native frames are scaled down when captured
     VIDEO_FPS = 30.0
     
     # thresholds constants
@@ -61,10 +77,6 @@ class VideoCamera(object):
     MP4_EXTENSION = ".mp4"
     WAV_EXTENSION = "_raw.wav"
     MP4_COMBINED = "_combined.mp4"
-    
-    # audio constants
-    AUDIO_SAMPLE_RATE = 44100
-    AUDIO_CHUNK_SIZE = 1024
 
     CONTOUR_AREA_MIN = 10
     CONTOUR_THRESHOLD = 127  # for binary image conversion
@@ -73,13 +85,29 @@ class VideoCamera(object):
     BINARY_VALUE_MAX = 255  # maximum value for binary images
     LUCAS_KANADE_PARAMETERS = dict(winSize=(21, 21), maxLevel=3, criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 15, 0.02))
     
+    # capture pipeline constants
+    FRAME_RING_BUFFER_SIZE = 8  # number of preallocated frames shared by capture thread and consumers
+    SHARED_FRAME_BUS_SIZE = 8  # motion frames held in shared memory until object detection reads them
+    CONSUMER_WAIT_TIMEOUT = 0.5  # seconds a consumer waits for a new frame before re-checking camera state
+    CAPTURE_RETRY_INTERVAL = 0.05  # pause after a failed read from video camera
+    THREAD_JOIN_TIMEOUT = 2.0  # seconds to wait for pipeline threads to finish
+    MOTION_RECTANGLE_DISPLAY_TIME = 1.0  # seconds the last motion rectangle stays on the live feed
+    MAX_RECORDING_TIME = 10.0  # seconds after which recording is stopped and handed to finalisation worker
+    RECORDING_ROTATION_WINDOW = 2.0  # new recording starts right away if motion was detected this many seconds ago
+    RECORDING_JOBS_TO_KEEP = 16  # finalised clips remembered so motion events can find their video
+    RECORDING_WAIT_INTERVAL = 0.2  # seconds between checks while event waits for its recording to stop
+    ANALYSIS_CONSUMER = 'analysis'
+    RECORDING_CONSUMER = 'recording'
+    STREAMING_CONSUMER = 'streaming'
+
     # paths
     PATH_FOR_SAVING_IMAGE = PATH_FOR_SAVING_IMAGE
     PATH_FOR_SAVING_PROCESSED_IMAGE = PATH_FOR_SAVING_PROCESSED_IMAGE
         
-    def __init__(self, app, user_id, motion_detection_mode=None, credentials=None):   
+    def __init__(self, app, user_id, motion_detection_mode=None, credentials=None, camera_source=0, camera_id=None, analysis_executor=None, motion_analysis_pool=None, inference_service=None, analysis_budget=None, clip_finalisation_pool=None, motion_mask_scale=None):   
         # context and state
         self.app, self.user_id, self.credentials = app, user_id, credentials
+        self.camera_source, self.camera_id = camera_source, camera_id  # device index or stream url, id given by camera manager
         self.camera_on, self.is_video_recording, self.video_recording_complete = False, False, False
         self.video_file_name, self.recording_start_time = None, None
         self.last_saved_image_time, self.last_processed_time = 0, time.time()
@@ -87,35 +115,55 @@ class VideoCamera(object):
         # camera and recording settings
         self.cap, self.out, self.lock = None, None, threading.Lock()
         self.mgo2_background_subtractor = cv2.createBackgroundSubtractorMOG2(history=self.HISTORY_VALUE, varThreshold=self.VAR_THRESHOLD, detectShadows=False)
-        self.MOTION_INTERVAL, self.SIZE_OF_PRE_RECORD_BUFFER = 20, 40  
+        self.MOTION_INTERVAL, self.SIZE_OF_PRE_RECORD_BUFFER = 20, int(PRE_ROLL_SECONDS * self.VIDEO_FPS)
         self.video_camera_start_time = time.time()
 
         # motion detection and processing
         self.frames_after_reset, self.initial_frame = 0, None
         self.previous_frame, self.previous_frame_1, self.previous_frame_2, self.previous_points = None, None, None, None
         self.motion_detected, self.not_logged_motion = False, False
-        self.events_motion_buffer, self.pre_record_motion_buffer = [], []
+        self.events_motion_buffer = []
+        # last seconds before motion as JPEG frames, written at start of recording
+        self.pre_record_motion_buffer = PreRollBuffer(PRE_ROLL_SECONDS, PRE_ROLL_MAX_BYTES or DEFAULT_PRE_ROLL_MAX_BYTES, self.SIZE_OF_PRE_RECORD_BUFFER, PRE_ROLL_JPEG_QUALITY)
+        self.pre_roll_frames = []  # frames taken from pre-roll buffer when recording started, written before first live frame
         
         self.previous_detection_mode = None  
+
+        # decides how much analysis every frame gets (idle, suspected, active), if None every frame gets full analysis
+        self.analysis_scheduler = AdaptiveAnalysisScheduler(**dict(ANALYSIS_BUDGET, **(analysis_budget or {}))) if ADAPTIVE_ANALYSIS else None
+        # motion masks are computed at this fraction of analysis frame size, contours are scaled back to analysis frame
+        self.motion_mask_scale = motion_mask_scale or MOTION_MASK_SCALE
+        if not 0 < self.motion_mask_scale <= 1:
+            raise ValueError(f"Motion mask scale has to be in (0, 1]: {self.motion_mask_scale}")
         self.rate_limiting_token_bucket = TokenBucket(5, 1/20)  # for rate limiting
         
         # object detection
-        self.detection_model = DETECTION_MODEL  # pre-loaded TensorFlow detection model
+        self.detection_model = DETECTION_MODEL  # TensorFlow detection model handle, loaded in background when live feed starts
         self.category_index = CATEGORY_INDEX  # pre-loade TensorFlow category index for detection model
+        self.inference_service = inference_service  # batches detections of all cameras, if None model is called per frame
+        # motion images are queued for object detection as frames, worker runs while live feed is on
+        self.object_detection_queue = ObjectDetectionQueue(
+            self.detection_model, self.category_index, self.DETECTION_THRESHOLD, PATH_FOR_SAVING_PROCESSED_IMAGE, inference_service=inference_service
+        )
         
         # modes
         self.motion_detection_mode = motion_detection_mode or get_detection_mode_for_user(app, user_id)
         
         # lukas kanade-orb method for motion detection
-        self.lucas_kanade_orb_detection_tracking = LukasKanadeOrb(
-            points_of_interest_detector=cv2.ORB_create(),
+        self.lucas_kanade_orb_detection_tracking = GridLukasKanadeOrb(
+            points_of_interest_detector=cv2.ORB_create(nfeatures=ORB_FEATURES),
             lucas_kanade_parameters=self.LUCAS_KANADE_PARAMETERS,
-            motion_detection_threshold=self.MOTION_DETECTION_THRESHOLD  
+            motion_detection_threshold=self.MOTION_DETECTION_THRESHOLD * self.motion_mask_scale  # points move less on smaller frame
         )
         
         # mckenna method for motion detection
         self.mckenna_background_subtractor = McKennaMethod()  
         
+        # optional worker process pool computing motion masks, camera keeps its own models for fallback
+        self.motion_analysis_client = None
+        if motion_analysis_pool is not None:
+            self.motion_analysis_client = motion_analysis_pool.create_client(camera_id, self._get_motion_analysis_settings())
+
         # mode processor for handling diff modes
         self.mode_processor = ModeProcessor(
             mgo2_background_subtractor=self.mgo2_background_subtractor,
@@ -123,25 +171,104 @@ class VideoCamera(object):
             mckenna_background_subtractor=self.mckenna_background_subtractor,
             detection_model=self.detection_model,
             category_index=self.category_index,
-            detection_threshold=self.DETECTION_THRESHOLD
+            detection_threshold=self.DETECTION_THRESHOLD,
+            motion_analysis_backend=self.motion_analysis_client
         )
         
         # video and sound processing 
         self.video_processing_state = 'idle'
         self.video_ready_threading_event = threading.Event()
-        self.sound_format = pyaudio.paInt16 
-        self.chunk_size = self.AUDIO_CHUNK_SIZE
+        self.audio_muxer = None  # muxer of current recording if sound is encoded while recording
+        self.video_metadata_embedded = False  # True if muxer wrote metadata of motion event into last video
+        self.final_video_path = None  # last finalised video
+        self.audio_capture = None  # shared reader of sound input device, keeps sound pre-roll while camera is on
+        self.audio_sink = None  # muxer or WAV file receiving sound of current recording
+
+        # stopped recordings are finalised (writer release, sound merge) in worker threads, camera keeps recording meanwhile
+        self.clip_finalisation_pool = clip_finalisation_pool if clip_finalisation_pool is not None else ClipFinalisationPool(1)
+        self.recording_jobs = OrderedDict()  # video file name -> ClipFinalisationJob
+        self.last_motion_time = 0.0  # time of last confirmed motion, decides if recording is continued
+
+        # continuous recording writes segments all the time, motion events become bookmarks into them
+        self.recording_mode = RECORDING_MODE
+        self.segment_recorder = None
+        self.segment_directory = os.path.join(SEGMENT_DIRECTORY, str(camera_id if camera_id is not None else user_id))
+        self.live_stream = LiveStream()  # H.264 (HLS) live stream shared by all viewers
+        self.mjpeg_broadcaster = MjpegBroadcaster()  # MJPEG live feed, every frame encoded once per profile for all viewers
+        self.last_streamed_times = {}  # profile name -> time of last encoded frame, used for frame-skip
+        self.streaming_lock = threading.Lock()  # without capture thread only one viewer advances camera
         
         # paths
         self.path_for_saving_image = PATH_FOR_SAVING_IMAGE
         self.path_for_saving_processed_image = PATH_FOR_SAVING_PROCESSED_IMAGE
+
+        # capture pipeline - capture thread writes into ring buffer, consumers read at their own pace
+        # frames are kept at native resolution for recording, analysis uses downscaled levels of frame pyramid
+        self.frame_width, self.frame_height = self.VIDEO_WIDTH, self.VIDEO_HEIGHT
+        self._allocate_frame_buffers()
+        self.frame_pyramid = None  # pyramid of frame analysed last, motion images are saved from its native frame
+        self.pipeline_threads = []
+        self.captured_frames, self.capture_failures = 0, 0
+
+        # shared worker pool for motion analysis, if None camera runs its own analysis thread
+        self.analysis_executor, self.analysis_future = analysis_executor, None
+        self.latest_motion_data, self.latest_motion_rectangle = None, None
+        self.latest_motion_regions = []  # bounding rects (x, y, w, h) of motion contours, used for region of interest detection
+        self.latest_motion_blobs = None  # blobs of last substantial motion in analysis frame coordinates, used for event metadata
+
+        # shared memory slots for motion frames handed to object detection, created on first motion event
+        self.shared_frame_bus = None
    
         
+    # settings used by worker process to create background models of this camera
+    def _get_motion_analysis_settings(self):
+        return {
+            'history': self.HISTORY_VALUE,
+            'var_threshold': self.VAR_THRESHOLD,
+            'lucas_kanade_parameters': self.LUCAS_KANADE_PARAMETERS,
+            'motion_detection_threshold': self.MOTION_DETECTION_THRESHOLD * self.motion_mask_scale
+        }
+
+    # frees worker process state and shared memory of this camera
+    def release_motion_analysis_client(self):
+        if self.motion_analysis_client is not None:
+            self.mode_processor.motion_analysis_backend = None
+            self.motion_analysis_client.release()
+            self.motion_analysis_client = None
+
+    # copies frame into shared frame bus and keeps a reference until event is processed, returns None if bus is full
+    def _publish_frame_to_bus(self, frame):
+        if self.shared_frame_bus is None:
+            # created on first motion event, camera already reports its native resolution then
+            self.shared_frame_bus = SharedFrameBus(self.SHARED_FRAME_BUS_SIZE, self.frame_height, self.frame_width)
+
+        # frames of other size are read from saved image instead
+        if frame.shape != self.shared_frame_bus.frame_shape:
+            return None
+        return self.shared_frame_bus.publish_and_retain(frame)
+
+    # returns read only view on frame of motion event, None if event has no frame in shared memory
+    def get_event_frame(self, frame_sequence):
+        if self.shared_frame_bus is None or frame_sequence is None:
+            return None
+        return self.shared_frame_bus.view(frame_sequence)
+
+    # drops reference to frame of motion event so its slot can be reused
+    def release_event_frame(self, frame_sequence):
+        if self.shared_frame_bus is not None and frame_sequence is not None:
+            self.shared_frame_bus.release(frame_sequence)
+
+    # removes shared memory of the camera
+    def release_shared_frame_bus(self):
+        if self.shared_frame_bus is not None:
+            self.shared_frame_bus.close()
+            self.shared_frame_bus = None
+
     def _initialize_camera(self):  
         if self.cap is not None:  # check if camera is initialized
             return  
         try:
-            self.cap = cv2.VideoCapture(0) # create a VideoCapture object 
+            self.cap = cv2.VideoCapture(self.camera_source) # create a VideoCapture object 
             if not self.cap.isOpened():  # check if camera was opened
                 logging.error("Camera was not found.")
             else:
@@ -184,140 +311,148 @@ class VideoCamera(object):
                 timestamp = datetime.now().strftime(self.DATE_FORMAT + '_' + self.TIME_FORMAT)
                 video_name = f'video_{timestamp}{self.MP4_EXTENSION}'
                 self.video_file_name = f'{VIDEO_DIRECTORY}/{video_name}'
-                self.out = cv2.VideoWriter(self.video_file_name, self.FOURCC, self.VIDEO_FPS, (self.VIDEO_WIDTH, self.VIDEO_HEIGHT))  
+                # frames before motion go into recording, muxer timestamps start at oldest of them
+                self.pre_roll_frames = self.pre_record_motion_buffer.drain()
+                recording_start_time = self.pre_roll_frames[0][0] if self.pre_roll_frames else None
+                self.out = self._create_video_writer(recording_start_time)
                 
-                self._start_sound_recording() # starts sound recording
+                self._start_sound_recording(recording_start_time) # starts sound recording from same moment as video
             
-    def _start_sound_recording(self):
-        try:
-            # initialize PyAudio 
-            p = pyaudio.PyAudio()
-
-            # get default input device index
-            self.input_device_index = p.get_default_input_device_info()['index']
-            logging.info(f"Input device index: {self.input_device_index}")
-
-            # get/set sample rate and channels dynamically based on device abilities
-            device_information = p.get_device_info_by_index(self.input_device_index)
-            self.sample_rate = int(device_information['defaultSampleRate'])
-            self.number_of_channels = device_information['maxInputChannels']
-            # sets chunk size 
-            self.chunk_size = self.AUDIO_CHUNK_SIZE
-
-            # open sound stream 
-            self.sound_stream = p.open(
-                format=pyaudio.paInt16,  
-                channels=self.number_of_channels,
-                rate=self.sample_rate,
-                input=True,
-                input_device_index=self.input_device_index,
-                frames_per_buffer=self.chunk_size
-            )
-
-            # sets flag to true
-            self.is_video_recording = True
-            logging.info("sound stream opened.")
-
-        except Exception as e:
-            # set flag to false 
-            self.is_video_recording = False
-            logging.error(f"Error opening sound stream: {e}", exc_info=True)
-
-        # creates sound frames list
-        self.sound_frames = []
+    def _create_video_writer(self, start_time=None):
+        # single pass muxer writes final video (H.264, AAC and metadata) while recording
+        if VIDEO_MUXER == 'pyav' and is_muxer_available():
+            try:
+                merged_video_file_name = self.video_file_name.replace(self.MP4_EXTENSION, self.MP4_COMBINED)
+                return StreamingVideoMuxer(merged_video_file_name, self.frame_width, self.frame_height, self.VIDEO_FPS, start_time=start_time)
+            except Exception as e:
+                logging.error(f"Error! Can not open video muxer, video will be merged with ffmpeg: {e}")
 
-        # in a separate thread starts sound recording loop 
-        self._sound_recording_thread = threading.Thread(target=self._process_audio_input)
-        self._sound_recording_thread.start()
+        # video only file, sound is merged with ffmpeg when recording stops
+        return cv2.VideoWriter(self.video_file_name, self.FOURCC, self.VIDEO_FPS, (self.frame_width, self.frame_height))
 
+    # attaches current recording to sound input, sound captured since start time (pre-roll) is written first
+    def _start_sound_recording(self, start_time=None):
+        self.audio_muxer, self.audio_sink = None, None
+        if self.audio_capture is None:
+            return
 
-    def _process_audio_input(self):
         try:
-            # read sound frames during recording 
-            while self.is_video_recording:
-                try:
-                    # read sound frame from sound stream
-                    sound_frame = self.sound_stream.read(self.chunk_size, exception_on_overflow=False)
-                    # add read sound frame to list of sound frames
-                    self.sound_frames.append(sound_frame)
-                except IOError as e:
-                    raise IOError(f"Error reading sound frame: {e}")
+            # muxer encodes sound while recording, otherwise sound goes to WAV file that is merged with ffmpeg
+            if isinstance(self.out, StreamingVideoMuxer):
+                if self.out.add_audio_stream(self.audio_capture.sample_rate, self.audio_capture.number_of_channels):
+                    self.audio_muxer = self.audio_sink = self.out
+            else:
+                raw_sound_file_name = self.video_file_name.replace(self.MP4_EXTENSION, self.WAV_EXTENSION)
+                self.audio_sink = WaveFileSink(raw_sound_file_name, self.audio_capture.sample_rate,
+                                               self.audio_capture.number_of_channels, self.audio_capture.sample_width)
+
+            if self.audio_sink is not None:
+                self.audio_capture.attach(self.audio_sink, start_time if start_time is not None else self.recording_start_time)
         except Exception as e:
-            self.is_video_recording = False  # stop loop
-            logging.error(f"Error in process_audio_input: {e}")
+            # video is recorded without sound
+            self.audio_muxer, self.audio_sink = None, None
+            logging.error(f"Error! Sound recording did not start: {e}", exc_info=True)
 
     def _stop_recording(self):
-        sound_video_merged_file = None  
         try:
             with self.lock:
                 if not self.is_video_recording:
                     return None
 
                 self.is_video_recording = False  # stop recording
-
-                # release video recording 
-                if self.out:
-                    self.out.release()
-                    self.out = None
-
-                # stop and close sound stream
-                if self.sound_stream:
-                    self.sound_stream.stop_stream()
-                    self.sound_stream.close()
-                    self.sound_stream = None
-
-                    # pause for sound recording thread to finalize
-                    if hasattr(self, '_sound_recording_thread'):
-                        self._sound_recording_thread.join()
-
-                    # save sound frames to WAV file 
-                    if self.sound_frames:
-                        raw_sound_file_name = self.video_file_name.replace(self.MP4_EXTENSION, self.WAV_EXTENSION)
-                        try:
-                            with wave.open(raw_sound_file_name, 'wb') as wf:
-                                wf.setnchannels(self.number_of_channels)
-                                wf.setsampwidth(pyaudio.PyAudio().get_sample_size(self.sound_format))
-                                wf.setframerate(self.sample_rate)
-                                wf.writeframes(b''.join(self.sound_frames))
-                        except Exception as e:
-                            logging.error(f"Failed to save sound frames: {e}")
-                            return None, {"error": f"Failed to save sound frames: {e}"}
-
-                    # combine sound and video files
-                    try:
-                        sound_video_merged_file = self._merge_sound_and_video(raw_sound_file_name)
-                    except Exception as e:
-                        logging.error(f"Error: Did not combine sound and video: {e}")
-                        return None, {"error": f"Did not combine sound and video: {e}"}
-
-                self.video_recording_complete = True  # marks recording as finished
+                job = self._detach_recording()
         except Exception as e:
             logging.error(f"Error! Stopping recording: {e}")
-            return None, {"error": f"Error! Stopping recording: {e}"}
-
-        return sound_video_merged_file, None  # returns file or None 
-
+            return None
 
-    def _merge_sound_and_video(self, raw_sound_file_name):
-        # updates video processing state to show the process started
-        self.video_processing_state = 'processing'
+        # clip is finished in finalisation worker, camera can start new recording right away
+        self.clip_finalisation_pool.submit(job, self._finalise_recording, self._on_recording_finalised)
+        return job
+
+    # hands video writer, sound stream and sound frames of current recording over to finalisation job
+    def _detach_recording(self):
+        # after detach no sound is written, so sink can be closed by finalisation worker
+        if self.audio_sink is not None and self.audio_capture is not None:
+            self.audio_capture.detach(self.audio_sink)
+
+        job = ClipFinalisationJob(self.video_file_name, self.out, self.audio_sink)
+        self.out, self.audio_muxer, self.audio_sink, self.pre_roll_frames = None, None, None, []
+
+        # remembers job so motion events of this recording can wait for it
+        self.recording_jobs[job.video_file_name] = job
+        while len(self.recording_jobs) > self.RECORDING_JOBS_TO_KEEP:
+            self.recording_jobs.popitem(last=False)
+        return job
+
+    # runs in finalisation worker
+    def _finalise_recording(self, job):
+        job.change_state(RELEASING_STATE)
+
+        # muxer already wrote final video (video, sound and metadata)
+        if isinstance(job.video_writer, StreamingVideoMuxer):
+            job.final_video_path = job.video_writer.release()
+            # metadata does not have to be embedded with ffmpeg if muxer wrote it
+            job.metadata_embedded = job.video_writer.metadata is not None
+            return
+
+        # release video recording 
+        if job.video_writer is not None:
+            job.video_writer.release()
+
+        merged_video_file_name = job.video_file_name.replace(self.MP4_EXTENSION, self.MP4_COMBINED)
+        # WAV file was written while recording, closing it only updates its header
+        has_sound = job.audio_sink is not None and job.audio_sink.close()
+        if not has_sound:
+            if job.audio_sink is not None:
+                os.remove(job.audio_sink.path)
+            # video without sound is used as it is
+            os.replace(job.video_file_name, merged_video_file_name)
+            job.final_video_path = merged_video_file_name
+            return
+
+        # combine sound and video files
+        job.change_state(MUXING_STATE)
+        with pipeline_metrics.time_stage('merge_sound_and_video', self.camera_id):
+            job.final_video_path = self._merge_sound_and_video(job.audio_sink.path, job.video_file_name)
+        if job.final_video_path is None:
+            raise RuntimeError("Did not combine sound and video.")
+
+    # runs in finalisation worker when job is ready or failed
+    def _on_recording_finalised(self, job):
+        self.video_metadata_embedded = job.metadata_embedded
+        self.final_video_path = job.final_video_path
+        self.video_processing_state = 'ready' if job.state == READY_STATE else 'error'
+        self.video_recording_complete = True  # marks recording as finished
+        if job.state == READY_STATE:
+            self.video_ready_threading_event.set()
+            logging.info(f"Video {job.final_video_path} was finalised in {job.get_finalisation_time():.2f} s.")
+
+    # returns finalisation job of recording once it is ready or failed, None if recording did not finish before timeout
+    def wait_for_finished_recording(self, video_file_name, timeout):
+        deadline = time.time() + timeout
+        while True:
+            job = self.recording_jobs.get(video_file_name)
+            remaining_time = deadline - time.time()
+            if job is not None:
+                return job if job.wait(max(remaining_time, 0)) else None
+            if remaining_time <= 0:
+                return None
+            time.sleep(min(self.RECORDING_WAIT_INTERVAL, remaining_time))
 
+    # runs in finalisation worker, returns merged file or None if merge failed
+    def _merge_sound_and_video(self, raw_sound_file_name, video_file_name):
         # create merged file 
-        merged_video_file_name = self.video_file_name.replace(self.MP4_EXTENSION, self.MP4_COMBINED)
+        merged_video_file_name = video_file_name.replace(self.MP4_EXTENSION, self.MP4_COMBINED)
 
         # verify if sound file exists
         if raw_sound_file_name:
             # using ffmpeg prepare to merge sound and video 
-            ffmpeg_cmd = ['ffmpeg', '-i', self.video_file_name, '-i', raw_sound_file_name,
+            ffmpeg_cmd = ['ffmpeg', '-i', video_file_name, '-i', raw_sound_file_name,
                             '-c:v', 'copy', '-c:a', 'aac', '-strict', 'experimental',
                             merged_video_file_name]
             try:
                 # run ffmpeg command to merge sound and video
                 subprocess.run(ffmpeg_cmd, check=True)
-                
-                # update state to show the video is ready
-                self.video_processing_state = 'ready'
-                self.video_ready_threading_event.set()
             
                 try:
                     os.remove(raw_sound_file_name) # delete raw sound file 
@@ -325,20 +460,18 @@ class VideoCamera(object):
                     logging.warning(f"Error! File {raw_sound_file_name} not found for deletion: {e}")
 
                 try:
-                    os.remove(self.video_file_name) # delete original video file
+                    os.remove(video_file_name) # delete original video file
                 except OSError as e:
-                    logging.warning(f"Error! Original video file {self.video_file_name} not found for deletion: {e}")
+                    logging.warning(f"Error! Original video file {video_file_name} not found for deletion: {e}")
                     
                 
             except subprocess.CalledProcessError as e:
                 logging.error("Error! Failed to merge sound and video: {}".format(e))
-                self.video_processing_state = 'error'
                 return None
 
         else:
-            # update state to show error 
-            self.video_processing_state = 'error'
             logging.error("No sound file was provided for merging.")
+            return None
 
         # return merged file
         return merged_video_file_name
@@ -352,26 +485,321 @@ class VideoCamera(object):
             # checks if camera is opened
             if not (self.cap and self.cap.isOpened()):
                 logging.error("Error! Failed to start live feed.")
+            else:
+                self._use_native_frame_size() # ring buffer and recordings follow camera resolution
+                self.audio_capture = acquire_audio_capture(pre_roll_duration=PRE_ROLL_SECONDS) # None if there is no microphone
+                if self.recording_mode == 'continuous':
+                    self._start_segment_recording()
+                self._start_pipeline_threads() # starts capture, analysis and recording threads
+                self._start_loading_detection_model() # model is warmed while camera warms up
         else:
             logging.error("Error! Live feed has alredy started.")
 
+    def _start_loading_detection_model(self):
+        start_loading = getattr(self.detection_model, 'start_loading', None)
+        if start_loading is not None:
+            start_loading()
+
     def _stop_live_feed(self):
         if self.camera_on: # check if camera is on
             self.camera_on = False # turn camera off
+            self._stop_pipeline_threads() # waits for pipeline threads to finish
+            self._stop_recording() # recording in progress is handed to finalisation worker
+            self._stop_segment_recording()
+            self.live_stream.stop_encoder()
+            if self.audio_capture is not None:
+                release_audio_capture(self.audio_capture)
+                self.audio_capture = None
             self._release_video_camera() # release video camera
 
-    def _save_frame_to_video(self, ret, frame):
+    def _start_segment_recording(self):
+        if not is_muxer_available():
+            logging.error("Error! Continuous recording needs PyAV, motion events are recorded separately.")
+            return
+
+        try:
+            self.segment_recorder = SegmentRecorder(
+                self.segment_directory, self.frame_width, self.frame_height, self.VIDEO_FPS, SEGMENT_DURATION, SEGMENT_RETENTION_HOURS * 3600,
+                live_stream=self.live_stream
+            )
+            # sound is added to segments before first frame is written
+            if self.audio_capture is not None and self.segment_recorder.add_audio_stream(self.audio_capture.sample_rate, self.audio_capture.number_of_channels):
+                self.audio_capture.attach(self.segment_recorder)
+        except Exception as e:
+            self.segment_recorder = None
+            logging.error(f"Error! Continuous recording did not start: {e}")
+
+    def _stop_segment_recording(self):
+        segment_recorder, self.segment_recorder = self.segment_recorder, None
+        if segment_recorder is None:
+            return
+        if self.audio_capture is not None:
+            self.audio_capture.detach(segment_recorder)
+        segment_recorder.release()
+
+    # returns live stream, without continuous recording own encoder runs while somebody watches
+    def get_live_stream(self):
+        self.live_stream.report_viewer()
+        if self.segment_recorder is None and not self.live_stream.is_encoding():
+            if not is_muxer_available():
+                return None
+            self.live_stream.start_encoder(self.frame_width, self.frame_height, self.VIDEO_FPS)
+        return self.live_stream
+
+    # waits until segments of bookmark are written and joins them into clip, returns clip path or None
+    def wait_for_bookmarked_clip(self, bookmark, timeout):
+        segment_recorder = self.segment_recorder
+        if segment_recorder is not None:
+            # bookmark ends after motion, so event waits at least until its end plus one segment
+            timeout = max(timeout, bookmark['end_time'] - time.time() + 2 * segment_recorder.segment_duration)
+            if not segment_recorder.wait_for_segments(bookmark['end_time'], timeout):
+                logging.error("Error! Segments of bookmarked event were not written in time.")
+                return None
+
+        # several events can start in the same second
+        timestamp = datetime.fromtimestamp(bookmark['start_time']).strftime(self.TIMESTAMP_FORMAT + '_%f')
+        clip_path = f'{VIDEO_DIRECTORY}/video_{timestamp}{self.MP4_COMBINED}'
+        return extract_clip(self.segment_directory, bookmark['start_time'], bookmark['end_time'], clip_path,
+                            segment_recorder.index if segment_recorder is not None else None)
+
+    def _allocate_frame_buffers(self):
+        self.frame_ring_buffer = FrameRingBuffer(self.FRAME_RING_BUFFER_SIZE, self.frame_height, self.frame_width)
+        # pre-roll budget follows frame size unless it is configured
+        if not PRE_ROLL_MAX_BYTES:
+            self.pre_record_motion_buffer.max_bytes = calculate_pre_roll_max_bytes(self.frame_width, self.frame_height, self.VIDEO_FPS, PRE_ROLL_SECONDS)
+        self.frame_consumers = {
+            name: FrameRingConsumer(self.frame_ring_buffer, name)
+            for name in (self.ANALYSIS_CONSUMER, self.RECORDING_CONSUMER, self.STREAMING_CONSUMER)
+        }
+
+    # uses resolution delivered by video camera for ring buffer and recordings
+    def _use_native_frame_size(self):
+        try:
+            frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        except (TypeError, ValueError) as e:
+            logging.error(f"Error! Can not read camera resolution: {e}")
+            return
+        if frame_width <= 0 or frame_height <= 0:
+            return
+
+        # keeps aspect ratio, even size is needed by H.264 encoder
+        if frame_width > self.MAX_FRAME_WIDTH:
+            frame_width, frame_height = self.MAX_FRAME_WIDTH, frame_height * self.MAX_FRAME_WIDTH // frame_width
+        frame_width, frame_height = frame_width - frame_width % 2, frame_height - frame_height % 2
+
+        if (frame_width, frame_height) != (self.frame_width, self.frame_height):
+            self.frame_width, self.frame_height = frame_width, frame_height
+            self._allocate_frame_buffers()
+            logging.info(f"Camera {self.camera_id} captures at {frame_width}x{frame_height}.")
+
+    def _start_pipeline_threads(self):
+        # capture thread only reads from the device, consumers never block it
+        pipeline_targets = [self._capture_frames_in_thread, self._record_frames_in_thread, self._stream_frames_in_thread]
+
+        # without shared worker pool, camera analyses frames in its own thread
+        if self.analysis_executor is None:
+            pipeline_targets.append(self._analyse_frames_in_thread)
+
+        self.pipeline_threads = [threading.Thread(target=target, daemon=True) for target in pipeline_targets]
+        for pipeline_thread in self.pipeline_threads:
+            pipeline_thread.start()
+        self.object_detection_queue.start()
+
+    def _stop_pipeline_threads(self):
+        # wakes consumers waiting for frames so they can see that camera is off
+        self.frame_ring_buffer.wake_up_consumers()
+        for pipeline_thread in self.pipeline_threads:
+            if pipeline_thread is not threading.current_thread():
+                pipeline_thread.join(timeout=self.THREAD_JOIN_TIMEOUT)
+        self.pipeline_threads = []
+        self.object_detection_queue.stop(timeout=self.THREAD_JOIN_TIMEOUT)
+
+    # checks if frames are delivered by capture thread
+    def _is_capture_thread_running(self):
+        return bool(self.pipeline_threads) and self.pipeline_threads[0].is_alive()
+
+    def _capture_frames_in_thread(self):
+        while self.camera_on:
+            ret, frame = self._read_from_video_camera()
+            if not ret or frame is None:
+                self.capture_failures += 1
+                time.sleep(self.CAPTURE_RETRY_INTERVAL) # pause before reading again
+                continue
+
+            # writes frame directly into preallocated slot of ring buffer
+            sequence, slot = self.frame_ring_buffer.acquire_slot_for_writing()
+            if frame.shape == slot.shape:
+                np.copyto(slot, frame)
+            else:
+                cv2.resize(frame, (self.frame_width, self.frame_height), dst=slot)
+            self.frame_ring_buffer.publish_slot(sequence)
+            self.captured_frames += 1
+
+            # hands analysis of the new frame to shared worker pool
+            if self.analysis_executor is not None:
+                self._schedule_frame_analysis()
+
+    def _schedule_frame_analysis(self):
+        # only one analysis task per camera, frames captured while it runs are picked up by the next task
+        if self.analysis_future is not None and not self.analysis_future.done():
+            return
+        try:
+            self.analysis_future = self.analysis_executor.submit(self._analyse_latest_frame, 0)
+        except RuntimeError as e:
+            # worker pool was shut down
+            logging.error(f"Error! Can not schedule frame analysis: {e}")
+
+    def _analyse_frames_in_thread(self):
+        while self.camera_on:
+            self._analyse_latest_frame(self.CONSUMER_WAIT_TIMEOUT)
+
+    def _analyse_latest_frame(self, timeout):
+        # always analyses newest frame, frames captured meanwhile are counted as dropped
+        frame = self.frame_consumers[self.ANALYSIS_CONSUMER].read_latest_frame(timeout)
+        if frame is None:
+            return
+
+        # skips motion detection while camera is warming up
+        if time.time() - self.video_camera_start_time < self.WARM_UP_PERIOD:
+            return
+
+        try:
+            with pipeline_metrics.time_stage('analyse_frame', self.camera_id):
+                _, motion_data = self._analyse_frame(frame)
+            self.latest_motion_data = motion_data
+        except Exception as e:
+            logging.error(f"Error! Frame analysis failed: {e}")
+
+    def _record_frames_in_thread(self):
+        consumer = self.frame_consumers[self.RECORDING_CONSUMER]
+        while self.camera_on:
+            # reads frames in order so recordings keep capture frame rate
+            frame = consumer.read_next_frame(self.CONSUMER_WAIT_TIMEOUT)
+            if frame is None:
+                continue
+            with pipeline_metrics.time_stage('record_frame', self.camera_id):
+                self._save_frame_to_video(True, frame, consumer.last_timestamp)
+
+    def _stream_frames_in_thread(self):
+        consumer = self.frame_consumers[self.STREAMING_CONSUMER]
+        while self.camera_on:
+            # nothing is encoded while nobody watches
+            profile_names = self.mjpeg_broadcaster.wait_for_viewers(self.CONSUMER_WAIT_TIMEOUT)
+            if not profile_names:
+                continue
+            frame = consumer.read_latest_frame(self.CONSUMER_WAIT_TIMEOUT)
+            if frame is None:
+                continue
+
+            # draws last motion rectangle found by analysis thread, rectangle is in analysis frame coordinates
+            if self.latest_motion_rectangle is not None:
+                x, y, w, h, detected_time = self.latest_motion_rectangle
+                if time.time() - detected_time < self.MOTION_RECTANGLE_DISPLAY_TIME:
+                    x, y, w, h = scale_regions([(x, y, w, h)], ANALYSIS_FRAME_SIZE, (frame.shape[1], frame.shape[0]))[0]
+                    cv2.rectangle(frame, (x, y), (x + w, y + h), self.CONTOUR_COLOR, self.CONTOUR_THICKNESS)
+
+            with pipeline_metrics.time_stage('encode_live_feed', self.camera_id):
+                self._broadcast_frame(frame, profile_names)
+
+    # frame is encoded once per watched profile, all viewers of a profile get the same bytes
+    def _broadcast_frame(self, frame, profile_names):
+        current_time = time.time()
+        for profile_name in profile_names:
+            encode_profile = ENCODE_PROFILES[profile_name]
+            # profiles with lower max fps skip frames
+            if not encode_profile.is_frame_due(self.last_streamed_times.get(profile_name), current_time):
+                continue
+            jpeg = encode_profile.encode(frame)
+            if jpeg is not None:
+                self.last_streamed_times[profile_name] = current_time
+                self.mjpeg_broadcaster.publish(profile_name, jpeg)
+
+    # returns latest frame encoded by streaming thread with last detected motion
+    def _retrieve_streaming_frame(self):
+        jpeg = self.mjpeg_broadcaster.read_latest_frame(DEFAULT_STREAM_PROFILE, self.CONSUMER_WAIT_TIMEOUT)
+        if jpeg is None:
+            return None, None
+        return jpeg, self.latest_motion_data
+
+    # viewers of MJPEG live feed get frames of chosen encode profile through own bounded queue
+    def subscribe_to_live_feed(self, profile_name=DEFAULT_STREAM_PROFILE):
+        if profile_name not in ENCODE_PROFILES:
+            raise ValueError(f"Unknown encode profile: {profile_name}")
+        return self.mjpeg_broadcaster.subscribe(profile_name)
+
+    def unsubscribe_from_live_feed(self, subscriber):
+        self.mjpeg_broadcaster.unsubscribe(subscriber)
+
+    # returns next jpeg frame for subscriber, None if live feed is off or no frame arrived in time
+    def retrieve_subscribed_frame(self, subscriber, timeout=CONSUMER_WAIT_TIMEOUT):
+        if not self._initialize_and_verify_video_camera():
+            return None
+
+        # without capture thread, one viewer reads and analyses frame and shares it with all others
+        if not self._is_capture_thread_running() and self.streaming_lock.acquire(blocking=False):
+            try:
+                frame, _ = self._read_and_analyse_frame()
+                if frame is not None:
+                    self._broadcast_frame(frame, self.mjpeg_broadcaster.get_watched_profiles())
+            finally:
+                self.streaming_lock.release()
+
+        return subscriber.get_frame(timeout)
+
+    # returns counters of capture thread and every consumer
+    def get_pipeline_statistics(self):
+        statistics = {
+            'captured_frames': self.captured_frames,
+            'capture_failures': self.capture_failures
+        }
+        for name, consumer in self.frame_consumers.items():
+            statistics[name] = consumer.get_statistics()
+        statistics['mjpeg_broadcaster'] = self.mjpeg_broadcaster.get_statistics()
+        if self.analysis_scheduler is not None:
+            statistics['analysis_scheduler'] = self.analysis_scheduler.get_statistics()
+        return statistics
+
+    # timestamp is capture time of frame, None means now
+    def _save_frame_to_video(self, ret, frame, timestamp=None):
+        # live stream is encoded once for all viewers, frames keep their capture time
+        if ret and frame is not None and self.live_stream.is_encoding():
+            self.live_stream.write(frame, timestamp)
+
+        # continuous recording writes every frame into segments, segments are cut by capture time like sound
+        segment_recorder = self.segment_recorder
+        if segment_recorder is not None:
+            if ret and frame is not None:
+                segment_recorder.write(frame, timestamp)
+            return
+
         # checks if currently recording and frame was read 
         if self.is_video_recording and ret:
-            # check if video writer is initialized
-            if self.out is not None:
-                # write current frame to file
-                self.out.write(frame)
+            # lock prevents writing while video writer is being released
+            with self.lock:
+                # check if video writer is initialized
+                if self.out is None:
+                    return
+                # frames captured before motion are written first
+                if self.pre_roll_frames:
+                    self._write_pre_roll_frames()
+                # write current frame to file, muxer places it by capture time like pre-roll frames and sound
+                if isinstance(self.out, StreamingVideoMuxer):
+                    self.out.write(frame, timestamp)
+                else:
+                    self.out.write(frame)
                 # calculates elapsed time since recording started
                 elapsed_time = time.time() - self.recording_start_time
-                # checks if recording time > 10 secs if yes, stops recording 
-                if elapsed_time > 10.0:  
-                    self._stop_recording()
+            # checks if recording time > 10 secs if yes, stops recording 
+            if elapsed_time > self.MAX_RECORDING_TIME:  
+                self._stop_recording()
+                # clip is finalised in background, so continuing motion goes straight into new recording
+                if time.time() - self.last_motion_time < self.RECORDING_ROTATION_WINDOW:
+                    self._start_video_recording()
+
+        # frames are kept for pre-roll of next recording
+        elif ret and frame is not None:
+            self._handle_pre_record_buffer(frame, timestamp)
 
     # gets file path for merged sound and video file
     def get_current_final_video_path(self):
@@ -379,8 +807,7 @@ class VideoCamera(object):
             logging.error("Video is not ready or recording did not finish.")
             return None
 
-        merged_video_file_name = self.video_file_name.replace(self.MP4_EXTENSION, self.MP4_COMBINED)
-        return merged_video_file_name
+        return self.final_video_path
 
  
     def setup_motion_detection_mode(self, mode):
@@ -400,27 +827,59 @@ class VideoCamera(object):
         if not self._initialize_and_verify_video_camera():
             return None, None
 
+        with pipeline_metrics.time_stage('retrieve_frame', self.camera_id):
+            # when capture thread is running frames are taken from ring buffer, analysis runs in its own thread
+            if self._is_capture_thread_running():
+                return self._retrieve_streaming_frame()
+
+            frame, motion_data = self._read_and_analyse_frame()
+            if frame is None:
+                return None, None
+
+            # returns converted frame to JPEG with motion data
+            return convert_frame_to_jpeg(frame, motion_data)
+
+    # reads and analyses frame in caller's thread, used when capture thread is not running
+    def _read_and_analyse_frame(self):
         current_time = time.time() # save current time
 
         # verify if camera is warming up
         if current_time - self.video_camera_start_time < self.WARM_UP_PERIOD:
             ret, frame = self._read_from_video_camera()
             # returns frame without motion data during warmup phase
-            return convert_frame_to_jpeg(frame, None)  
+            return (frame, None) if ret else (None, None)
 
-        # reads frame from video camera
+        # reads frame from video camera, capture time is taken before analysis delays it
         ret, frame = self._read_from_video_camera()
+        capture_time = time.time()
         if not ret:
             return None, None
 
-        # converts to grayscale and applies gaussian blur
-        frame, gray_frame = process_initial_frame(frame)
-        
-        # adds current frame to pre-record buffer
-        self._handle_pre_record_buffer(frame)
+        # runs motion detection on frame
+        native_frame = frame
+        frame, motion_data = self._analyse_frame(frame)
+        if frame is None:
+            return None, None
+
+        # if recording, save current frame to video stream (at native resolution, without drawn rectangle)
+        self._save_frame_to_video(ret, native_frame, capture_time)
+        return frame, motion_data
 
-        # setup motion detection frames 
-        if self.previous_frame_2 is None:
+    def _analyse_frame(self, frame):
+        # every resolution of the frame is computed once and shared by scheduler, motion detection and motion images
+        frame_pyramid = FramePyramid(frame)
+        self.frame_pyramid = frame_pyramid
+
+        # idle scene is only checked at low resolution and reduced rate, grayscale and blur are skipped
+        was_idle = self.analysis_scheduler is not None and self.analysis_scheduler.is_idle()
+        if self.analysis_scheduler is not None and not self.analysis_scheduler.should_analyse_frame(frame_pyramid.get_analysis_frame()):
+            return frame_pyramid.get_analysis_frame(), None
+
+        # analysis frame and blurred grey frame at motion mask scale
+        frame, gray_frame = frame_pyramid.get_analysis_frame(), frame_pyramid.get_blurred_mask_frame(self.motion_mask_scale)
+
+        # setup motion detection frames, frames kept before idle period are too old for frame differencing
+        if self.previous_frame_2 is None or was_idle:
             self._setup_motion_detection_frames(gray_frame)
             # returns none if previous frames are not initialized
             return None, None  
@@ -429,35 +888,39 @@ class VideoCamera(object):
         if self.previous_detection_mode != self.motion_detection_mode:
             self.previous_detection_mode = self.motion_detection_mode
 
+        motion_data = None
+
         # motion detection based on current mode
         if self.motion_detection_mode == self.MGO2_MODE:
-            motion_data = self.mode_processor.process_mgo2_and_three_frame_diff_mode(
-                gray_frame, self.previous_frame_1, self.previous_frame_2, self._detect_motion_and_manage_recording, frame
-            )
+            with pipeline_metrics.time_stage('process_mgo2', self.camera_id):
+                motion_data = self.mode_processor.process_mgo2_and_three_frame_diff_mode(
+                    gray_frame, self.previous_frame_1, self.previous_frame_2, self._detect_motion_and_manage_recording, frame
+                )
 
         elif self.motion_detection_mode == self.LUCAS_KANADE_ORB_MODE:
-            motion_data = self.mode_processor.process_lucas_kanade_orb_and_three_frame__diff_mode(
-                gray_frame, frame, self.previous_frame, self.previous_frame_1, self.previous_frame_2, 
-                self._detect_motion_and_manage_recording, self.video_camera_start_time, self.WARM_UP_PERIOD
-            )
+            with pipeline_metrics.time_stage('process_lucas_kanade_orb', self.camera_id):
+                motion_data = self.mode_processor.process_lucas_kanade_orb_and_three_frame__diff_mode(
+                    gray_frame, frame, self.previous_frame, self.previous_frame_1, self.previous_frame_2, 
+                    self._detect_motion_and_manage_recording, self.video_camera_start_time, self.WARM_UP_PERIOD
+                )
 
         elif self.motion_detection_mode == self.MCKENNA_MODE:
-            motion_data = self.mode_processor.process_mckenna_and_three_frame_diff_mode(
-                gray_frame, frame, self.previous_frame_1, self.previous_frame_2, self._detect_motion_and_manage_recording
-            )
+            with pipeline_metrics.time_stage('process_mckenna', self.camera_id):
+                motion_data = self.mode_processor.process_mckenna_and_three_frame_diff_mode(
+                    gray_frame, frame, self.previous_frame_1, self.previous_frame_2, self._detect_motion_and_manage_recording,
+                    mask_frame=frame_pyramid.get_mask_color_frame(self.motion_mask_scale)
+                )
 
         else:
             logging.error(f"Error! Detection mode is unknown: {self.motion_detection_mode}")
           
-        # if recording, save current frame to video stream 
-        self._save_frame_to_video(ret, frame)
         # if nececsary, reset motion detection frames 
         self._reset_frames_if_necessary()
         # updates motion detection frames
         self._update_frames_for_motion_detection(gray_frame)
-        
-        # returns converted frame to JPEG with motion data
-        return convert_frame_to_jpeg(frame, motion_data)
+
+        # returns processed frame with motion data
+        return frame, motion_data
 
     
     def _initialize_and_verify_video_camera(self):
@@ -483,13 +946,21 @@ class VideoCamera(object):
         self.previous_frame_1 = self.previous_frame
         self.previous_frame = current_frame
 
-    def _handle_pre_record_buffer(self, frame):
-        # adds current frame to pre-record buffer
-        self.pre_record_motion_buffer.append(frame)
-
-        # if buffer size > than limit, remove oldest frame
-        if len(self.pre_record_motion_buffer) > self.SIZE_OF_PRE_RECORD_BUFFER:
-            self.pre_record_motion_buffer.pop(0)
+    def _handle_pre_record_buffer(self, frame, timestamp=None):
+        # adds current frame to pre-record buffer as JPEG with its capture time, oldest frames are dropped when buffer is over its budget
+        self.pre_record_motion_buffer.append(frame, timestamp)
+
+    def _write_pre_roll_frames(self):
+        pre_roll_frames, self.pre_roll_frames = self.pre_roll_frames, []
+        for timestamp, encoded_frame in pre_roll_frames:
+            frame = decode_frame(encoded_frame)
+            if frame is None:
+                continue
+            # muxer places frames by capture time, video writer only keeps order
+            if isinstance(self.out, StreamingVideoMuxer):
+                self.out.write(frame, timestamp)
+            else:
+                self.out.write(frame)
 
         
     def _detect_motion_and_manage_recording(self, combined_mask, frame):
@@ -503,14 +974,21 @@ class VideoCamera(object):
             
             current_time = time.time()  # save current time 
 
-            # do motion detection at pre-defined intervals 
-            if self.frames_after_reset % self.MOTION_INTERVAL == 0:
+            # do motion detection at pre-defined intervals, with scheduler every analysed frame is checked
+            if self.analysis_scheduler is not None or self.frames_after_reset % self.MOTION_INTERVAL == 0:
                 # process combined mask to detect motion
                 motion_detected = self._generate_combined_mask(combined_mask, frame)
 
-                if motion_detected: # if motion is detected
-                    # veirfy if not recording
-                    if not self.is_video_recording:
+                # scheduler starts recording and object detection only after motion was confirmed
+                confirmed_motion = motion_detected
+                if self.analysis_scheduler is not None:
+                    self.analysis_scheduler.report_motion(motion_detected, current_time)
+                    confirmed_motion = motion_detected and self.analysis_scheduler.is_active()
+
+                if confirmed_motion: # if motion is detected
+                    self.last_motion_time = current_time
+                    # veirfy if not recording, continuous recording does not start separate videos
+                    if not self.is_video_recording and self.segment_recorder is None:
                         # starts video recording
                         self._start_video_recording()
                       
@@ -543,26 +1021,60 @@ class VideoCamera(object):
             # path + image name to create full path
             image_path = os.path.join(self.PATH_FOR_SAVING_IMAGE, motion_image_name)
 
-            # saves frame as an image at indicated path
-            cv2.imwrite(image_path, frame)
+            # motion regions are passed only in region of interest mode, otherwise detector uses full frame
+            motion_regions = list(self.latest_motion_regions) if OBJECT_DETECTION_MODE == 'region_of_interest' else None
+
+            # image and object detection use native frame of analysed frame, regions are scaled to its size
+            native_frame, native_motion_regions = frame, motion_regions
+            annotated_frame = frame
+            frame_pyramid = self.frame_pyramid
+            if frame_pyramid is not None and frame_pyramid.analysis_frame is frame:
+                native_frame = annotated_frame = frame_pyramid.native_frame
+                if motion_regions:
+                    native_motion_regions = frame_pyramid.scale_regions_to_native(motion_regions)
+                if self.latest_motion_rectangle is not None:
+                    # rectangle is drawn on copy, native frame is also recorded and passed to detector
+                    annotated_frame = native_frame.copy()
+                    x, y, w, h = frame_pyramid.scale_regions_to_native([self.latest_motion_rectangle[:4]])[0]
+                    cv2.rectangle(annotated_frame, (x, y), (x + w, y + h), self.CONTOUR_COLOR, self.CONTOUR_THICKNESS)
+
+            # saves frame as an image at indicated path, archive profile keeps full resolution and colour
+            cv2.imwrite(image_path, annotated_frame, ENCODE_PROFILES[ARCHIVE_PROFILE].encode_parameters)
             logging.debug(f"[_detect_motion_and_manage_recording] Saved image at: {image_path}")
 
+            # queues frame for object detection, image is not read back from disk
+            self.object_detection_queue.submit(image_path, native_frame, native_motion_regions)
+
             # update last saved image time
             self.last_saved_image_time = current_time
 
-            # gets biggest contour from frame
-            biggest_contour = self._get_biggerst_contour(frame)
+            # gets biggest blob of motion mask
+            biggest_blob = self._get_biggest_motion_blob(frame)
 
-            if biggest_contour is not None:
+            if biggest_blob is not None:
+                x, _, w, _, blob_area = biggest_blob
                 # create sa dictionary with motion data
                 motion_data = {
-                    "x": biggest_contour[0],
-                    "w": biggest_contour[2],
+                    "x": x,
+                    "w": w,
                     "frame_width": frame.shape[1],
                     "frame_height": frame.shape[0], 
-                    "contour_area": biggest_contour[3],
-                    "image_path": image_path
+                    "contour_area": blob_area,  # pixels of biggest blob
+                    "image_path": image_path,
+                    "frame_sequence": self._publish_frame_to_bus(native_frame),  # object detection reads same clean frame from shared memory
+                    "motion_regions": motion_regions,
+                    "video_file_name": self.video_file_name if self.is_video_recording else None  # event waits for this recording
                 }
+                # continuous recording keeps time range of event, clip is cut from segments later
+                if self.segment_recorder is not None:
+                    motion_data["bookmark"] = self.segment_recorder.add_bookmark(
+                        current_time - PRE_ROLL_SECONDS, current_time + EVENT_CLIP_DURATION, get_video_metadata(motion_data)
+                    )
+
+                # metadata of first motion event is written into header of current video
+                if isinstance(self.out, StreamingVideoMuxer):
+                    self.out.set_metadata(get_video_metadata(motion_data))
+
                 # process and buffer amotion data
                 process_and_buffer_motion_data(self.events_motion_buffer, motion_data, self.user_id, self.app)
             else:
@@ -572,23 +1084,12 @@ class VideoCamera(object):
             raise Exception(f"Error! Did not save image: {image_path}, Error: {e}")
 
 
-    def _get_biggerst_contour(self, frame):
-        # finds contours on gray_frame frame
-        contours, _ = cv2.findContours(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        if contours:  # if contours found
-            # find biggest contour 
-            biggest_contour = max(contours, key=cv2.contourArea)
-
-            # gets bounding box of biggest contour
-            x, y, w, h = cv2.boundingRect(biggest_contour)
-            # calculates counter area of biggest contour
-            contour_area = cv2.contourArea(biggest_contour)
-
-            # return bounding box + area of biggest contour
-            return x, y, w, h, contour_area
-
-        return None # if contours not found
+    # biggest blob (x, y, w, h, area) of last substantial motion, frames that were not analysed are searched directly
+    def _get_biggest_motion_blob(self, frame):
+        motion_blobs = self.latest_motion_blobs
+        if motion_blobs is None or motion_blobs.frame_size != (frame.shape[1], frame.shape[0]):
+            motion_blobs = find_motion_blobs(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        return motion_blobs.get_biggest_blob()
 
 
     def _generate_combined_mask(self, combined_mask, frame):
@@ -601,29 +1102,31 @@ class VideoCamera(object):
         # transform combined mask to binary image 
         _, combined_mask = cv2.threshold(combined_mask, self.CONTOUR_THRESHOLD, self.BINARY_VALUE_MAX, cv2.THRESH_BINARY)
 
-        # finds contours in binary image
-        contours, _ = cv2.findContours(combined_mask.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # filter contours with area less set minimum
-        contours = [contour for contour in contours if cv2.contourArea(contour) >= self.CONTOUR_AREA_MIN]
+        # mask can be smaller than frame, blobs are found on mask and scaled to frame
+        frame_height, frame_width = frame.shape[:2]
+        mask_size, frame_size = (combined_mask.shape[1], combined_mask.shape[0]), (frame_width, frame_height)
+
+        # areas, boxes and centroids of all blobs in one pass, blobs smaller than minimum (given in frame pixels) are dropped
+        contour_area_min = self.CONTOUR_AREA_MIN * (mask_size[0] * mask_size[1]) / (frame_width * frame_height)
+        motion_blobs = find_motion_blobs(combined_mask, contour_area_min).scale_to(frame_size)
         
-        # if contours available after filtering
-        if contours:
+        # if blobs available after filtering
+        if len(motion_blobs):
             # reset flag to show that motion was not logged
             self.not_logged_motion = False
 
-            # find biggest contour 
-            biggest_contour = max(contours, key=cv2.contourArea)
-            # get bounding box of biggest contour
-            x, y, w, h = cv2.boundingRect(biggest_contour)
-            
-            # get height and widht 
-            frame_height, frame_width = frame.shape[:2]
+            # bounding box of biggest blob in frame coordinates
+            x, y, w, h, _ = motion_blobs.get_biggest_blob()
 
             # check if movement is substantial 
             if self._is_substantial_movement(x, y, w, h, frame_width, frame_height):
                 # draw rect around biggest contour
                 cv2.rectangle(frame, (x, y), (x + w, y + h), (self.CONTOUR_COLOR), self.CONTOUR_THICKNESS)
+                # keeps rectangle so live feed can show it
+                self.latest_motion_rectangle = (x, y, w, h, time.time())
+                # keeps rects of all blobs, detector can run on crops around them
+                self.latest_motion_regions = motion_blobs.get_regions()
+                self.latest_motion_blobs = motion_blobs
                 motion_detected = True # sets motion detected flag 
 
         return motion_detected # sets motion detected flag 
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from app.camera.camera import VideoCamera
+from app.camera.clip_finalisation import ClipFinalisationPool
+from app.computer_vision.motion_analysis_process_pool import MotionAnalysisProcessPool
+from app.algorithms_object_detection.batched_inference_service import BatchedInferenceService
+from app.tensorFlow.tf_model_utilities import DETECTION_MODEL
+from config import MOTION_ANALYSIS_BACKEND, MOTION_ANALYSIS_PROCESSES, DETECTION_BATCH_SIZE, DETECTION_BATCH_MAX_WAIT
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+DEFAULT_CAMERA_SOURCE = 0  # first video device
+MAX_NUMBER_OF_CAMERAS = 16  # maximum number of cameras served by one process
+ANALYSIS_WORKERS = min(4, os.cpu_count() or 1)  # threads shared by all cameras for motion analysis
+CAMERA_ID_LENGTH = 12  # number of hex characters used for camera id
+PROCESS_MOTION_ANALYSIS_BACKEND = 'process'  # value of MOTION_ANALYSIS_BACKEND enabling worker processes
+
+
+# converts camera source from form or url to value accepted by cv2.VideoCapture
+def parse_camera_source(camera_source):
+    if camera_source is None or camera_source == '':
+        return DEFAULT_CAMERA_SOURCE
+
+    # device indexes are integers, stream urls stay strings
+    if isinstance(camera_source, str) and camera_source.strip().isdigit():
+        return int(camera_source.strip())
+    return camera_source
+
+
+# creates stable camera id from user and camera source so it can be used in urls
+def create_camera_id(user_id, camera_source):
+    camera_key = f"{user_id}:{camera_source}"
+    return hashlib.sha1(camera_key.encode('utf-8')).hexdigest()[:CAMERA_ID_LENGTH]
+
+
+# keeps VideoCamera pipelines keyed by (user, camera source) and shares one analysis worker pool between them
+class CameraManager(object):
+    def __init__(self, max_number_of_cameras=MAX_NUMBER_OF_CAMERAS, analysis_workers=ANALYSIS_WORKERS,
+                 motion_analysis_backend=MOTION_ANALYSIS_BACKEND, motion_analysis_processes=MOTION_ANALYSIS_PROCESSES):
+        self.max_number_of_cameras = max_number_of_cameras
+        self.analysis_workers = analysis_workers
+        self.motion_analysis_backend = motion_analysis_backend
+        self.motion_analysis_processes = motion_analysis_processes
+        self.cameras = {}  # camera_id -> VideoCamera
+        self.lock = threading.Lock()
+        self.analysis_executor = None
+        self.motion_analysis_pool = None
+        self.inference_service = None
+        self.clip_finalisation_pool = None
+
+    # creates worker pool on first use
+    def _get_analysis_executor(self):
+        if self.analysis_executor is None:
+            self.analysis_executor = ThreadPoolExecutor(max_workers=self.analysis_workers, thread_name_prefix='camera_analysis')
+        return self.analysis_executor
+
+    # starts worker processes on first use if process backend is configured, otherwise returns None
+    def _get_motion_analysis_pool(self):
+        if self.motion_analysis_backend != PROCESS_MOTION_ANALYSIS_BACKEND:
+            return None
+        if self.motion_analysis_pool is None:
+            try:
+                self.motion_analysis_pool = MotionAnalysisProcessPool(self.motion_analysis_processes)
+            except Exception as e:
+                # cameras keep analysing frames in threads
+                logging.error(f"Error! Can not start motion analysis processes: {str(e)}")
+                self.motion_analysis_backend = None
+        return self.motion_analysis_pool
+
+    # creates service batching object detection of all cameras, frames are submitted only once model handle is ready
+    def _get_inference_service(self):
+        if self.inference_service is None:
+            self.inference_service = BatchedInferenceService(DETECTION_MODEL, DETECTION_BATCH_SIZE, DETECTION_BATCH_MAX_WAIT)
+        return self.inference_service
+
+    # recorded clips of all cameras are finalised by the same workers
+    def _get_clip_finalisation_pool(self):
+        if self.clip_finalisation_pool is None:
+            self.clip_finalisation_pool = ClipFinalisationPool()
+        return self.clip_finalisation_pool
+
+    # returns camera for user and source, creates it if it does not exist
+    # analysis budget (e.g. {'idle_analysis_fps': 2.0}) overrides default ANALYSIS_BUDGET for this camera
+    def get_or_create_camera(self, app, user_id, camera_source=DEFAULT_CAMERA_SOURCE, credentials=None, analysis_budget=None):
+        camera_source = parse_camera_source(camera_source)
+        camera_id = create_camera_id(user_id, camera_source)
+
+        with self.lock:
+            video_camera = self.cameras.get(camera_id)
+            if video_camera is not None:
+                return video_camera, False
+
+            # limits number of pipelines served by this process
+            if len(self.cameras) >= self.max_number_of_cameras:
+                raise RuntimeError(f"Maximum number of cameras ({self.max_number_of_cameras}) was reached.")
+
+            video_camera = VideoCamera(
+                app=app,
+                user_id=user_id,
+                credentials=credentials,
+                camera_source=camera_source,
+                camera_id=camera_id,
+                analysis_executor=self._get_analysis_executor(),
+                motion_analysis_pool=self._get_motion_analysis_pool(),
+                inference_service=self._get_inference_service(),
+                analysis_budget=analysis_budget,
+                clip_finalisation_pool=self._get_clip_finalisation_pool()
+            )
+            self.cameras[camera_id] = video_camera
+            logging.info(f"Camera {camera_id} was created for user {user_id} and source {camera_source}")
+            return video_camera, True
+
+    # returns camera by id or None
+    def get_camera(self, camera_id):
+        return self.cameras.get(camera_id)
+
+    # returns camera of user for given source or None
+    def get_camera_for_user(self, user_id, camera_source=DEFAULT_CAMERA_SOURCE):
+        return self.cameras.get(create_camera_id(user_id, parse_camera_source(camera_source)))
+
+    # returns all cameras of this process
+    def get_all_cameras(self):
+        return dict(self.cameras)
+
+    # returns all cameras of user
+    def get_cameras_for_user(self, user_id):
+        return {camera_id: video_camera for camera_id, video_camera in list(self.cameras.items()) if video_camera.user_id == user_id}
+
+    # stops camera pipeline and removes it from registry
+    def remove_camera(self, camera_id):
+        with self.lock:
+            video_camera = self.cameras.pop(camera_id, None)
+
+        if video_camera is not None:
+            video_camera._stop_live_feed()
+            video_camera.release_motion_analysis_client()
+            video_camera.release_shared_frame_bus()
+            logging.info(f"Camera {camera_id} was removed.")
+        return video_camera
+
+    # stops all cameras and worker pool, called when program is shut down
+    def release_all_cameras(self):
+        for camera_id in list(self.cameras.keys()):
+            self.remove_camera(camera_id)
+
+        if self.analysis_executor is not None:
+            self.analysis_executor.shutdown(wait=False)
+            self.analysis_executor = None
+
+        if self.motion_analysis_pool is not None:
+            self.motion_analysis_pool.shutdown()
+            self.motion_analysis_pool = None
+
+        if self.inference_service is not None:
+            self.inference_service.stop()
+            self.inference_service = None
+
+        # waits so last recordings are written completely
+        if self.clip_finalisation_pool is not None:
+            self.clip_finalisation_pool.shutdown(wait=True)
+            self.clip_finalisation_pool = None
+
+# References:
+# https://docs.python.org/3/library/concurrent.futures.html#threadpoolexecutor
+# https://docs.python.org/3/library/hashlib.html
+# https://docs.python.org/3/library/multiprocessing.html
+# https://docs.opencv.org/4.x/d8/dfe/classcv_1_1VideoCapture.html
+# https://github.com/blakeblackshear/frigate/discussions/8674
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
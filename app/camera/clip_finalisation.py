@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# job states
+QUEUED_STATE = 'queued'  # recording stopped, waiting for free worker
+RELEASING_STATE = 'releasing'  # sound stream is stopped and video writer released
+MUXING_STATE = 'muxing'  # sound and video are merged with ffmpeg (only without single pass muxer)
+READY_STATE = 'ready'  # final video can be used by motion events
+FAILED_STATE = 'failed'
+
+# allowed changes of state, anything else is a programming error
+STATE_TRANSITIONS = {
+    QUEUED_STATE: (RELEASING_STATE, FAILED_STATE),
+    RELEASING_STATE: (MUXING_STATE, READY_STATE, FAILED_STATE),
+    MUXING_STATE: (READY_STATE, FAILED_STATE),
+    READY_STATE: (),
+    FAILED_STATE: ()
+}
+
+# constants
+FINALISATION_WORKERS = 2  # clips of all cameras finalised at the same time
+
+
+# recording that was stopped, keeps everything needed to finish its file after camera started a new recording
+class ClipFinalisationJob(object):
+    def __init__(self, video_file_name, video_writer, audio_sink=None):
+        self.video_file_name = video_file_name
+        self.video_writer = video_writer
+        self.audio_sink = audio_sink  # muxer or WAV file that received sound of the recording
+
+        self.state = QUEUED_STATE
+        self.state_times = {QUEUED_STATE: time.time()}  # when job entered each state
+        self.final_video_path = None
+        self.metadata_embedded = False
+        self.error = None
+        self.finished_event = threading.Event()
+
+    def change_state(self, state):
+        if state not in STATE_TRANSITIONS[self.state]:
+            raise ValueError(f"Clip can not change state from {self.state} to {state}")
+        self.state = state
+        self.state_times[state] = time.time()
+
+    def is_finished(self):
+        return self.state in (READY_STATE, FAILED_STATE)
+
+    # waits until job is ready or failed, returns False on timeout
+    def wait(self, timeout=None):
+        return self.finished_event.wait(timeout)
+
+    # seconds between recording stop and end of finalisation, None while job is running
+    def get_finalisation_time(self):
+        finished_time = self.state_times.get(READY_STATE, self.state_times.get(FAILED_STATE))
+        return None if finished_time is None else finished_time - self.state_times[QUEUED_STATE]
+
+
+# finalises clips in worker threads so recording stop never blocks capture, analysis or streaming
+class ClipFinalisationPool(object):
+    def __init__(self, number_of_workers=FINALISATION_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=number_of_workers, thread_name_prefix='clip_finalisation')
+
+    # runs finalise function(job) in worker, callback(job) is called when job is ready or failed
+    def submit(self, job, finalise_function, callback=None):
+        return self.executor.submit(self._run_job, job, finalise_function, callback)
+
+    def _run_job(self, job, finalise_function, callback):
+        try:
+            finalise_function(job)
+            if job.state != READY_STATE:
+                job.change_state(READY_STATE)
+        except Exception as e:
+            logging.error(f"Error! Clip {job.video_file_name} was not finalised: {e}")
+            job.error = str(e)
+            job.state = FAILED_STATE
+            job.state_times[FAILED_STATE] = time.time()
+        finally:
+            job.finished_event.set()
+
+        if callback is not None:
+            try:
+                callback(job)
+            except Exception as e:
+                logging.error(f"Error! Clip finalisation callback failed: {e}")
+        return job
+
+    # waits for running jobs, called when program is shut down
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+# References:
+# https://docs.python.org/3/library/concurrent.futures.html#threadpoolexecutor
+# https://docs.python.org/3/library/threading.html#event-objects
+# https://en.wikipedia.org/wiki/Finite-state_machine
+# https://pyimagesearch.com/2016/02/29/saving-key-event-video-clips-with-opencv/
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
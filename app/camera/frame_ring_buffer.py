@@ -0,0 +1,156 @@
+import threading
+import time
+import numpy as np
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+SLOT_BEING_WRITTEN = -2  # sequence value of a slot while capture thread is writing into it
+SLOT_EMPTY = -1  # sequence value of a slot that was never written
+NO_FRAME_SEQUENCE = -1  # sequence value before the first frame is published
+DEFAULT_WAIT_TIMEOUT = 1.0  # seconds a consumer waits for a new frame
+
+
+# fixed-size ring of preallocated frames, written by one capture thread and read by many consumers
+class FrameRingBuffer(object):
+    def __init__(self, number_of_slots, frame_height, frame_width, number_of_channels=3):
+        self.number_of_slots = number_of_slots
+        self.frame_shape = (frame_height, frame_width, number_of_channels)
+
+        # preallocated frames, capture thread writes directly into them (no per-frame allocation)
+        self.frames = np.zeros((number_of_slots,) + self.frame_shape, dtype=np.uint8)
+
+        # sequence number and capture time of the frame stored in each slot
+        self.slot_sequences = [SLOT_EMPTY] * number_of_slots
+        self.slot_timestamps = [0.0] * number_of_slots
+
+        # sequence number of the newest published frame
+        self.latest_sequence = NO_FRAME_SEQUENCE
+
+        # only used to wake up idle consumers, frames are never copied while holding it
+        self.new_frame_condition = threading.Condition()
+
+    # returns sequence number and slot array the next frame should be written into
+    def acquire_slot_for_writing(self):
+        sequence = self.latest_sequence + 1
+        slot_index = sequence % self.number_of_slots
+
+        # marks slot as being written so consumers discard partially written frames
+        self.slot_sequences[slot_index] = SLOT_BEING_WRITTEN
+        return sequence, self.frames[slot_index]
+
+    # makes written frame visible to consumers
+    def publish_slot(self, sequence, timestamp=None):
+        slot_index = sequence % self.number_of_slots
+        self.slot_timestamps[slot_index] = timestamp if timestamp is not None else time.time()
+        self.slot_sequences[slot_index] = sequence
+        self.latest_sequence = sequence
+
+        # wakes consumers waiting for a new frame
+        with self.new_frame_condition:
+            self.new_frame_condition.notify_all()
+
+    # copies frame into the next slot and publishes it
+    def write_frame(self, frame, timestamp=None):
+        sequence, slot = self.acquire_slot_for_writing()
+        np.copyto(slot, frame)
+        self.publish_slot(sequence, timestamp)
+        return sequence
+
+    # copies frame with given sequence into output array, returns False if it was overwritten meanwhile
+    def read_frame(self, sequence, output_frame):
+        slot_index = sequence % self.number_of_slots
+        if self.slot_sequences[slot_index] != sequence:
+            return False
+
+        np.copyto(output_frame, self.frames[slot_index])
+
+        # frame is valid only if the slot was not reused while copying (seqlock style check)
+        return self.slot_sequences[slot_index] == sequence
+
+    # returns capture time of the frame with given sequence
+    def get_frame_timestamp(self, sequence):
+        return self.slot_timestamps[sequence % self.number_of_slots]
+
+    # blocks until a frame newer than after_sequence is published or timeout expires
+    def wait_for_frame(self, after_sequence, timeout=DEFAULT_WAIT_TIMEOUT):
+        if self.latest_sequence > after_sequence:
+            return True
+        with self.new_frame_condition:
+            return self.new_frame_condition.wait_for(lambda: self.latest_sequence > after_sequence, timeout)
+
+    # wakes all waiting consumers, e.g. when the camera is stopped
+    def wake_up_consumers(self):
+        with self.new_frame_condition:
+            self.new_frame_condition.notify_all()
+
+
+# reads frames from a ring buffer at its own pace and counts frames it had to skip
+class FrameRingConsumer(object):
+    def __init__(self, ring_buffer, name):
+        self.ring_buffer = ring_buffer
+        self.name = name
+
+        # consumer owned frame, read frames are copied into it
+        self.frame = np.zeros(ring_buffer.frame_shape, dtype=np.uint8)
+
+        self.last_sequence = NO_FRAME_SEQUENCE
+        self.last_timestamp = 0.0
+        self.consumed_frames = 0
+        self.dropped_frames = 0
+
+    # reads the newest frame, frames published since the previous read are counted as dropped
+    def read_latest_frame(self, timeout=DEFAULT_WAIT_TIMEOUT):
+        if not self.ring_buffer.wait_for_frame(self.last_sequence, timeout):
+            return None
+
+        sequence = self.ring_buffer.latest_sequence
+        return self._read_sequence(sequence)
+
+    # reads the next frame in order, frames already overwritten by capture thread are counted as dropped
+    def read_next_frame(self, timeout=DEFAULT_WAIT_TIMEOUT):
+        if not self.ring_buffer.wait_for_frame(self.last_sequence, timeout):
+            return None
+
+        sequence = self.last_sequence + 1
+
+        # skips frames that capture thread has already overwritten (keeps one slot as margin for the writer)
+        oldest_readable_sequence = self.ring_buffer.latest_sequence - self.ring_buffer.number_of_slots + 2
+        if sequence < oldest_readable_sequence:
+            sequence = oldest_readable_sequence
+        return self._read_sequence(sequence)
+
+    def _read_sequence(self, sequence):
+        # counts frames skipped since last read
+        if self.last_sequence != NO_FRAME_SEQUENCE:
+            self.dropped_frames += max(0, sequence - self.last_sequence - 1)
+
+        if not self.ring_buffer.read_frame(sequence, self.frame):
+            # frame was overwritten while being copied
+            self.dropped_frames += 1
+            self.last_sequence = sequence
+            return None
+
+        self.last_sequence = sequence
+        self.last_timestamp = self.ring_buffer.get_frame_timestamp(sequence)
+        self.consumed_frames += 1
+        return self.frame
+
+    # returns counters of the consumer
+    def get_statistics(self):
+        return {
+            'consumed_frames': self.consumed_frames,
+            'dropped_frames': self.dropped_frames,
+            'lag_frames': max(0, self.ring_buffer.latest_sequence - self.last_sequence)
+        }
+
+# References:
+# https://docs.python.org/3/library/threading.html#condition-objects
+# https://numpy.org/doc/stable/reference/generated/numpy.copyto.html
+# https://en.wikipedia.org/wiki/Seqlock
+# https://en.wikipedia.org/wiki/Circular_buffer
+# https://nrsyed.com/2018/07/05/multithreading-with-opencv-python-to-improve-video-processing-performance/
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
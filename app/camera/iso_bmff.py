@@ -0,0 +1,123 @@
+import struct
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+BOX_HEADER_SIZE = 8  # 32 bit size + 4 character type
+LARGE_BOX_HEADER_SIZE = 16  # size 1 means 64 bit size follows type
+INIT_SEGMENT_BOXES = (b'ftyp', b'moov')  # file header, codec configuration of all tracks
+VIDEO_HANDLER = b'vide'
+
+
+# returns (box type, box size, header size) of box starting at offset, None if header is not complete yet
+def read_box_header(data, offset=0):
+    if len(data) - offset < BOX_HEADER_SIZE:
+        return None
+    box_size, box_type = struct.unpack_from('>I4s', data, offset)
+    if box_size == 1:
+        if len(data) - offset < LARGE_BOX_HEADER_SIZE:
+            return None
+        return box_type, struct.unpack_from('>Q', data, offset + BOX_HEADER_SIZE)[0], LARGE_BOX_HEADER_SIZE
+    if box_size == 0:
+        # box reaches end of file
+        return box_type, len(data) - offset, BOX_HEADER_SIZE
+    return box_type, box_size, BOX_HEADER_SIZE
+
+
+# yields (box type, offset, size, header size) of complete boxes between start and end
+def iterate_boxes(data, start=0, end=None):
+    end = len(data) if end is None else end
+    offset = start
+    while offset < end:
+        box_header = read_box_header(data, offset)
+        if box_header is None or box_header[1] < box_header[2] or offset + box_header[1] > end:
+            return
+        box_type, box_size, header_size = box_header
+        yield box_type, offset, box_size, header_size
+        offset += box_size
+
+
+# returns (offset, size, header size) of every child box with given type
+def find_boxes(data, box_type, start=0, end=None):
+    return [(offset, size, header_size) for child_type, offset, size, header_size in iterate_boxes(data, start, end) if child_type == box_type]
+
+
+# follows path of box types (e.g. b'moov', b'trak'), returns first match as (offset, size, header size) or None
+def find_box(data, path, start=0, end=None):
+    box = None
+    for box_type in path:
+        boxes = find_boxes(data, box_type, start, end)
+        if not boxes:
+            return None
+        box = boxes[0]
+        start, end = box[0] + box[2], box[0] + box[1]
+    return box
+
+
+def _get_box_payload(data, box):
+    offset, size, header_size = box
+    return offset + header_size, offset + size
+
+
+# returns {track id: (handler type, timescale)} read from moov box of init segment
+def get_track_timescales(init_segment):
+    moov = find_box(init_segment, (b'moov',))
+    if moov is None:
+        return {}
+
+    tracks = {}
+    for trak in find_boxes(init_segment, b'trak', *_get_box_payload(init_segment, moov)):
+        trak_start, trak_end = _get_box_payload(init_segment, trak)
+        tkhd = find_box(init_segment, (b'tkhd',), trak_start, trak_end)
+        mdhd = find_box(init_segment, (b'mdia', b'mdhd'), trak_start, trak_end)
+        hdlr = find_box(init_segment, (b'mdia', b'hdlr'), trak_start, trak_end)
+        if tkhd is None or mdhd is None or hdlr is None:
+            continue
+
+        # full boxes start with version (1 byte) and flags (3 bytes), version 1 uses 64 bit times
+        tkhd_start = tkhd[0] + tkhd[2]
+        track_id = struct.unpack_from('>I', init_segment, tkhd_start + (20 if init_segment[tkhd_start] == 1 else 12))[0]
+        mdhd_start = mdhd[0] + mdhd[2]
+        timescale = struct.unpack_from('>I', init_segment, mdhd_start + (20 if init_segment[mdhd_start] == 1 else 12))[0]
+        handler_type = bytes(init_segment[hdlr[0] + hdlr[2] + 8:hdlr[0] + hdlr[2] + 12])
+        tracks[track_id] = (handler_type, timescale)
+    return tracks
+
+
+# returns {track id: base media decode time} of every track fragment in moof box
+def get_fragment_decode_times(moof):
+    moof_box = find_box(moof, (b'moof',))
+    if moof_box is None:
+        return {}
+
+    decode_times = {}
+    for traf in find_boxes(moof, b'traf', *_get_box_payload(moof, moof_box)):
+        traf_start, traf_end = _get_box_payload(moof, traf)
+        tfhd = find_box(moof, (b'tfhd',), traf_start, traf_end)
+        tfdt = find_box(moof, (b'tfdt',), traf_start, traf_end)
+        if tfhd is None or tfdt is None:
+            continue
+        track_id = struct.unpack_from('>I', moof, tfhd[0] + tfhd[2] + 4)[0]
+        tfdt_start = tfdt[0] + tfdt[2]
+        decode_time_format = '>Q' if moof[tfdt_start] == 1 else '>I'
+        decode_times[track_id] = struct.unpack_from(decode_time_format, moof, tfdt_start + 4)[0]
+    return decode_times
+
+
+# returns (track id, timescale) of first video track, None if init segment has no video
+def get_video_track(init_segment):
+    for track_id, (handler_type, timescale) in sorted(get_track_timescales(init_segment).items()):
+        if handler_type == VIDEO_HANDLER:
+            return track_id, timescale
+    return None
+
+# References:
+# https://www.iso.org/standard/83102.html
+# https://developer.apple.com/documentation/quicktime-file-format
+# https://www.w3.org/TR/mse-byte-stream-format-isobmff/
+# https://github.com/gpac/mp4box.js/blob/main/src/parsing
+# https://docs.python.org/3/library/struct.html
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -0,0 +1,147 @@
+import math
+import threading
+import time
+from collections import deque
+from app.camera.video_muxer import StreamingVideoMuxer
+from app.camera.segment_recorder import FragmentSplitter, CONTAINER_FORMAT, FRAGMENTED_MP4_OPTIONS, KEYFRAME_INTERVAL_SECONDS
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+PLAYLIST_LENGTH = 4  # segments listed in playlist, player starts about 3 segments behind live
+KEPT_SEGMENTS = 8  # segments kept in memory, players with older playlist can still load them
+VIEWER_TIMEOUT = 30.0  # seconds without requests after which own encoder is stopped
+HLS_VERSION = 7  # fragmented MP4 segments need version 7
+INIT_SEGMENT_NAME = 'init_{}.mp4'  # name changes with every new encoder so players load new codec configuration
+SEGMENT_NAME = 'segment_{}.m4s'
+
+
+# H.264 live stream of one camera as HLS with fragmented MP4 segments, encoded once and shared by all viewers
+# fragments come from continuous recording or from own encoder that runs only while somebody is watching
+class LiveStream(object):
+    def __init__(self, playlist_length=PLAYLIST_LENGTH, kept_segments=KEPT_SEGMENTS, viewer_timeout=VIEWER_TIMEOUT):
+        self.playlist_length = playlist_length
+        self.viewer_timeout = viewer_timeout
+
+        self.init_segment, self.init_segment_version = None, 0
+        self.segments = deque(maxlen=max(kept_segments, playlist_length))  # (sequence number, duration, bytes)
+        self.pending_fragment = None  # (bytes, decode time), duration is known when next fragment arrives
+        self.next_sequence_number = 0
+        self.condition = threading.Condition()  # notifies requests waiting for first segments
+
+        self.muxer = None
+        self.last_request_time = 0.0
+
+    def set_init_segment(self, init_segment):
+        with self.condition:
+            # segments of previous encoder can not be decoded with new init segment
+            self.init_segment = init_segment
+            self.init_segment_version += 1
+            self.segments.clear()
+            self.pending_fragment = None
+
+    # decode time is seconds since start of encoder, used for segment duration
+    def add_fragment(self, fragment, decode_time):
+        with self.condition:
+            if self.pending_fragment is not None:
+                pending_fragment, pending_decode_time = self.pending_fragment
+                duration = KEYFRAME_INTERVAL_SECONDS
+                if decode_time is not None and pending_decode_time is not None and decode_time > pending_decode_time:
+                    duration = decode_time - pending_decode_time
+                self.segments.append((self.next_sequence_number, duration, pending_fragment))
+                self.next_sequence_number += 1
+                self.condition.notify_all()
+            self.pending_fragment = (fragment, decode_time)
+
+    # returns m3u8 playlist of newest segments, None before first segment
+    def get_playlist(self):
+        with self.condition:
+            if self.init_segment is None or not self.segments:
+                return None
+            segments = list(self.segments)[-self.playlist_length:]
+
+        lines = [
+            '#EXTM3U',
+            f'#EXT-X-VERSION:{HLS_VERSION}',
+            f'#EXT-X-TARGETDURATION:{max(1, math.ceil(max(duration for _, duration, _ in segments)))}',
+            f'#EXT-X-MEDIA-SEQUENCE:{segments[0][0]}',
+            '#EXT-X-INDEPENDENT-SEGMENTS',
+            f'#EXT-X-MAP:URI="{INIT_SEGMENT_NAME.format(self.init_segment_version)}"'
+        ]
+        for sequence_number, duration, _ in segments:
+            lines.append(f'#EXTINF:{duration:.3f},')
+            lines.append(SEGMENT_NAME.format(sequence_number))
+        return '\n'.join(lines) + '\n'
+
+    # waits until playlist has at least one segment, returns False on timeout
+    def wait_for_segments(self, timeout):
+        with self.condition:
+            return self.condition.wait_for(lambda: self.init_segment is not None and len(self.segments) > 0, timeout)
+
+    def get_init_segment(self, version):
+        with self.condition:
+            return self.init_segment if version == self.init_segment_version else None
+
+    def get_segment(self, sequence_number):
+        with self.condition:
+            for segment_sequence_number, _, segment in self.segments:
+                if segment_sequence_number == sequence_number:
+                    return segment
+        return None
+
+    # every playlist and segment request keeps own encoder running
+    def report_viewer(self):
+        self.last_request_time = time.time()
+
+    def has_viewers(self):
+        return time.time() - self.last_request_time < self.viewer_timeout
+
+    def is_encoding(self):
+        return self.muxer is not None
+
+    def start_encoder(self, frame_width, frame_height, fps):
+        with self.condition:
+            if self.muxer is not None:
+                return
+            splitter = FragmentSplitter(self.set_init_segment, self.add_fragment)
+            self.muxer = StreamingVideoMuxer(
+                splitter, frame_width, frame_height, fps, metadata_wait_time=0,
+                container_format=CONTAINER_FORMAT, container_options=FRAGMENTED_MP4_OPTIONS,
+                keyframe_interval=max(1, int(round(fps * KEYFRAME_INTERVAL_SECONDS)))
+            )
+
+    # encodes frame for all viewers, encoder is stopped when nobody watched for viewer timeout
+    def write(self, frame, timestamp=None):
+        muxer = self.muxer
+        if muxer is None:
+            return
+        if not self.has_viewers():
+            self.stop_encoder()
+            return
+        muxer.write(frame, timestamp)
+
+    def stop_encoder(self):
+        with self.condition:
+            muxer, self.muxer = self.muxer, None
+        if muxer is not None:
+            muxer.release()
+
+    def get_statistics(self):
+        with self.condition:
+            return {
+                'encoding': self.muxer is not None,
+                'segments': len(self.segments),
+                'bytes': sum(len(segment) for _, _, segment in self.segments),
+                'has_viewers': self.has_viewers()
+            }
+
+# References:
+# https://datatracker.ietf.org/doc/html/rfc8216
+# https://developer.apple.com/documentation/http-live-streaming/hls-authoring-specification-for-apple-devices
+# https://developer.apple.com/documentation/http-live-streaming/about-the-common-media-application-format-with-http-live-streaming-hls
+# https://github.com/video-dev/hls.js/blob/master/docs/API.md
+# https://ffmpeg.org/ffmpeg-formats.html#Fragmentation
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
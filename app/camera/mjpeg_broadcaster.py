@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+SUBSCRIBER_QUEUE_SIZE = 2  # jpeg frames waiting for one viewer, more would only add delay
+POLL_TIMEOUT = 2.0  # seconds after last retrieve_frame() call during which frames are still encoded
+
+
+# one viewer of MJPEG live feed, queue is bounded so slow viewer never holds back the others
+class MjpegSubscriber(object):
+    def __init__(self, profile_name, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.profile_name = profile_name  # encode profile of frames this viewer gets
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.received_frames, self.dropped_frames = 0, 0
+
+    # called by streaming thread only, oldest waiting frame is dropped when viewer is too slow
+    def put(self, jpeg):
+        while True:
+            try:
+                self.frames.put_nowait(jpeg)
+                self.received_frames += 1
+                return
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()
+                    self.dropped_frames += 1
+                except queue.Empty:
+                    pass
+
+    # returns next jpeg frame, None on timeout
+    def get_frame(self, timeout):
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+# every frame of live feed is encoded once per profile and the same bytes are handed to all viewers of that profile
+class MjpegBroadcaster(object):
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE, poll_timeout=POLL_TIMEOUT):
+        self.queue_size = queue_size
+        self.poll_timeout = poll_timeout
+        self.subscribers = []
+        self.condition = threading.Condition()  # wakes streaming thread when viewer arrives and pollers on new frame
+
+        # profile name -> latest jpeg, number of published frames, time of last retrieve_frame() call
+        self.latest_frames, self.frame_numbers, self.last_poll_times = {}, {}, {}
+        self.dropped_frames = 0  # frames dropped by viewers that already left
+
+    def subscribe(self, profile_name):
+        subscriber = MjpegSubscriber(profile_name, self.queue_size)
+        with self.condition:
+            self.subscribers.append(subscriber)
+            self.condition.notify_all()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.condition:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+                self.dropped_frames += subscriber.dropped_frames
+
+    def number_of_subscribers(self):
+        with self.condition:
+            return len(self.subscribers)
+
+    # profiles somebody watches, subscribers and recent callers of read_latest_frame() keep their profile encoded
+    def get_watched_profiles(self):
+        current_time = time.time()
+        profile_names = {subscriber.profile_name for subscriber in self.subscribers}
+        profile_names.update(name for name, poll_time in self.last_poll_times.items() if current_time - poll_time < self.poll_timeout)
+        return sorted(profile_names)
+
+    # waits until somebody watches, returns watched profiles (empty on timeout)
+    def wait_for_viewers(self, timeout):
+        with self.condition:
+            self.condition.wait_for(self.get_watched_profiles, timeout)
+            return self.get_watched_profiles()
+
+    # never blocks, full subscriber queues drop their oldest frame
+    def publish(self, profile_name, jpeg):
+        with self.condition:
+            self.latest_frames[profile_name] = jpeg
+            self.frame_numbers[profile_name] = self.frame_numbers.get(profile_name, 0) + 1
+            subscribers = [subscriber for subscriber in self.subscribers if subscriber.profile_name == profile_name]
+            self.condition.notify_all()
+        for subscriber in subscribers:
+            subscriber.put(jpeg)
+
+    # waits for next published frame, returns latest frame of profile (None if nothing was published yet)
+    def read_latest_frame(self, profile_name, timeout):
+        with self.condition:
+            self.last_poll_times[profile_name] = time.time()
+            self.condition.notify_all()
+            frame_number = self.frame_numbers.get(profile_name, 0)
+            self.condition.wait_for(lambda: self.frame_numbers.get(profile_name, 0) != frame_number, timeout)
+            return self.latest_frames.get(profile_name)
+
+    def get_statistics(self):
+        with self.condition:
+            return {
+                'subscribers': len(self.subscribers),
+                'published_frames': dict(self.frame_numbers),
+                'dropped_frames': self.dropped_frames + sum(subscriber.dropped_frames for subscriber in self.subscribers)
+            }
+
+# References:
+# https://docs.python.org/3/library/queue.html#queue.Queue.put_nowait
+# https://docs.python.org/3/library/threading.html#condition-objects
+# https://blog.miguelgrinberg.com/post/flask-video-streaming-revisited
+# https://en.wikipedia.org/wiki/Motion_JPEG#M-JPEG_over_HTTP
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import deque
+import cv2
+import numpy as np
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+DEFAULT_PRE_ROLL_DURATION = 3.0  # seconds of video kept before motion is detected
+DEFAULT_PRE_ROLL_FPS = 30.0
+DEFAULT_PRE_ROLL_MAX_FRAMES = 90
+JPEG_BYTES_PER_PIXEL = 0.4  # upper estimate of JPEG frame size at quality 80, typical camera frames need less
+DEFAULT_JPEG_QUALITY = 80
+JPEG_FORMAT = '.jpg'
+
+
+# byte budget for duration of JPEG frames of given size, grows with resolution so pre-roll is not cut short
+def calculate_pre_roll_max_bytes(frame_width, frame_height, fps=DEFAULT_PRE_ROLL_FPS, duration=DEFAULT_PRE_ROLL_DURATION):
+    return int(frame_width * frame_height * JPEG_BYTES_PER_PIXEL * fps * duration)
+
+
+DEFAULT_PRE_ROLL_MAX_BYTES = calculate_pre_roll_max_bytes(640, 360)  # ~8 MB, raw 640x360 frames would need ~60 MB
+
+
+# decodes JPEG frame kept in pre-roll buffer
+def decode_frame(encoded_frame):
+    return cv2.imdecode(np.frombuffer(encoded_frame, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+# keeps last seconds of video as JPEG frames, oldest frames are dropped when time, byte or frame budget is exceeded
+class PreRollBuffer(object):
+    def __init__(self, max_duration=DEFAULT_PRE_ROLL_DURATION, max_bytes=DEFAULT_PRE_ROLL_MAX_BYTES,
+                 max_frames=DEFAULT_PRE_ROLL_MAX_FRAMES, jpeg_quality=DEFAULT_JPEG_QUALITY):
+        self.max_duration = max_duration
+        self.max_bytes = max_bytes
+        self.max_frames = max_frames
+        self.encode_parameters = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+
+        # (capture time, JPEG bytes), deque drops oldest frame in O(1)
+        self.encoded_frames = deque()
+        self.number_of_bytes = 0
+
+        # recording thread appends, analysis thread drains when recording starts
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.encoded_frames)
+
+    # compresses frame and adds it with its capture time (None means now), returns False if frame can not be encoded
+    def append(self, frame, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        ret, encoded_frame = cv2.imencode(JPEG_FORMAT, frame, self.encode_parameters)
+        if not ret:
+            return False
+        encoded_frame = encoded_frame.tobytes()
+
+        with self.lock:
+            self.encoded_frames.append((timestamp, encoded_frame))
+            self.number_of_bytes += len(encoded_frame)
+            self._drop_old_frames(timestamp)
+        return True
+
+    def _drop_old_frames(self, current_time):
+        while self.encoded_frames and (
+            len(self.encoded_frames) > self.max_frames
+            or self.number_of_bytes > self.max_bytes
+            or current_time - self.encoded_frames[0][0] > self.max_duration
+        ):
+            _, encoded_frame = self.encoded_frames.popleft()
+            self.number_of_bytes -= len(encoded_frame)
+
+    # returns all kept frames (oldest first) as (capture time, JPEG bytes) and empties buffer
+    def drain(self):
+        with self.lock:
+            encoded_frames = list(self.encoded_frames)
+            self.encoded_frames.clear()
+            self.number_of_bytes = 0
+        return encoded_frames
+
+    def get_statistics(self):
+        with self.lock:
+            duration = self.encoded_frames[-1][0] - self.encoded_frames[0][0] if self.encoded_frames else 0.0
+            return {
+                'frames': len(self.encoded_frames),
+                'bytes': self.number_of_bytes,
+                'duration': duration
+            }
+
+# References:
+# https://docs.python.org/3/library/collections.html#collections.deque
+# https://docs.opencv.org/4.x/d4/da8/group__imgcodecs.html#ga461f9ac09887e47797a54567df3b8b63
+# https://pyimagesearch.com/2016/02/29/saving-key-event-video-clips-with-opencv/
+# https://wiki.python.org/moin/TimeComplexity
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
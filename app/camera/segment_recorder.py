@@ -0,0 +1,303 @@
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from app.camera.video_muxer import StreamingVideoMuxer
+from app.camera.iso_bmff import read_box_header, get_video_track, get_fragment_decode_times, INIT_SEGMENT_BOXES
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+FRAGMENTED_MP4_OPTIONS = {'movflags': 'frag_keyframe+empty_moov+default_base_moof'}  # moov without samples, moof+mdat per keyframe
+CONTAINER_FORMAT = 'mp4'
+DEFAULT_SEGMENT_DURATION = 6.0  # seconds, segments are cut at first keyframe after this time
+DEFAULT_RETENTION_TIME = 24 * 60 * 60.0  # seconds segments are kept on disk
+KEYFRAME_INTERVAL_SECONDS = 1.0  # fragment length, bookmarks are cut with this precision
+PRUNE_INTERVAL = 60.0  # seconds between checks for old segments
+INDEX_FILE_NAME = 'index.jsonl'
+INIT_SEGMENT_PREFIX = 'init_'
+INIT_SEGMENT_EXTENSION = '.mp4'
+SEGMENT_EXTENSION = '.m4s'
+RECORDING_ID_FORMAT = '%Y%m%d_%H%M%S_%f'
+SEGMENT_ENTRY = 'segment'
+BOOKMARK_ENTRY = 'bookmark'
+
+
+# muxer writes fragmented MP4 here, complete init segment (ftyp+moov) and fragments (moof+mdat) are passed on
+# on_fragment(fragment, decode time) gets seconds since start of stream of first video sample, None for fragments without video
+class FragmentSplitter(io.RawIOBase):
+    def __init__(self, on_init_segment, on_fragment):
+        self.on_init_segment = on_init_segment
+        self.on_fragment = on_fragment
+        self.buffer = bytearray()  # bytes of box that is not complete yet
+        self.init_segment = bytearray()
+        self.video_track = None  # (track id, timescale) read from init segment
+        self.moof = None
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer.extend(data)
+        self._split_complete_boxes()
+        return len(data)
+
+    def _split_complete_boxes(self):
+        offset = 0
+        while True:
+            box_header = read_box_header(self.buffer, offset)
+            if box_header is None or len(self.buffer) - offset < box_header[1]:
+                break
+            box_type, box_size, _ = box_header
+            box = bytes(self.buffer[offset:offset + box_size])
+            offset += box_size
+
+            if box_type in INIT_SEGMENT_BOXES:
+                self.init_segment.extend(box)
+                if box_type == b'moov':
+                    self.video_track = get_video_track(self.init_segment)
+                    self.on_init_segment(bytes(self.init_segment))
+            elif box_type == b'moof':
+                self.moof = box
+            elif box_type == b'mdat' and self.moof is not None:
+                self.on_fragment(self.moof + box, self.get_decode_time(self.moof))
+                self.moof = None
+            # other boxes (e.g. mfra written on close) are not needed for playback of segments
+
+        del self.buffer[:offset]
+
+    def get_decode_time(self, moof):
+        decode_times = get_fragment_decode_times(moof)
+        if self.video_track is None or self.video_track[0] not in decode_times:
+            return None
+        track_id, timescale = self.video_track
+        return decode_times[track_id] / timescale
+
+
+# segments and bookmarks of one camera, kept in memory and appended to JSON lines file so they survive restarts
+class SegmentIndex(object):
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.entries = []
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path) as index_file:
+            for line in index_file:
+                try:
+                    self.entries.append(json.loads(line))
+                except ValueError:
+                    # last line can be incomplete after power loss
+                    logging.warning(f"Skipped broken line in segment index {self.index_path}.")
+
+    def add(self, entry):
+        with self.lock:
+            self.entries.append(entry)
+            with open(self.index_path, 'a') as index_file:
+                index_file.write(json.dumps(entry) + '\n')
+        return entry
+
+    def get_entries(self, entry_type):
+        with self.lock:
+            return [entry for entry in self.entries if entry['type'] == entry_type]
+
+    # removes entries and rewrites index file
+    def remove(self, entries):
+        with self.lock:
+            self.entries = [entry for entry in self.entries if entry not in entries]
+            temporary_path = self.index_path + '.tmp'
+            with open(temporary_path, 'w') as index_file:
+                index_file.writelines(json.dumps(entry) + '\n' for entry in self.entries)
+            os.replace(temporary_path, self.index_path)
+
+
+# returns segments overlapping time range, segments of different recordings can not be joined so only first recording is used
+def get_segments(segment_index, start_time, end_time):
+    segments = [segment for segment in segment_index.get_entries(SEGMENT_ENTRY)
+                if segment['end_time'] > start_time and segment['start_time'] < end_time]
+    return [segment for segment in segments if segment['init'] == segments[0]['init']] if segments else []
+
+
+# writes init segment followed by segments of time range into MP4 file, nothing is decoded or encoded
+def extract_clip(directory, start_time, end_time, output_path, segment_index=None):
+    segment_index = segment_index if segment_index is not None else SegmentIndex(os.path.join(directory, INDEX_FILE_NAME))
+    segments = get_segments(segment_index, start_time, end_time)
+    if not segments:
+        logging.error(f"Error! No segments were recorded between {start_time} and {end_time}.")
+        return None
+
+    try:
+        with open(output_path, 'wb') as clip_file:
+            for file_name in [segments[0]['init']] + [segment['file'] for segment in segments]:
+                with open(os.path.join(directory, file_name), 'rb') as segment_file:
+                    shutil.copyfileobj(segment_file, clip_file)
+    except OSError as e:
+        logging.error(f"Error! Can not extract clip {output_path}: {e}")
+        return None
+    return output_path
+
+
+# records camera continuously into fragmented MP4 segments, motion events are stored as bookmarks (time ranges)
+# live stream (optional) gets the same fragments, so live viewers need no second encoder
+class SegmentRecorder(object):
+    def __init__(self, directory, frame_width, frame_height, fps, segment_duration=DEFAULT_SEGMENT_DURATION, retention_time=DEFAULT_RETENTION_TIME, live_stream=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_duration = segment_duration
+        self.retention_time = retention_time
+        self.live_stream = live_stream
+        self.index = SegmentIndex(os.path.join(directory, INDEX_FILE_NAME))
+
+        # one init segment per recording, all its segments continue the same timeline
+        self.recording_id = datetime.now().strftime(RECORDING_ID_FORMAT)
+        self.init_segment_name = f'{INIT_SEGMENT_PREFIX}{self.recording_id}{INIT_SEGMENT_EXTENSION}'
+        self.segment_file, self.segment_name = None, None
+        self.segment_start_time, self.segment_size = None, 0
+        self.number_of_segments = 0
+        self.last_frame_time, self.last_segment_end_time = None, None
+        self.last_prune_time = 0.0
+        self.is_released = False
+        self.segment_condition = threading.Condition()  # notifies waiting events when segment is closed
+
+        self.start_time = time.time()
+        self.splitter = FragmentSplitter(self._save_init_segment, self._add_fragment)
+        self.muxer = StreamingVideoMuxer(
+            self.splitter, frame_width, frame_height, fps, metadata_wait_time=0, start_time=self.start_time,
+            container_format=CONTAINER_FORMAT, container_options=FRAGMENTED_MP4_OPTIONS,
+            keyframe_interval=max(1, int(round(fps * KEYFRAME_INTERVAL_SECONDS)))
+        )
+
+    # has to be called before first frame is written
+    def add_audio_stream(self, sample_rate, number_of_channels):
+        return self.muxer.add_audio_stream(sample_rate, number_of_channels)
+
+    def write(self, frame, timestamp=None):
+        self.last_frame_time = time.time() if timestamp is None else timestamp
+        self.muxer.write(frame, self.last_frame_time)
+
+    # sound sink of AudioCaptureDevice
+    def write_audio(self, sound_frame, timestamp=None):
+        self.muxer.write_audio(sound_frame, timestamp)
+
+    def _save_init_segment(self, init_segment):
+        with open(os.path.join(self.directory, self.init_segment_name), 'wb') as init_file:
+            init_file.write(init_segment)
+        if self.live_stream is not None:
+            self.live_stream.set_init_segment(init_segment)
+
+    # called by splitter for every moof+mdat, segment is closed at first fragment after segment duration
+    def _add_fragment(self, fragment, decode_time):
+        fragment_time = self.start_time + decode_time if decode_time is not None else self.last_frame_time
+
+        if self.segment_file is None or fragment_time - self.segment_start_time >= self.segment_duration:
+            self._close_segment(fragment_time)
+            self._open_segment(fragment_time)
+
+        self.segment_file.write(fragment)
+        self.segment_size += len(fragment)
+        if self.live_stream is not None:
+            self.live_stream.add_fragment(fragment, decode_time)
+
+    def _open_segment(self, start_time):
+        self.segment_name = f'segment_{self.recording_id}_{self.number_of_segments:06d}{SEGMENT_EXTENSION}'
+        self.segment_file = open(os.path.join(self.directory, self.segment_name), 'wb')
+        self.segment_start_time, self.segment_size = start_time, 0
+        self.number_of_segments += 1
+
+        if start_time - self.last_prune_time > PRUNE_INTERVAL:
+            self.last_prune_time = start_time
+            self.prune_old_segments(start_time)
+
+    def _close_segment(self, end_time):
+        if self.segment_file is None:
+            return
+        self.segment_file.close()
+        self.segment_file = None
+        self.index.add({
+            'type': SEGMENT_ENTRY,
+            'init': self.init_segment_name,
+            'file': self.segment_name,
+            'start_time': self.segment_start_time,
+            'end_time': end_time,
+            'size': self.segment_size
+        })
+        with self.segment_condition:
+            self.last_segment_end_time = end_time
+            self.segment_condition.notify_all()
+
+    # stores time range of motion event, clip is extracted from segments when needed
+    def add_bookmark(self, start_time, end_time, metadata=None):
+        return self.index.add({'type': BOOKMARK_ENTRY, 'start_time': start_time, 'end_time': end_time, 'metadata': metadata})
+
+    # waits until segments up to end time are closed, returns False on timeout
+    def wait_for_segments(self, end_time, timeout):
+        deadline = time.time() + timeout
+        with self.segment_condition:
+            while not self.is_released and (self.last_segment_end_time is None or self.last_segment_end_time < end_time):
+                remaining_time = deadline - time.time()
+                if remaining_time <= 0:
+                    return False
+                self.segment_condition.wait(remaining_time)
+        return True
+
+    def extract_clip(self, start_time, end_time, output_path):
+        return extract_clip(self.directory, start_time, end_time, output_path, self.index)
+
+    # deletes segments and bookmarks older than retention time and init segments no longer used
+    def prune_old_segments(self, current_time=None):
+        cutoff_time = (time.time() if current_time is None else current_time) - self.retention_time
+        old_entries = [entry for entry in self.index.get_entries(SEGMENT_ENTRY) + self.index.get_entries(BOOKMARK_ENTRY)
+                       if entry['end_time'] < cutoff_time]
+        if not old_entries:
+            return
+
+        for entry in old_entries:
+            if entry['type'] == SEGMENT_ENTRY:
+                try:
+                    os.remove(os.path.join(self.directory, entry['file']))
+                except OSError as e:
+                    logging.warning(f"Error! Segment {entry['file']} not found for deletion: {e}")
+        self.index.remove(old_entries)
+
+        used_init_segments = {segment['init'] for segment in self.index.get_entries(SEGMENT_ENTRY)} | {self.init_segment_name}
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith(INIT_SEGMENT_PREFIX) and file_name not in used_init_segments:
+                os.remove(os.path.join(self.directory, file_name))
+        logging.info(f"Deleted {len(old_entries)} old segments and bookmarks from {self.directory}.")
+
+    # writes last fragments and closes last segment
+    def release(self):
+        try:
+            self.muxer.release()
+        finally:
+            self._close_segment(self.last_frame_time if self.last_frame_time is not None else time.time())
+            with self.segment_condition:
+                self.is_released = True
+                self.segment_condition.notify_all()
+
+    def get_statistics(self):
+        segments = self.index.get_entries(SEGMENT_ENTRY)
+        return {
+            'segments': len(segments),
+            'bytes': sum(segment['size'] for segment in segments),
+            'bookmarks': len(self.index.get_entries(BOOKMARK_ENTRY))
+        }
+
+# References:
+# https://www.w3.org/TR/mse-byte-stream-format-isobmff/
+# https://ffmpeg.org/ffmpeg-formats.html#Fragmentation
+# https://pyav.basswood-io.com/docs/stable/api/_globals.html#av.open
+# https://developer.apple.com/documentation/http-live-streaming/about-the-common-media-application-format-with-http-live-streaming-hls
+# https://docs.python.org/3/library/io.html#io.RawIOBase
+# https://docs.python.org/3/library/threading.html#condition-objects
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -0,0 +1,184 @@
+import multiprocessing
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+DEFAULT_NUMBER_OF_SLOTS = 8  # frames that can be held at the same time
+DEFAULT_FRAME_HEIGHT = 360
+DEFAULT_FRAME_WIDTH = 640
+DEFAULT_NUMBER_OF_CHANNELS = 3
+SLOT_EMPTY = -1  # sequence value of a slot that holds no frame
+SLOT_BEING_WRITTEN = -2  # sequence value of a slot while a frame is copied into it
+
+# header columns, one row per slot
+SEQUENCE_COLUMN = 0
+REFERENCE_COUNT_COLUMN = 1
+TIMESTAMP_COLUMN = 2
+NUMBER_OF_HEADER_COLUMNS = 3
+HEADER_ITEM_SIZE = np.dtype(np.float64).itemsize
+
+
+# fixed pool of frame slots in shared memory, every slot has a sequence number and a reference count
+# frames are read in place through numpy views, so stages in other processes do not copy or re-encode them
+class SharedFrameBus(object):
+    def __init__(self, number_of_slots=DEFAULT_NUMBER_OF_SLOTS, frame_height=DEFAULT_FRAME_HEIGHT, frame_width=DEFAULT_FRAME_WIDTH,
+                 number_of_channels=DEFAULT_NUMBER_OF_CHANNELS, name=None, lock=None, owner_pid=None):
+        self.number_of_slots = number_of_slots
+        self.frame_shape = (frame_height, frame_width, number_of_channels)
+
+        header_size = number_of_slots * NUMBER_OF_HEADER_COLUMNS * HEADER_ITEM_SIZE
+        frames_size = number_of_slots * int(np.prod(self.frame_shape))
+
+        # creates new block, or attaches to block created by another process
+        self.is_owner = name is None
+        if self.is_owner:
+            self.shared_memory = shared_memory.SharedMemory(create=True, size=header_size + frames_size)
+            self.owner_pid = os.getpid()
+        else:
+            self.shared_memory = shared_memory.SharedMemory(name=name)
+            self.owner_pid = owner_pid
+            # block is owned and unlinked by the creating process
+            if owner_pid != os.getpid():
+                resource_tracker.unregister(self.shared_memory._name, 'shared_memory')
+
+        # header is float64 so timestamps fit, sequences and counts stay exact up to 2**53
+        self.header = np.ndarray((number_of_slots, NUMBER_OF_HEADER_COLUMNS), dtype=np.float64, buffer=self.shared_memory.buf)
+        self.frames = np.ndarray((number_of_slots,) + self.frame_shape, dtype=np.uint8, buffer=self.shared_memory.buf, offset=header_size)
+
+        # lock protects header only, frames are never copied while holding it (spawn lock can be passed to spawned workers)
+        self.lock = lock if lock is not None else multiprocessing.get_context('spawn').Lock()
+        self.next_sequence = 0  # frames are published by one process (the camera), others only retain and read
+        self.dropped_frames = 0
+
+        if self.is_owner:
+            self.header[:, SEQUENCE_COLUMN] = SLOT_EMPTY
+            self.header[:, REFERENCE_COUNT_COLUMN] = 0
+            self.header[:, TIMESTAMP_COLUMN] = 0.0
+
+    @property
+    def name(self):
+        return self.shared_memory.name
+
+    # attaches to bus created by another process
+    @classmethod
+    def attach(cls, name, number_of_slots=DEFAULT_NUMBER_OF_SLOTS, frame_height=DEFAULT_FRAME_HEIGHT, frame_width=DEFAULT_FRAME_WIDTH,
+               number_of_channels=DEFAULT_NUMBER_OF_CHANNELS, lock=None):
+        return cls(number_of_slots, frame_height, frame_width, number_of_channels, name=name, lock=lock)
+
+    # bus can be passed to spawned processes, they attach to the same block and share the lock
+    def __getstate__(self):
+        return {
+            'name': self.name,
+            'number_of_slots': self.number_of_slots,
+            'frame_shape': self.frame_shape,
+            'lock': self.lock,
+            'owner_pid': self.owner_pid
+        }
+
+    def __setstate__(self, state):
+        frame_height, frame_width, number_of_channels = state['frame_shape']
+        self.__init__(state['number_of_slots'], frame_height, frame_width, number_of_channels, name=state['name'], lock=state['lock'], owner_pid=state['owner_pid'])
+
+    # copies frame into a free slot and returns its sequence number, returns None if all slots are retained
+    def publish(self, frame, timestamp=None):
+        with self.lock:
+            slot_index = self._find_free_slot()
+            if slot_index is None:
+                self.dropped_frames += 1
+                return None
+            sequence = self.next_sequence
+            self.next_sequence += 1
+            self.header[slot_index, SEQUENCE_COLUMN] = SLOT_BEING_WRITTEN
+
+        np.copyto(self.frames[slot_index], frame)
+
+        with self.lock:
+            self.header[slot_index, TIMESTAMP_COLUMN] = timestamp if timestamp is not None else time.time()
+            self.header[slot_index, SEQUENCE_COLUMN] = sequence
+        return sequence
+
+    # returns oldest slot nobody holds a reference to
+    def _find_free_slot(self):
+        free_slot_index, oldest_sequence = None, None
+        for slot_index in range(self.number_of_slots):
+            slot_sequence = self.header[slot_index, SEQUENCE_COLUMN]
+            if self.header[slot_index, REFERENCE_COUNT_COLUMN] > 0 or slot_sequence == SLOT_BEING_WRITTEN:
+                continue
+            if oldest_sequence is None or slot_sequence < oldest_sequence:
+                free_slot_index, oldest_sequence = slot_index, slot_sequence
+        return free_slot_index
+
+    def _find_slot(self, sequence):
+        slot_indexes = np.flatnonzero(self.header[:, SEQUENCE_COLUMN] == sequence)
+        return int(slot_indexes[0]) if len(slot_indexes) else None
+
+    # increments reference count so frame is not overwritten, returns False if frame is gone
+    def retain(self, sequence):
+        with self.lock:
+            slot_index = self._find_slot(sequence)
+            if slot_index is None:
+                return False
+            self.header[slot_index, REFERENCE_COUNT_COLUMN] += 1
+            return True
+
+    # publishes frame and keeps one reference for the caller
+    def publish_and_retain(self, frame, timestamp=None):
+        sequence = self.publish(frame, timestamp)
+        if sequence is not None and not self.retain(sequence):
+            return None
+        return sequence
+
+    # decrements reference count, slot can be reused when it reaches 0
+    def release(self, sequence):
+        with self.lock:
+            slot_index = self._find_slot(sequence)
+            if slot_index is not None and self.header[slot_index, REFERENCE_COUNT_COLUMN] > 0:
+                self.header[slot_index, REFERENCE_COUNT_COLUMN] -= 1
+
+    # returns read only view on retained frame (no copy), None if frame is gone
+    def view(self, sequence):
+        slot_index = self._find_slot(sequence)
+        if slot_index is None:
+            return None
+        frame_view = self.frames[slot_index].view()
+        frame_view.flags.writeable = False
+        return frame_view
+
+    def get_reference_count(self, sequence):
+        slot_index = self._find_slot(sequence)
+        return 0 if slot_index is None else int(self.header[slot_index, REFERENCE_COUNT_COLUMN])
+
+    def get_frame_timestamp(self, sequence):
+        slot_index = self._find_slot(sequence)
+        return None if slot_index is None else float(self.header[slot_index, TIMESTAMP_COLUMN])
+
+    # detaches from shared memory, owner also removes the block
+    def close(self):
+        # numpy views have to be dropped before shared memory can be closed
+        self.header, self.frames = None, None
+        try:
+            self.shared_memory.close()
+        except BufferError:
+            # a frame view is still used somewhere, memory is freed when it is garbage collected
+            pass
+        if self.is_owner:
+            try:
+                self.shared_memory.unlink()
+            except FileNotFoundError:
+                pass
+
+# References:
+# https://docs.python.org/3/library/multiprocessing.shared_memory.html
+# https://docs.python.org/3/library/multiprocessing.html#synchronization-between-processes
+# https://docs.python.org/3/library/pickle.html#handling-stateful-objects
+# https://bugs.python.org/issue38119
+# https://numpy.org/doc/stable/reference/generated/numpy.ndarray.flags.html
+# https://en.wikipedia.org/wiki/Reference_counting
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -0,0 +1,177 @@
+import json
+import logging
+import threading
+import time
+from fractions import Fraction
+import cv2
+import numpy as np
+
+try:
+    import av  # PyAV, bindings to FFmpeg libraries
+except ImportError:
+    av = None
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+VIDEO_CODEC = 'libx264'
+AUDIO_CODEC = 'aac'
+PIXEL_FORMAT = 'yuv420p'
+VIDEO_ENCODER_OPTIONS = {'preset': 'veryfast', 'tune': 'zerolatency'}  # encoding keeps up with capture on one core
+AUDIO_BIT_RATE = 128000
+METADATA_TAG = 'comment'  # same tag as embed_metadata_on_video, so saved videos look the same
+METADATA_WAIT_TIME = 2.0  # seconds packets are held back so metadata of first motion event goes into the header
+MAX_HELD_PACKETS = 300  # header is written when this many packets wait for metadata
+AUDIO_LAYOUTS = {1: 'mono', 2: 'stereo'}
+
+
+# PyAV is optional, without it recordings are merged by ffmpeg after recording
+def is_muxer_available():
+    return av is not None
+
+
+# encodes H.264 video and AAC audio into final MP4 while recording, metadata is written into the header
+# replaces cv2.VideoWriter + WAV file + ffmpeg merge + ffmpeg metadata pass
+class StreamingVideoMuxer(object):
+    # start time is capture time of first frame, it is earlier than now when pre-roll frames are written
+    # output can be file path or writable file object (container format is needed then, e.g. 'mp4')
+    def __init__(self, output_path, frame_width, frame_height, fps, metadata_wait_time=METADATA_WAIT_TIME, start_time=None,
+                 container_format=None, container_options=None, keyframe_interval=None):
+        self.output_path = output_path
+        self.frame_size = (frame_width, frame_height)
+        self.fps = fps
+        self.metadata_wait_time = metadata_wait_time
+
+        self.container = av.open(output_path, mode='w', format=container_format, options=container_options or {})
+        self.video_stream = self.container.add_stream(VIDEO_CODEC, rate=Fraction(fps).limit_denominator(1001), options=VIDEO_ENCODER_OPTIONS)
+        self.video_stream.width, self.video_stream.height = frame_width, frame_height
+        self.video_stream.pix_fmt = PIXEL_FORMAT
+        if keyframe_interval is not None:
+            # fragmented MP4 starts new fragment at every keyframe
+            self.video_stream.gop_size = keyframe_interval
+        self.audio_stream = None
+        self.audio_layout, self.number_of_channels, self.number_of_audio_samples = None, 0, 0
+        self.is_audio_started = False
+
+        # recording and sound threads write at the same time
+        self.lock = threading.Lock()
+        self.created_time = time.time()
+        self.start_time = self.created_time if start_time is None else start_time
+        self.last_video_pts = -1
+
+        # packets are held until metadata is known or waiting time is over, header can not be changed later
+        self.held_packets = []
+        self.is_header_written = False
+        self.metadata = None
+
+    # adds AAC stream, returns False if header was already written
+    def add_audio_stream(self, sample_rate, number_of_channels):
+        with self.lock:
+            if self.is_header_written or self.container is None:
+                return False
+            # devices with more channels are recorded as stereo
+            self.number_of_channels = number_of_channels
+            self.audio_layout = AUDIO_LAYOUTS.get(min(number_of_channels, 2))
+            self.audio_stream = self.container.add_stream(AUDIO_CODEC, rate=sample_rate)
+            self.audio_stream.layout = self.audio_layout
+            self.audio_stream.bit_rate = AUDIO_BIT_RATE
+            # sound starts when recording starts, after pre-roll frames
+            self.number_of_audio_samples = max(0, int(round((time.time() - self.start_time) * sample_rate)))
+            return True
+
+    # encodes BGR frame, timestamp is capture time (clock if None) so video stays in sync with audio when frames are dropped
+    def write(self, frame, timestamp=None):
+        with self.lock:
+            if self.container is None:
+                return
+            if (frame.shape[1], frame.shape[0]) != self.frame_size:
+                frame = cv2.resize(frame, self.frame_size)
+
+            timestamp = time.time() if timestamp is None else timestamp
+            pts = max(int(round((timestamp - self.start_time) * self.fps)), self.last_video_pts + 1)
+            self.last_video_pts = pts
+            video_frame = av.VideoFrame.from_ndarray(np.ascontiguousarray(frame), format='bgr24')
+            video_frame.pts = pts
+            self._mux(self.video_stream.encode(video_frame))
+
+    # encodes chunk of interleaved 16 bit samples read from PyAudio, timestamp is capture time of first sample
+    def write_audio(self, sound_frame, timestamp=None):
+        with self.lock:
+            if self.container is None or self.audio_stream is None:
+                return
+            samples = np.frombuffer(sound_frame, dtype=np.int16).reshape(-1, self.number_of_channels)
+            samples = samples[:, :min(self.number_of_channels, 2)]
+
+            # first chunk places sound on video timeline, following chunks are contiguous
+            if not self.is_audio_started and timestamp is not None:
+                audio_offset = int(round((timestamp - self.start_time) * self.audio_stream.rate))
+                # sound captured before first video frame is dropped
+                samples = samples[max(0, -audio_offset):]
+                if samples.shape[0] == 0:
+                    return
+                self.number_of_audio_samples = max(0, audio_offset)
+            self.is_audio_started = True
+
+            audio_frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1), format='s16', layout=self.audio_layout)
+            audio_frame.sample_rate = self.audio_stream.rate
+            audio_frame.pts = self.number_of_audio_samples
+            audio_frame.time_base = Fraction(1, self.audio_stream.rate)
+            self.number_of_audio_samples += samples.shape[0]
+            self._mux(self.audio_stream.encode(audio_frame))
+
+    # stores metadata (JSON comment), returns False if header was already written without it
+    def set_metadata(self, metadata):
+        with self.lock:
+            if self.is_header_written or self.container is None:
+                return False
+            self.metadata = metadata
+            self._write_header()
+            return True
+
+    def _mux(self, packets):
+        if self.is_header_written:
+            self.container.mux(packets)
+            return
+
+        self.held_packets.extend(packets)
+        if time.time() - self.created_time > self.metadata_wait_time or len(self.held_packets) > MAX_HELD_PACKETS:
+            self._write_header()
+
+    # header is written by first mux call, metadata has to be set before it
+    def _write_header(self):
+        if self.metadata is not None:
+            self.container.metadata[METADATA_TAG] = json.dumps(self.metadata)
+        self.is_header_written = True
+        held_packets, self.held_packets = self.held_packets, []
+        self.container.mux(held_packets)
+
+    # flushes encoders and closes file, returns path of finished video
+    def release(self):
+        with self.lock:
+            if self.container is None:
+                return self.output_path
+            try:
+                packets = list(self.video_stream.encode(None))
+                if self.audio_stream is not None:
+                    packets.extend(self.audio_stream.encode(None))
+                self._mux(packets)
+                if not self.is_header_written:
+                    self._write_header()
+            finally:
+                self.container.close()
+                self.container = None
+        logging.info(f"Video {self.output_path} was written (metadata: {self.metadata}).")
+        return self.output_path
+
+# References:
+# https://pyav.basswood-io.com/docs/stable/cookbook/numpy.html
+# https://pyav.basswood-io.com/docs/stable/api/container.html
+# https://pyav.basswood-io.com/docs/stable/api/audio.html
+# https://trac.ffmpeg.org/wiki/Encode/H.264
+# https://trac.ffmpeg.org/wiki/Encode/AAC
+# https://ffmpeg.org/doxygen/trunk/group__lavf__encoding.html
+# https://github.com/PyAV-Org/PyAV/blob/main/examples/numpy/generate_video.py
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
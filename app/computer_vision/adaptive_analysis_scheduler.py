@@ -0,0 +1,131 @@
+import time
+import cv2
+import numpy as np
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# scheduler states
+IDLE_STATE = 'idle'  # cheap low resolution check at reduced rate, no motion masks
+SUSPECTED_STATE = 'suspected'  # full rate and resolution, recording and object detection wait for confirmation
+ACTIVE_STATE = 'active'  # full pipeline including recording and object detection
+
+# constants
+DEFAULT_IDLE_ANALYSIS_FPS = 5.0  # frames per second checked while scene is idle
+DEFAULT_IDLE_ANALYSIS_SCALE = 0.25  # idle check runs on 160x90 instead of 640x360
+DEFAULT_PROBE_CHANGE_RATIO = 0.002  # share of changed pixels in idle check that makes motion suspected
+DEFAULT_CONFIRMATION_FRAMES = 2  # full analyses with motion needed to go from suspected to active
+DEFAULT_SUSPICION_TIMEOUT = 1.0  # seconds suspected state waits for confirmation before going back to idle
+DEFAULT_COOL_DOWN_TIME = 5.0  # seconds without motion before active state goes back to idle
+PROBE_PIXEL_THRESHOLD = 25  # gray level difference of a changed pixel
+PROBE_BLUR_KERNEL_SIZE = (5, 5)  # small kernel, 21x21 of full analysis would remove everything at 1/4 resolution
+
+
+# decides per frame how much analysis a camera spends, with hysteresis between idle and active scene
+class AdaptiveAnalysisScheduler(object):
+    def __init__(self, idle_analysis_fps=DEFAULT_IDLE_ANALYSIS_FPS, idle_analysis_scale=DEFAULT_IDLE_ANALYSIS_SCALE,
+                 probe_change_ratio=DEFAULT_PROBE_CHANGE_RATIO, confirmation_frames=DEFAULT_CONFIRMATION_FRAMES,
+                 suspicion_timeout=DEFAULT_SUSPICION_TIMEOUT, cool_down_time=DEFAULT_COOL_DOWN_TIME):
+        self.idle_analysis_interval = 1.0 / idle_analysis_fps if idle_analysis_fps > 0 else 0.0
+        self.idle_analysis_scale = idle_analysis_scale
+        self.probe_change_ratio = probe_change_ratio
+        self.confirmation_frames = confirmation_frames
+        self.suspicion_timeout = suspicion_timeout
+        self.cool_down_time = cool_down_time
+
+        self.state = IDLE_STATE
+        self.state_changed_time = time.time()
+        self.last_probe_time, self.last_motion_time = None, 0.0
+        self.previous_probe_frame = None
+        self.confirmed_frames = 0
+
+        self.skipped_frames, self.probed_frames, self.analysed_frames = 0, 0, 0
+
+    def is_idle(self):
+        return self.state == IDLE_STATE
+
+    # recording and object detection run only when motion was confirmed
+    def is_active(self):
+        return self.state == ACTIVE_STATE
+
+    def _change_state(self, state, current_time):
+        self.state = state
+        self.state_changed_time = current_time
+        self.confirmed_frames = 0
+        if state == IDLE_STATE:
+            # idle check starts again from a fresh frame
+            self.previous_probe_frame = None
+
+    # returns True if frame needs full analysis, idle frames are skipped or only checked at low resolution
+    def should_analyse_frame(self, frame, current_time=None):
+        current_time = time.time() if current_time is None else current_time
+
+        if self.state != IDLE_STATE:
+            self.analysed_frames += 1
+            return True
+
+        # reduced rate while scene is idle
+        if self.last_probe_time is not None and current_time - self.last_probe_time < self.idle_analysis_interval:
+            self.skipped_frames += 1
+            return False
+        self.last_probe_time = current_time
+        self.probed_frames += 1
+
+        if self._probe_for_motion(frame):
+            self._change_state(SUSPECTED_STATE, current_time)
+            self.analysed_frames += 1
+            return True
+        return False
+
+    # compares downscaled gray frame with previous one, True if enough pixels changed
+    def _probe_for_motion(self, frame):
+        probe_frame = cv2.resize(frame, None, fx=self.idle_analysis_scale, fy=self.idle_analysis_scale, interpolation=cv2.INTER_AREA)
+        if probe_frame.ndim == 3:
+            probe_frame = cv2.cvtColor(probe_frame, cv2.COLOR_BGR2GRAY)
+        probe_frame = cv2.GaussianBlur(probe_frame, PROBE_BLUR_KERNEL_SIZE, 0)
+
+        previous_probe_frame, self.previous_probe_frame = self.previous_probe_frame, probe_frame
+        if previous_probe_frame is None or previous_probe_frame.shape != probe_frame.shape:
+            return False
+
+        changed_pixels = np.count_nonzero(cv2.absdiff(probe_frame, previous_probe_frame) > PROBE_PIXEL_THRESHOLD)
+        return changed_pixels > self.probe_change_ratio * probe_frame.size
+
+    # updates state with result of full analysis
+    def report_motion(self, motion_detected, current_time=None):
+        current_time = time.time() if current_time is None else current_time
+
+        if motion_detected:
+            self.last_motion_time = current_time
+
+        if self.state == SUSPECTED_STATE:
+            if motion_detected:
+                self.confirmed_frames += 1
+                if self.confirmed_frames >= self.confirmation_frames:
+                    self._change_state(ACTIVE_STATE, current_time)
+            elif current_time - self.state_changed_time > self.suspicion_timeout:
+                # false alarm (noise, light change)
+                self._change_state(IDLE_STATE, current_time)
+
+        elif self.state == ACTIVE_STATE and not motion_detected:
+            # active state is kept for cool down time so short pauses do not stop recording and detection
+            if current_time - self.last_motion_time > self.cool_down_time:
+                self._change_state(IDLE_STATE, current_time)
+
+    def get_statistics(self):
+        return {
+            'state': self.state,
+            'skipped_frames': self.skipped_frames,
+            'probed_frames': self.probed_frames,
+            'analysed_frames': self.analysed_frames
+        }
+
+# References:
+# https://en.wikipedia.org/wiki/Hysteresis
+# https://en.wikipedia.org/wiki/Finite-state_machine
+# https://docs.opencv.org/4.x/da/d54/group__imgproc__transform.html#ga47a974309e9102f5f08231edc7e7529d
+# https://docs.opencv.org/4.x/d2/de8/group__core__array.html#ga6fef31bc8c4071cbc114a758a2b79c14
+# https://pyimagesearch.com/2015/05/25/basic-motion-detection-and-tracking-with-python-and-opencv/
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
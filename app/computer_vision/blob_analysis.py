@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+CONNECTIVITY = 8  # diagonal pixels belong to the same blob, same as external contours
+BACKGROUND_LABEL = 0
+
+
+# connected regions of a binary motion mask, every property is an array with one row per blob
+class MotionBlobs(object):
+    def __init__(self, boxes, areas, centroids, frame_size):
+        self.boxes = boxes  # (x, y, w, h) as int32
+        self.areas = areas  # number of pixels as float64
+        self.centroids = centroids  # (x, y) as float64
+        self.frame_size = frame_size  # (width, height) of the coordinates above
+
+    def __len__(self):
+        return len(self.areas)
+
+    # returns (x, y, w, h, area) of largest blob, None if there are no blobs
+    def get_biggest_blob(self):
+        if len(self) == 0:
+            return None
+        index = int(np.argmax(self.areas))
+        x, y, w, h = (int(value) for value in self.boxes[index])
+        return x, y, w, h, float(self.areas[index])
+
+    # list of (x, y, w, h) tuples, format of motion regions
+    def get_regions(self):
+        return [tuple(int(value) for value in box) for box in self.boxes]
+
+    # blobs in coordinates of frame with given (width, height)
+    def scale_to(self, frame_size):
+        if tuple(frame_size) == tuple(self.frame_size):
+            return self
+        x_scale, y_scale = frame_size[0] / self.frame_size[0], frame_size[1] / self.frame_size[1]
+        boxes = np.rint(self.boxes * np.array([x_scale, y_scale, x_scale, y_scale])).astype(np.int32)
+        return MotionBlobs(boxes, self.areas * (x_scale * y_scale), self.centroids * np.array([x_scale, y_scale]), tuple(frame_size))
+
+
+# finds all blobs of binary mask in one pass, blobs smaller than min_area pixels are dropped
+def find_motion_blobs(binary_mask, min_area=0):
+    _, _, stats, centroids = cv2.connectedComponentsWithStats(binary_mask, connectivity=CONNECTIVITY, ltype=cv2.CV_32S)
+
+    # first label is background, filtering is done on whole stats array at once
+    stats, centroids = stats[BACKGROUND_LABEL + 1:], centroids[BACKGROUND_LABEL + 1:]
+    areas = stats[:, cv2.CC_STAT_AREA].astype(np.float64)
+    keep = areas >= min_area
+    boxes = stats[keep][:, [cv2.CC_STAT_LEFT, cv2.CC_STAT_TOP, cv2.CC_STAT_WIDTH, cv2.CC_STAT_HEIGHT]]
+    return MotionBlobs(boxes, areas[keep], centroids[keep], (binary_mask.shape[1], binary_mask.shape[0]))
+
+# References:
+# https://docs.opencv.org/4.x/d3/dc0/group__imgproc__shape.html#ga107a78bf7cd25dec05fb4dfc5c9e765f
+# https://pyimagesearch.com/2021/02/22/opencv-connected-component-labeling-and-analysis/
+# https://en.wikipedia.org/wiki/Connected-component_labeling
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -0,0 +1,68 @@
+import logging
+import cv2
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+JPEG_FORMAT = '.jpg'
+CHROMA_SUBSAMPLING = {
+    '4:2:0': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,  # colour at quarter resolution, smallest files
+    '4:2:2': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_422,
+    '4:4:4': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_444  # full colour resolution, used for archived images
+}
+
+
+# how frames are encoded for one kind of consumer, frame size None keeps captured size, max fps None sends every frame
+class EncodeProfile(object):
+    def __init__(self, name, jpeg_quality, frame_size=None, chroma_subsampling='4:2:0', max_fps=None):
+        self.name = name
+        self.jpeg_quality = jpeg_quality
+        self.frame_size = frame_size  # (width, height)
+        self.chroma_subsampling = chroma_subsampling
+        self.max_fps = max_fps
+        self.encode_parameters = [
+            cv2.IMWRITE_JPEG_QUALITY, jpeg_quality,
+            cv2.IMWRITE_JPEG_SAMPLING_FACTOR, CHROMA_SUBSAMPLING[chroma_subsampling]
+        ]
+
+    # checks if enough time passed since last frame of this profile was sent
+    def is_frame_due(self, last_frame_time, current_time):
+        if self.max_fps is None or last_frame_time is None:
+            return True
+        return current_time - last_frame_time >= 1.0 / self.max_fps
+
+    # returns frame as jpeg bytes, None if encoding failed
+    def encode(self, frame):
+        try:
+            if self.frame_size is not None and (frame.shape[1], frame.shape[0]) != self.frame_size:
+                # area interpolation avoids aliasing when frame is made smaller
+                frame = cv2.resize(frame, self.frame_size, interpolation=cv2.INTER_AREA)
+            ret, jpeg = cv2.imencode(JPEG_FORMAT, frame, self.encode_parameters)
+        except Exception as e:
+            logging.error(f"Error! Frame was not encoded with {self.name} profile: {e}")
+            return None
+        if not ret:
+            logging.error(f"Error! Frame was not encoded with {self.name} profile.")
+            return None
+        return jpeg.tobytes()
+
+
+# profiles selectable by viewers of live feed, archive is used for saved motion images
+ENCODE_PROFILES = {
+    'thumbnail': EncodeProfile('thumbnail', jpeg_quality=50, frame_size=(160, 90), chroma_subsampling='4:2:0', max_fps=2),
+    'mobile': EncodeProfile('mobile', jpeg_quality=60, frame_size=(426, 240), chroma_subsampling='4:2:0', max_fps=10),
+    'desktop': EncodeProfile('desktop', jpeg_quality=80, frame_size=(640, 360), chroma_subsampling='4:2:0'),
+    'archive': EncodeProfile('archive', jpeg_quality=95, chroma_subsampling='4:4:4')
+}
+DEFAULT_STREAM_PROFILE = 'desktop'
+ARCHIVE_PROFILE = 'archive'
+
+# References:
+# https://docs.opencv.org/4.x/d8/d6a/group__imgcodecs__flags.html
+# https://docs.opencv.org/4.x/d4/da8/group__imgcodecs.html#ga461f9ac09887e47797a54567df3b8b63
+# https://en.wikipedia.org/wiki/Chroma_subsampling
+# https://stackoverflow.com/questions/40768621/python-opencv-jpeg-compression-in-memory
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
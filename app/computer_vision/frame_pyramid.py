@@ -0,0 +1,134 @@
+import cv2
+import numpy as np
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+ANALYSIS_FRAME_SIZE = (640, 360)  # (width, height) of colour frame used for motion analysis and motion images
+MASK_LEVEL_SIZES = ((320, 180), (160, 90))  # downscaled grey levels for motion masks
+DETECTOR_INPUT_SIZE = 320  # SSD MobileNet input, frame is letterboxed so objects keep their proportions
+LETTERBOX_COLOR = (0, 0, 0)
+KERNEL_SIZE_GRAYSCALE_BLUR = (21, 21)  # same blur as process_initial_frame
+STD_DEV_GAUSSIAN_BLUR = 0
+MIN_BLUR_KERNEL_SIZE = 3
+
+
+# (width, height) of frame size scaled by factor
+def get_scaled_size(frame_size, scale):
+    return max(1, int(round(frame_size[0] * scale))), max(1, int(round(frame_size[1] * scale)))
+
+
+# scales frame to fit square of given size and pads the rest, returns image and (scale, x offset, y offset)
+def letterbox(frame, size=DETECTOR_INPUT_SIZE, color=LETTERBOX_COLOR):
+    frame_height, frame_width = frame.shape[:2]
+    scale = min(size / frame_width, size / frame_height)
+    resized_width, resized_height = max(1, int(round(frame_width * scale))), max(1, int(round(frame_height * scale)))
+    x_offset, y_offset = (size - resized_width) // 2, (size - resized_height) // 2
+
+    image = np.empty((size, size) + frame.shape[2:], dtype=frame.dtype)
+    image[:] = color if frame.ndim == 3 else color[0]
+    image[y_offset:y_offset + resized_height, x_offset:x_offset + resized_width] = cv2.resize(
+        frame, (resized_width, resized_height), interpolation=cv2.INTER_AREA
+    )
+    return image, (scale, x_offset, y_offset)
+
+
+# converts normalized [y_min, x_min, y_max, x_max] boxes of letterboxed image to normalized boxes of the frame
+def map_letterboxed_boxes_to_frame(boxes, letterbox_geometry, frame_width, frame_height, size=DETECTOR_INPUT_SIZE):
+    scale, x_offset, y_offset = letterbox_geometry
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    boxes_scale = np.array([size / (scale * frame_height), size / (scale * frame_width)] * 2, dtype=np.float32)
+    boxes_offset = np.array([y_offset / (scale * frame_height), x_offset / (scale * frame_width)] * 2, dtype=np.float32)
+    return np.clip(boxes * boxes_scale - boxes_offset, 0.0, 1.0)
+
+
+# converts (x, y, w, h) rectangles between frame sizes given as (width, height)
+def scale_regions(regions, source_size, target_size):
+    x_scale, y_scale = target_size[0] / source_size[0], target_size[1] / source_size[1]
+    return [
+        (int(round(x * x_scale)), int(round(y * y_scale)), int(round(w * x_scale)), int(round(h * y_scale)))
+        for x, y, w, h in regions
+    ]
+
+
+# resolutions of one captured frame, every level is computed on first use and then shared by all consumers
+class FramePyramid(object):
+    def __init__(self, native_frame, analysis_frame_size=ANALYSIS_FRAME_SIZE, mask_level_sizes=MASK_LEVEL_SIZES):
+        self.native_frame = native_frame  # as captured, used for recording, motion images and object detection
+        self.analysis_frame_size = analysis_frame_size
+        self.mask_level_sizes = mask_level_sizes
+
+        self.analysis_frame, self.gray_frame, self.blurred_gray_frame = None, None, None
+        self.mask_levels = [None] * len(mask_level_sizes)
+        self.blurred_mask_frames, self.mask_color_frames = {}, {}  # mask scale -> frame
+
+    def get_native_size(self):
+        return self.native_frame.shape[1], self.native_frame.shape[0]
+
+    def get_analysis_frame(self):
+        if self.analysis_frame is None:
+            if self.get_native_size() == tuple(self.analysis_frame_size):
+                self.analysis_frame = self.native_frame.copy()  # motion rectangle is drawn on it, native frame stays clean
+            else:
+                self.analysis_frame = cv2.resize(self.native_frame, self.analysis_frame_size, interpolation=cv2.INTER_AREA)
+        return self.analysis_frame
+
+    def get_gray_frame(self):
+        if self.gray_frame is None:
+            self.gray_frame = cv2.cvtColor(self.get_analysis_frame(), cv2.COLOR_BGR2GRAY)
+        return self.gray_frame
+
+    # grey analysis frame blurred the same way as process_initial_frame
+    def get_blurred_gray_frame(self):
+        if self.blurred_gray_frame is None:
+            self.blurred_gray_frame = cv2.GaussianBlur(self.get_gray_frame(), KERNEL_SIZE_GRAYSCALE_BLUR, STD_DEV_GAUSSIAN_BLUR)
+        return self.blurred_gray_frame
+
+    # level 0 is half of analysis size, every next level is made from the previous one
+    def get_mask_level(self, level):
+        if self.mask_levels[level] is None:
+            source = self.get_gray_frame() if level == 0 else self.get_mask_level(level - 1)
+            self.mask_levels[level] = cv2.resize(source, self.mask_level_sizes[level], interpolation=cv2.INTER_AREA)
+        return self.mask_levels[level]
+
+    # grey frame of given size, pyramid level is reused when size matches
+    def get_gray_frame_of_size(self, frame_size):
+        for level, level_size in enumerate(self.mask_level_sizes):
+            if tuple(level_size) == tuple(frame_size):
+                return self.get_mask_level(level)
+        return cv2.resize(self.get_gray_frame(), frame_size, interpolation=cv2.INTER_AREA)
+
+    # blurred grey frame for motion masks, scale is relative to analysis frame and blur kernel shrinks with the frame
+    def get_blurred_mask_frame(self, scale=1.0):
+        if scale >= 1.0:
+            return self.get_blurred_gray_frame()
+        if scale not in self.blurred_mask_frames:
+            kernel_size = max(MIN_BLUR_KERNEL_SIZE, int(round(KERNEL_SIZE_GRAYSCALE_BLUR[0] * scale)) | 1)
+            self.blurred_mask_frames[scale] = cv2.GaussianBlur(
+                self.get_gray_frame_of_size(get_scaled_size(self.analysis_frame_size, scale)), (kernel_size, kernel_size), STD_DEV_GAUSSIAN_BLUR
+            )
+        return self.blurred_mask_frames[scale]
+
+    # colour analysis frame at size of motion masks, used by McKenna method
+    def get_mask_color_frame(self, scale=1.0):
+        if scale >= 1.0:
+            return self.get_analysis_frame()
+        if scale not in self.mask_color_frames:
+            self.mask_color_frames[scale] = cv2.resize(
+                self.get_analysis_frame(), get_scaled_size(self.analysis_frame_size, scale), interpolation=cv2.INTER_AREA
+            )
+        return self.mask_color_frames[scale]
+
+    # converts (x, y, w, h) rectangles from analysis frame to native frame
+    def scale_regions_to_native(self, regions):
+        return scale_regions(regions, self.analysis_frame_size, self.get_native_size())
+
+# References:
+# https://docs.opencv.org/4.x/d4/d1f/tutorial_pyramids.html
+# https://docs.opencv.org/4.x/da/d54/group__imgproc__transform.html#ga47a974309e9102f5f08231edc7e7529d
+# https://github.com/ultralytics/yolov5/blob/master/utils/augmentations.py
+# https://github.com/tensorflow/models/blob/master/research/object_detection/configs/tf2/ssd_mobilenet_v2_320x320_coco17_tpu-8.config
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -0,0 +1,317 @@
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future, TimeoutError
+from multiprocessing import resource_tracker, shared_memory
+import cv2
+import numpy as np
+from app.algorithms_motion_detection.lukas_kanade_orb_method import GridLukasKanadeOrb, ORB_FEATURES
+from app.algorithms_motion_detection.mckenna_method import McKennaMethod
+from app.algorithms_motion_detection.three_frame_method import ThreeFrameDifferencer
+from app.computer_vision.motion_detection_processor import (
+    MGO2_MODE, LUCAS_KANADE_ORB_MODE, MCKENNA_MODE,
+    compute_mgo2_motion_mask, compute_lucas_kanade_orb_motion, compute_mckenna_motion_mask
+)
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+RESULT_TIMEOUT = 2.0  # seconds to wait for a worker process to return a mask
+ANALYSE_MESSAGE = 'analyse'
+REGISTER_MESSAGE = 'register'
+RELEASE_MESSAGE = 'release'
+STOP_MESSAGE = None
+NUMBER_OF_COLOR_CHANNELS = 3
+MASK_NAME = 'motion_mask'
+SHARED_MEMORY_RESOURCE_TYPE = 'shared_memory'
+
+# default settings used by workers to create background models of a camera
+DEFAULT_CAMERA_SETTINGS = {
+    'history': 400,
+    'var_threshold': 40,
+    'lucas_kanade_parameters': dict(winSize=(21, 21), maxLevel=3, criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 15, 0.02)),
+    'motion_detection_threshold': 2.0
+}
+
+
+# returns (name, shape) of every array stored in the shared memory block of a camera
+def get_shared_frame_layout(frame_height, frame_width):
+    color_shape = (frame_height, frame_width, NUMBER_OF_COLOR_CHANNELS)
+    gray_shape = (frame_height, frame_width)
+    return [
+        ('frame', color_shape),
+        ('gray_frame', gray_shape),
+        ('previous_frame', gray_shape),
+        ('previous_frame_1', gray_shape),
+        ('previous_frame_2', gray_shape),
+        (MASK_NAME, color_shape)
+    ]
+
+# returns number of bytes needed by the shared memory block of a camera
+def calculate_shared_block_size(frame_height, frame_width):
+    return sum(int(np.prod(shape)) for _, shape in get_shared_frame_layout(frame_height, frame_width))
+
+# creates numpy views on top of a shared memory buffer, no data is copied
+def create_shared_frame_views(buffer, frame_height, frame_width):
+    views, offsets, offset = {}, {}, 0
+    for name, shape in get_shared_frame_layout(frame_height, frame_width):
+        views[name] = np.ndarray(shape, dtype=np.uint8, buffer=buffer, offset=offset)
+        offsets[name] = offset
+        offset += int(np.prod(shape))
+    return views, offsets
+
+
+# per camera background models kept inside a worker process
+class WorkerCameraState(object):
+    def __init__(self, camera_settings):
+        self.mgo2_background_subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=camera_settings['history'], varThreshold=camera_settings['var_threshold'], detectShadows=False
+        )
+        # pyramids are not cached, shared memory views keep their identity while their content changes
+        self.lucas_kanade_orb_detection_tracking = GridLukasKanadeOrb(
+            points_of_interest_detector=cv2.ORB_create(nfeatures=ORB_FEATURES),
+            lucas_kanade_parameters=camera_settings['lucas_kanade_parameters'],
+            motion_detection_threshold=camera_settings['motion_detection_threshold'],
+            cache_pyramids=False
+        )
+        self.mckenna_background_subtractor = McKennaMethod()
+        # shared memory views are overwritten in place, so blurred frames cannot be cached between requests
+        self.three_frame_differencer = ThreeFrameDifferencer(cache_history=False)
+        self.shared_memory, self.views, self.offsets = None, None, None
+
+    # attaches to shared memory block of the camera, block changes when frame size changes
+    def attach(self, block_name, frame_height, frame_width):
+        if self.shared_memory is not None and self.shared_memory.name == block_name:
+            return
+        self.detach()
+        self.shared_memory = shared_memory.SharedMemory(name=block_name)
+        # block is owned and unlinked by the parent process
+        resource_tracker.unregister(self.shared_memory._name, SHARED_MEMORY_RESOURCE_TYPE)
+        self.views, self.offsets = create_shared_frame_views(self.shared_memory.buf, frame_height, frame_width)
+
+    def detach(self):
+        if self.shared_memory is not None:
+            # views have to be dropped before shared memory can be closed
+            self.views, self.offsets = None, None
+            self.shared_memory.close()
+            self.shared_memory = None
+
+
+# computes mask for one request inside worker process, returns (mask shape, motion detected by tracking)
+def analyse_shared_frames(camera_state, mode):
+    views = camera_state.views
+    motion_detected_by_tracking = False
+
+    if mode == MGO2_MODE:
+        motion_mask = compute_mgo2_motion_mask(
+            camera_state.mgo2_background_subtractor, views['gray_frame'], views['previous_frame_1'], views['previous_frame_2'],
+            camera_state.three_frame_differencer
+        )
+    elif mode == LUCAS_KANADE_ORB_MODE:
+        motion_detected_by_tracking, motion_mask = compute_lucas_kanade_orb_motion(
+            camera_state.lucas_kanade_orb_detection_tracking, views['gray_frame'], views['previous_frame'],
+            views['previous_frame_1'], views['previous_frame_2'], camera_state.three_frame_differencer
+        )
+    elif mode == MCKENNA_MODE:
+        motion_mask = compute_mckenna_motion_mask(
+            camera_state.mckenna_background_subtractor, views['gray_frame'], views['frame'],
+            views['previous_frame_1'], views['previous_frame_2'], camera_state.three_frame_differencer
+        )
+    else:
+        raise ValueError(f"Unknown motion detection mode: {mode}")
+
+    # writes mask into shared memory so only its shape goes back through the queue
+    mask_view = np.ndarray(motion_mask.shape, dtype=np.uint8, buffer=camera_state.shared_memory.buf, offset=camera_state.offsets[MASK_NAME])
+    np.copyto(mask_view, motion_mask)
+    return motion_mask.shape, motion_detected_by_tracking
+
+
+# main loop of a worker process
+def run_motion_analysis_worker(request_queue, result_queue):
+    camera_states, camera_settings = {}, {}
+
+    while True:
+        message = request_queue.get()
+        if message is STOP_MESSAGE:
+            break
+
+        message_type = message[0]
+        if message_type == REGISTER_MESSAGE:
+            _, camera_id, settings = message
+            camera_settings[camera_id] = settings
+            continue
+
+        if message_type == RELEASE_MESSAGE:
+            _, camera_id = message
+            camera_state = camera_states.pop(camera_id, None)
+            if camera_state is not None:
+                camera_state.detach()
+            camera_settings.pop(camera_id, None)
+            continue
+
+        _, request_id, camera_id, mode, block_name, frame_height, frame_width = message
+        try:
+            camera_state = camera_states.get(camera_id)
+            if camera_state is None:
+                camera_state = WorkerCameraState(camera_settings.get(camera_id, DEFAULT_CAMERA_SETTINGS))
+                camera_states[camera_id] = camera_state
+            camera_state.attach(block_name, frame_height, frame_width)
+
+            mask_shape, motion_detected_by_tracking = analyse_shared_frames(camera_state, mode)
+            result_queue.put((request_id, mask_shape, motion_detected_by_tracking, None))
+        except Exception as e:
+            result_queue.put((request_id, None, False, str(e)))
+
+    for camera_state in camera_states.values():
+        camera_state.detach()
+
+
+# pool of worker processes computing motion masks, every camera is pinned to one worker to keep its background models
+class MotionAnalysisProcessPool(object):
+    def __init__(self, number_of_processes):
+        # spawn does not copy threads and TensorFlow state of the web server into workers
+        context = multiprocessing.get_context('spawn')
+        self.number_of_processes = number_of_processes
+        self.request_queues = [context.Queue() for _ in range(number_of_processes)]
+        self.result_queue = context.Queue()
+        self.processes = [
+            context.Process(target=run_motion_analysis_worker, args=(request_queue, self.result_queue), daemon=True)
+            for request_queue in self.request_queues
+        ]
+        for process in self.processes:
+            process.start()
+
+        self.pending_results = {}
+        self.lock = threading.Lock()
+        self.request_ids = itertools.count()
+        self.worker_indexes = itertools.count()
+
+        # collects results from all workers and completes waiting futures
+        self.result_thread = threading.Thread(target=self._collect_results_in_thread, daemon=True)
+        self.result_thread.start()
+
+    # creates client for a camera, cameras are spread round-robin over workers
+    def create_client(self, camera_id, camera_settings=None):
+        worker_index = next(self.worker_indexes) % self.number_of_processes
+        self.request_queues[worker_index].put((REGISTER_MESSAGE, camera_id, camera_settings or DEFAULT_CAMERA_SETTINGS))
+        return MotionAnalysisClient(self, worker_index, camera_id)
+
+    # sends analysis request to a worker and returns future with its result
+    def submit_analysis(self, worker_index, camera_id, mode, block_name, frame_height, frame_width):
+        future = Future()
+        with self.lock:
+            request_id = next(self.request_ids)
+            self.pending_results[request_id] = future
+        future.request_id = request_id  # used to discard result when caller stops waiting
+        self.request_queues[worker_index].put((ANALYSE_MESSAGE, request_id, camera_id, mode, block_name, frame_height, frame_width))
+        return future
+
+    # forgets pending result, late result of worker is then ignored by result thread
+    def discard_result(self, future):
+        with self.lock:
+            self.pending_results.pop(future.request_id, None)
+
+    def release_camera(self, worker_index, camera_id):
+        self.request_queues[worker_index].put((RELEASE_MESSAGE, camera_id))
+
+    def _collect_results_in_thread(self):
+        while True:
+            result = self.result_queue.get()
+            if result is STOP_MESSAGE:
+                break
+            request_id, mask_shape, motion_detected_by_tracking, error = result
+            with self.lock:
+                future = self.pending_results.pop(request_id, None)
+            # future is missing if caller already gave up waiting
+            if future is not None:
+                future.set_result((mask_shape, motion_detected_by_tracking, error))
+
+    # stops worker processes, called when program is shut down
+    def shutdown(self):
+        for request_queue in self.request_queues:
+            request_queue.put(STOP_MESSAGE)
+        for process in self.processes:
+            process.join(timeout=RESULT_TIMEOUT)
+        self.result_queue.put(STOP_MESSAGE)
+
+
+# used by ModeProcessor of one camera, copies frames into shared memory and waits for mask
+class MotionAnalysisClient(object):
+    def __init__(self, process_pool, worker_index, camera_id):
+        self.process_pool = process_pool
+        self.worker_index = worker_index
+        self.camera_id = camera_id
+        self.shared_memory, self.views, self.offsets = None, None, None
+        self.frame_size = None
+        self.late_future = None  # request that timed out, worker may still use shared memory until it answers
+
+    # creates shared memory block for frame size, a new block is created when size changes
+    def _ensure_shared_memory(self, frame_height, frame_width):
+        if self.frame_size == (frame_height, frame_width):
+            return
+        self._release_shared_memory()
+        self.shared_memory = shared_memory.SharedMemory(create=True, size=calculate_shared_block_size(frame_height, frame_width))
+        self.views, self.offsets = create_shared_frame_views(self.shared_memory.buf, frame_height, frame_width)
+        self.frame_size = (frame_height, frame_width)
+
+    def _release_shared_memory(self):
+        if self.shared_memory is not None:
+            self.views, self.offsets = None, None
+            self.shared_memory.close()
+            self.shared_memory.unlink()
+            self.shared_memory, self.frame_size = None, None
+
+    # returns (motion mask, motion detected by tracking) computed by worker process
+    # returns None while worker still answers a timed out request, its inputs and mask must not be overwritten
+    def compute_motion_mask(self, mode, gray_frame, frame, previous_frame, previous_frame_1, previous_frame_2):
+        if self.late_future is not None:
+            if not self.late_future.done():
+                return None
+            self.late_future = None
+
+        frame_height, frame_width = gray_frame.shape[:2]
+        self._ensure_shared_memory(frame_height, frame_width)
+
+        # copies inputs into shared memory, worker reads them without pickling
+        np.copyto(self.views['gray_frame'], gray_frame)
+        np.copyto(self.views['previous_frame_1'], previous_frame_1)
+        np.copyto(self.views['previous_frame_2'], previous_frame_2)
+        if previous_frame is not None:
+            np.copyto(self.views['previous_frame'], previous_frame)
+        if mode == MCKENNA_MODE:
+            np.copyto(self.views['frame'], frame)
+
+        future = self.process_pool.submit_analysis(
+            self.worker_index, self.camera_id, mode, self.shared_memory.name, frame_height, frame_width
+        )
+        try:
+            mask_shape, motion_detected_by_tracking, error = future.result(timeout=RESULT_TIMEOUT)
+        except TimeoutError:
+            # result thread completes future when worker is done with shared memory
+            self.late_future = future
+            raise
+        if error is not None:
+            raise RuntimeError(error)
+
+        # copies mask out of shared memory before next request overwrites it
+        motion_mask = np.ndarray(mask_shape, dtype=np.uint8, buffer=self.shared_memory.buf, offset=self.offsets[MASK_NAME]).copy()
+        return motion_mask, motion_detected_by_tracking
+
+    # frees worker state and shared memory of the camera
+    def release(self):
+        if self.late_future is not None:
+            self.process_pool.discard_result(self.late_future)
+            self.late_future = None
+        self.process_pool.release_camera(self.worker_index, self.camera_id)
+        self._release_shared_memory()
+
+# References:
+# https://docs.python.org/3/library/multiprocessing.shared_memory.html
+# https://docs.python.org/3/library/multiprocessing.html#contexts-and-start-methods
+# https://docs.python.org/3/library/concurrent.futures.html#future-objects
+# https://bugs.python.org/issue38119
+# https://numpy.org/doc/stable/reference/generated/numpy.ndarray.html
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
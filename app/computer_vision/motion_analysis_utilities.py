@@ -42,6 +42,10 @@ def process_and_buffer_motion_data(events_motion_buffer, motion_data, user_id, a
     event_data = {
         'video_path': VIDEO_DIRECTORY, 
         'image_path': motion_data["image_path"], 
+        'frame_sequence': motion_data.get("frame_sequence"),
+        'motion_regions': motion_data.get("motion_regions"),
+        'video_file_name': motion_data.get("video_file_name"),
+        'bookmark': motion_data.get("bookmark"),
         'position_name': position_name,
         'size_name': size_name,
         'user_id': user_id
@@ -49,6 +53,13 @@ def process_and_buffer_motion_data(events_motion_buffer, motion_data, user_id, a
     events_motion_buffer.append(event_data)
     logging.debug(f"Motion data buffered: {event_data}")
 
+# metadata embedded into video of motion event, same values as buffered event
+def get_video_metadata(motion_data):
+    return {
+        'position': identify_position(motion_data["x"], motion_data["w"], motion_data["frame_width"]),
+        'size': identify_size(motion_data["contour_area"], motion_data["frame_width"], motion_data["frame_height"])
+    }
+
 # identifies position of motion
 def identify_position(x, w, frame_width):
     # splits frame 
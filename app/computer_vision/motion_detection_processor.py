@@ -1,6 +1,6 @@
 import cv2
 import numpy as np
-from app.algorithms_motion_detection.three_frame_method import three_frame_differencing_method
+from app.algorithms_motion_detection.three_frame_method import three_frame_differencing_method, ThreeFrameDifferencer
 import logging
 import time
 
@@ -13,17 +13,114 @@ logging.basicConfig(level=logging.DEBUG, format='%(asctime)s [%(levelname)s] %(m
 
 # constant for #of dimensions for grayscale image
 NUMBER_OF_GRAYSCALE_DIMENSIONS = 2
+MEDIAN_BLUR_VALUE = 5
+MAX_BACKEND_FAILURES = 3  # consecutive failures after which masks are computed in calling thread for good
+
+# motion detection modes
+MGO2_MODE = "mgo2"
+LUCAS_KANADE_ORB_MODE = "lucas_kanade_orb"
+MCKENNA_MODE = "mckenna"
+
+
+# three frame differencing mask, differencer reuses blurred frames of previous calls
+def compute_three_frame_differencing_mask(gray_frame, previous_frame_1, previous_frame_2, three_frame_differencer=None):
+    if three_frame_differencer is None:
+        return three_frame_differencing_method(gray_frame, previous_frame_1, previous_frame_2)
+    return three_frame_differencer.apply(gray_frame, previous_frame_1, previous_frame_2)
+
+# creates motion mask from mgo2 background subtractor and three frame differencing
+def compute_mgo2_motion_mask(mgo2_background_subtractor, gray_frame, previous_frame_1, previous_frame_2, three_frame_differencer=None):
+    # applies background subtraction using mgo2_background_subtractor
+    foreground_mask_mgo2 = mgo2_background_subtractor.apply(gray_frame)
+
+    # creates mask using three-frame differencing method to detect motion
+    three_frame_differencing_mask = compute_three_frame_differencing_mask(gray_frame, previous_frame_1, previous_frame_2, three_frame_differencer)
+
+    # combines foreground_mask_mgo2 and three_frame_differencing_mask using bitwise AND (only areas detected by both methods will be considered)
+    motion_mask = cv2.bitwise_and(three_frame_differencing_mask, foreground_mask_mgo2)
+
+    # applies a median blur to motion mask to reduce noise 
+    return cv2.medianBlur(motion_mask, MEDIAN_BLUR_VALUE)
+
+# tracks points of interest and creates three frame differencing mask, returns (motion detected by tracking, mask)
+def compute_lucas_kanade_orb_motion(lucas_kanade_orb_detection_tracking, gray_frame, previous_frame, previous_frame_1, previous_frame_2, three_frame_differencer=None):
+    # initialize lucas_kanade_orb method 
+    if lucas_kanade_orb_detection_tracking.previous_points is None:
+        lucas_kanade_orb_detection_tracking.detect_initial_keypoints(gray_frame)
+
+    # continue tracking points of interest vetween previous and current frame for motion detection
+    motion_detected_by_lucas_kanade_orb, _ = lucas_kanade_orb_detection_tracking.track_points_of_interest(previous_frame, gray_frame)
+
+    # applies three frame dff for motion detection
+    motion_mask = compute_three_frame_differencing_mask(gray_frame, previous_frame_1, previous_frame_2, three_frame_differencer)
+    return bool(motion_detected_by_lucas_kanade_orb), motion_mask
+
+# creates motion mask from mckenna method and three frame differencing
+def compute_mckenna_motion_mask(mckenna_background_subtractor, gray_frame, frame, previous_frame_1, previous_frame_2, three_frame_differencer=None):
+    # initialize processing with McKenna method
+    mckenna_foreground_mask = mckenna_background_subtractor.process_one_frame(frame)
+
+    # create mask using three-frame differencing to detect motion
+    three_frame_differencing_mask = compute_three_frame_differencing_mask(gray_frame, previous_frame_1, previous_frame_2, three_frame_differencer)
+
+    # resize masks 
+    if three_frame_differencing_mask.shape != mckenna_foreground_mask.shape:
+        three_frame_differencing_mask = cv2.resize(three_frame_differencing_mask, (mckenna_foreground_mask.shape[1], mckenna_foreground_mask.shape[0]))
+
+    # convert masks to data types
+    mckenna_foreground_mask = mckenna_foreground_mask.astype(np.uint8)
+    three_frame_differencing_mask = three_frame_differencing_mask.astype(np.uint8)
+    
+    # verify if three-frame difference mask is in grayscale 
+    if three_frame_differencing_mask.ndim == NUMBER_OF_GRAYSCALE_DIMENSIONS:
+        # convertz grayscale mask to BGR format 
+        three_frame_differencing_mask = cv2.cvtColor(three_frame_differencing_mask, cv2.COLOR_GRAY2BGR)
+
+    # uses bitwais OR to create motion mask
+    return cv2.bitwise_or(mckenna_foreground_mask, three_frame_differencing_mask)
+
 
 class ModeProcessor:
 
-    MEDIAN_BLUR_VALUE = 5 
-    def __init__(self, mgo2_background_subtractor, lucas_kanade_orb_detection_tracking, mckenna_background_subtractor, detection_model, category_index, detection_threshold):
+    MEDIAN_BLUR_VALUE = MEDIAN_BLUR_VALUE
+    def __init__(self, mgo2_background_subtractor, lucas_kanade_orb_detection_tracking, mckenna_background_subtractor, detection_model, category_index, detection_threshold, motion_analysis_backend=None):
         self.mgo2_background_subtractor = mgo2_background_subtractor
         self.lucas_kanade_orb_detection_tracking = lucas_kanade_orb_detection_tracking
         self.mckenna_background_subtractor = mckenna_background_subtractor
         self.detection_model = detection_model
         self.category_index = category_index
         self.detection_threshold = detection_threshold
+        # blurs every grey frame once and keeps it for the next calls
+        self.three_frame_differencer = ThreeFrameDifferencer()
+        # optional backend computing masks in worker processes, if None masks are computed in calling thread
+        self.motion_analysis_backend = motion_analysis_backend
+        self.backend_failures = 0
+
+    # computes masks with worker process backend, returns None if backend is not used or failed
+    def _compute_with_backend(self, mode, gray_frame, frame, previous_frame, previous_frame_1, previous_frame_2):
+        if self.motion_analysis_backend is None:
+            return None
+        try:
+            result = self.motion_analysis_backend.compute_motion_mask(mode, gray_frame, frame, previous_frame, previous_frame_1, previous_frame_2)
+            # None means backend is busy with late request, frame is computed in calling thread
+            if result is not None:
+                self.backend_failures = 0
+            return result
+        except Exception as e:
+            # frame is computed in calling thread, backend is released after repeated failures
+            self.backend_failures += 1
+            logging.error(f"Error! Motion analysis backend failed ({self.backend_failures}/{MAX_BACKEND_FAILURES}), using calling thread instead: {str(e)}")
+            if self.backend_failures >= MAX_BACKEND_FAILURES:
+                self._release_backend()
+            return None
+
+    # frees shared memory and worker state of backend, masks are then computed in calling thread
+    def _release_backend(self):
+        backend, self.motion_analysis_backend = self.motion_analysis_backend, None
+        try:
+            backend.release()
+        except Exception as e:
+            logging.error(f"Error! Motion analysis backend was not released: {str(e)}")
 
     # processes mgo2 background subtractor and three frame diffencing 
     def process_mgo2_and_three_frame_diff_mode(self, gray_frame, previous_frame_1, previous_frame_2, callback_for_detect_motion, frame):
@@ -32,17 +129,11 @@ class ModeProcessor:
             if previous_frame_1 is None or previous_frame_2 is None:
                 return None
 
-            # applies background subtraction using mgo2_background_subtractor
-            foreground_mask_mgo2 = self.mgo2_background_subtractor.apply(gray_frame)
-
-            # creates mask using three-frame differencing method to detect motion
-            three_frame_differencing_mask = three_frame_differencing_method(gray_frame, previous_frame_1, previous_frame_2)
-
-            # combines foreground_mask_mgo2 and three_frame_differencing_mask using bitwise AND (only areas detected by both methods will be considered)
-            motion_mask = cv2.bitwise_and(three_frame_differencing_mask, foreground_mask_mgo2)
-
-            # applies a median blur to motion mask to reduce noise 
-            motion_mask = cv2.medianBlur(motion_mask, self.MEDIAN_BLUR_VALUE)
+            backend_result = self._compute_with_backend(MGO2_MODE, gray_frame, frame, None, previous_frame_1, previous_frame_2)
+            if backend_result is not None:
+                motion_mask, _ = backend_result
+            else:
+                motion_mask = compute_mgo2_motion_mask(self.mgo2_background_subtractor, gray_frame, previous_frame_1, previous_frame_2, self.three_frame_differencer)
 
             # detect motion using the designated method and return motion data
             motion_data = callback_for_detect_motion(motion_mask, frame)
@@ -60,15 +151,14 @@ class ModeProcessor:
             if current_time - video_camera_start_time < warm_up_period:
                 return False  # skip detection during warmup
 
-            # initialize lucas_kanade_orb method 
-            if self.lucas_kanade_orb_detection_tracking.previous_points is None:
-                self.lucas_kanade_orb_detection_tracking.detect_initial_keypoints(gray_frame)
-
-            # continue tracking points of interest vetween previous and current frame for motion detection
-            motion_detected_by_lucas_kanade_orb, _ = self.lucas_kanade_orb_detection_tracking.track_points_of_interest(previous_frame, gray_frame)
+            backend_result = self._compute_with_backend(LUCAS_KANADE_ORB_MODE, gray_frame, frame, previous_frame, previous_frame_1, previous_frame_2)
+            if backend_result is not None:
+                motion_mask, motion_detected_by_lucas_kanade_orb = backend_result
+            else:
+                motion_detected_by_lucas_kanade_orb, motion_mask = compute_lucas_kanade_orb_motion(
+                    self.lucas_kanade_orb_detection_tracking, gray_frame, previous_frame, previous_frame_1, previous_frame_2, self.three_frame_differencer
+                )
 
-            # applies three frame dff for motion detection
-            motion_mask = three_frame_differencing_method(gray_frame, previous_frame_1, previous_frame_2)
             # uses callback func to analyse mask
             motion_detected_by_three_frame_diff = callback_for_detect_motion(motion_mask, frame)
             
@@ -83,29 +173,17 @@ class ModeProcessor:
 
 
     # processes mckenna and three frame differencing     
-    def process_mckenna_and_three_frame_diff_mode(self, gray_frame, frame, previous_frame_1, previous_frame_2, callback_for_detect_motion):
+    # mask_frame is colour frame at size of gray_frame (McKenna input), frame is passed to callback
+    def process_mckenna_and_three_frame_diff_mode(self, gray_frame, frame, previous_frame_1, previous_frame_2, callback_for_detect_motion, mask_frame=None):
         try:
-            # initialize processing with McKenna method
-            mckenna_foreground_mask = self.mckenna_background_subtractor.process_one_frame(frame)
-
-            # create mask using three-frame differencing to detect motion
-            three_frame_differencing_mask = three_frame_differencing_method(gray_frame, previous_frame_1, previous_frame_2)
-
-            # resize masks 
-            if three_frame_differencing_mask.shape != mckenna_foreground_mask.shape:
-                three_frame_differencing_mask = cv2.resize(three_frame_differencing_mask, (mckenna_foreground_mask.shape[1], mckenna_foreground_mask.shape[0]))
-
-            # convert masks to data types
-            mckenna_foreground_mask = mckenna_foreground_mask.astype(np.uint8)
-            three_frame_differencing_mask = three_frame_differencing_mask.astype(np.uint8)
-            
-            # verify if three-frame difference mask is in grayscale 
-            if three_frame_differencing_mask.ndim == NUMBER_OF_GRAYSCALE_DIMENSIONS:
-                # convertz grayscale mask to BGR format 
-                three_frame_differencing_mask = cv2.cvtColor(three_frame_differencing_mask, cv2.COLOR_GRAY2BGR)
-
-            # uses bitwais OR to create motion mask
-            motion_mask = cv2.bitwise_or(mckenna_foreground_mask, three_frame_differencing_mask)
+            mask_frame = frame if mask_frame is None else mask_frame
+            backend_result = self._compute_with_backend(MCKENNA_MODE, gray_frame, mask_frame, None, previous_frame_1, previous_frame_2)
+            if backend_result is not None:
+                motion_mask, _ = backend_result
+            else:
+                motion_mask = compute_mckenna_motion_mask(
+                    self.mckenna_background_subtractor, gray_frame, mask_frame, previous_frame_1, previous_frame_2, self.three_frame_differencer
+                )
 
             # callback_for_detect_motion to detect motion and return the motion data
             motion_data = callback_for_detect_motion(motion_mask, frame)
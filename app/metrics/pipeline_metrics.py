@@ -0,0 +1,244 @@
+import threading
+import time
+from functools import wraps
+from config import PIPELINE_METRICS
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+SUB_BUCKET_BITS = 4  # 16 buckets per power of two, recorded values are within 6.25% of real value
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+MAX_RECORDED_MICROSECONDS = 1 << 27  # ~134 seconds, longer stages are counted as max value
+NUMBER_OF_BUCKETS = (MAX_RECORDED_MICROSECONDS.bit_length() - SUB_BUCKET_BITS) * SUB_BUCKET_COUNT
+REPORTED_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+METRIC_PREFIX = 'securevision'
+NO_CAMERA = ''  # label of stages that are not bound to one camera
+ADMIN_PAGE_EXPORTER = 'admin_page'  # exporters keep their own fps window, so they do not reset each other
+PROMETHEUS_EXPORTER = 'prometheus'
+
+
+# HDR style histogram of durations in microseconds, buckets grow with value so memory and error stay bounded
+class LatencyHistogram(object):
+    def __init__(self):
+        self.counts = [0] * NUMBER_OF_BUCKETS
+        self.total_count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_bucket_index(microseconds):
+        microseconds = min(max(0, int(microseconds)), MAX_RECORDED_MICROSECONDS - 1)
+        if microseconds < 2 * SUB_BUCKET_COUNT:
+            return microseconds
+        shift = microseconds.bit_length() - SUB_BUCKET_BITS - 1
+        return shift * SUB_BUCKET_COUNT + (microseconds >> shift)
+
+    # highest value (microseconds) counted in bucket
+    @staticmethod
+    def get_bucket_upper_bound(bucket_index):
+        if bucket_index < 2 * SUB_BUCKET_COUNT:
+            return bucket_index
+        shift = bucket_index // SUB_BUCKET_COUNT - 1
+        return ((bucket_index - shift * SUB_BUCKET_COUNT + 1) << shift) - 1
+
+    def record(self, seconds):
+        bucket_index = self.get_bucket_index(seconds * 1e6)
+        with self.lock:
+            self.counts[bucket_index] += 1
+            self.total_count += 1
+            self.total_seconds += seconds
+            if seconds > self.max_seconds:
+                self.max_seconds = seconds
+
+    # returns duration (seconds) below which given share of recorded durations lie, 0.0 if nothing was recorded
+    def get_quantile(self, quantile):
+        with self.lock:
+            counts, total_count = list(self.counts), self.total_count
+        if total_count == 0:
+            return 0.0
+
+        rank = max(1, int(round(quantile * total_count)))
+        cumulative_count = 0
+        for bucket_index, count in enumerate(counts):
+            cumulative_count += count
+            if cumulative_count >= rank:
+                return min(self.get_bucket_upper_bound(bucket_index) / 1e6, self.max_seconds)
+        return self.max_seconds
+
+    def get_statistics(self):
+        statistics = {'count': self.total_count, 'sum': self.total_seconds, 'max': self.max_seconds}
+        for quantile in REPORTED_QUANTILES:
+            statistics[f'p{quantile * 100:g}'] = self.get_quantile(quantile)
+        return statistics
+
+
+# measures one stage, used as context manager
+class StageTimer(object):
+    __slots__ = ('histogram', 'start_time')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start_time = None
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.record(time.perf_counter() - self.start_time)
+        return False
+
+
+# does nothing, returned while metrics are disabled so instrumented code only pays for one attribute check
+class NullTimer(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+# per stage latency histograms of all cameras, counters and queue depths are read from cameras when metrics are exported
+class PipelineMetrics(object):
+    def __init__(self, enabled=PIPELINE_METRICS):
+        self.enabled = enabled
+        self.histograms = {}  # (stage, camera id) -> LatencyHistogram
+        self.lock = threading.Lock()
+        self.frame_counts = {}  # (exporter, camera id) -> (time, captured frames) of previous export, used for fps
+
+    def get_histogram(self, stage, camera_id=NO_CAMERA):
+        key = (stage, camera_id)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    # with pipeline_metrics.time_stage('retrieve_frame', camera_id): ...
+    def time_stage(self, stage, camera_id=NO_CAMERA):
+        if not self.enabled:
+            return NULL_TIMER
+        return StageTimer(self.get_histogram(stage, camera_id))
+
+    # returns {(stage, camera id): statistics of histogram}
+    def get_stage_statistics(self):
+        with self.lock:
+            histograms = dict(self.histograms)
+        return {key: histogram.get_statistics() for key, histogram in sorted(histograms.items())}
+
+    # frames per second captured since previous call of same exporter for this camera
+    def update_frame_rate(self, camera_id, captured_frames, current_time=None, exporter=ADMIN_PAGE_EXPORTER):
+        current_time = time.time() if current_time is None else current_time
+        key = (exporter, camera_id)
+        with self.lock:
+            previous_time, previous_frames = self.frame_counts.get(key, (None, None))
+            self.frame_counts[key] = (current_time, captured_frames)
+        if previous_time is None or current_time <= previous_time or captured_frames < previous_frames:
+            return 0.0
+        return (captured_frames - previous_frames) / (current_time - previous_time)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.frame_counts = {}
+
+
+# metrics of this process
+pipeline_metrics = PipelineMetrics()
+
+
+# measures every call of decorated function as stage (without camera)
+def timed_stage(stage):
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not pipeline_metrics.enabled:
+                return function(*args, **kwargs)
+            with pipeline_metrics.time_stage(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# returns {camera id: counters, queue depths and fps} read from camera pipelines
+def collect_camera_metrics(cameras, metrics=pipeline_metrics, exporter=ADMIN_PAGE_EXPORTER):
+    camera_metrics = {}
+    for camera_id, video_camera in cameras.items():
+        statistics = video_camera.get_pipeline_statistics()
+        consumers = {name: statistics[name] for name in video_camera.frame_consumers}
+        detection_statistics = video_camera.object_detection_queue.get_statistics()
+        broadcaster_statistics = statistics['mjpeg_broadcaster']
+        camera_metrics[camera_id] = {
+            'captured_frames': statistics['captured_frames'],
+            'capture_failures': statistics['capture_failures'],
+            'frames_per_second': metrics.update_frame_rate(camera_id, statistics['captured_frames'], exporter=exporter),
+            'dropped_frames': {name: consumer['dropped_frames'] for name, consumer in consumers.items()},
+            'queue_depths': dict(
+                {f'{name}_consumer': consumer['lag_frames'] for name, consumer in consumers.items()},
+                object_detection=detection_statistics['queued_jobs']
+            ),
+            'rejected_detection_jobs': detection_statistics['rejected_jobs'],
+            'live_feed_viewers': broadcaster_statistics['subscribers'],
+            'live_feed_dropped_frames': broadcaster_statistics['dropped_frames']
+        }
+    return camera_metrics
+
+
+def _format_labels(**labels):
+    return '{' + ','.join(f'{name}="{str(value)}"' for name, value in labels.items()) + '}'
+
+
+# renders stage histograms and camera metrics in Prometheus text exposition format
+def render_prometheus_text(camera_metrics, metrics=pipeline_metrics):
+    lines = []
+
+    def add_metric(name, metric_type, help_text, samples):
+        lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+        lines.append(f'# TYPE {METRIC_PREFIX}_{name} {metric_type}')
+        for suffix, labels, value in samples:
+            lines.append(f'{METRIC_PREFIX}_{name}{suffix}{_format_labels(**labels)} {value}')
+
+    stage_samples = []
+    for (stage, camera_id), statistics in metrics.get_stage_statistics().items():
+        for quantile in REPORTED_QUANTILES:
+            stage_samples.append(('', dict(stage=stage, camera=camera_id, quantile=quantile), f"{statistics[f'p{quantile * 100:g}']:.6f}"))
+        stage_samples.append(('_sum', dict(stage=stage, camera=camera_id), f"{statistics['sum']:.6f}"))
+        stage_samples.append(('_count', dict(stage=stage, camera=camera_id), statistics['count']))
+    add_metric('stage_latency_seconds', 'summary', 'Time spent in pipeline stage.', stage_samples)
+
+    add_metric('captured_frames_total', 'counter', 'Frames read from video camera.',
+               [('', dict(camera=camera_id), values['captured_frames']) for camera_id, values in camera_metrics.items()])
+    add_metric('capture_failures_total', 'counter', 'Failed reads from video camera.',
+               [('', dict(camera=camera_id), values['capture_failures']) for camera_id, values in camera_metrics.items()])
+    add_metric('frames_per_second', 'gauge', 'Captured frames per second since previous scrape.',
+               [('', dict(camera=camera_id), f"{values['frames_per_second']:.2f}") for camera_id, values in camera_metrics.items()])
+    add_metric('dropped_frames_total', 'counter', 'Frames skipped by pipeline consumer.',
+               [('', dict(camera=camera_id, consumer=name), value)
+                for camera_id, values in camera_metrics.items() for name, value in values['dropped_frames'].items()])
+    add_metric('queue_depth', 'gauge', 'Frames or jobs waiting in pipeline queue.',
+               [('', dict(camera=camera_id, queue=name), value)
+                for camera_id, values in camera_metrics.items() for name, value in values['queue_depths'].items()])
+    add_metric('rejected_detection_jobs_total', 'counter', 'Object detection jobs dropped because queue was full.',
+               [('', dict(camera=camera_id), values['rejected_detection_jobs']) for camera_id, values in camera_metrics.items()])
+    add_metric('live_feed_viewers', 'gauge', 'Viewers of MJPEG live feed.',
+               [('', dict(camera=camera_id), values['live_feed_viewers']) for camera_id, values in camera_metrics.items()])
+    add_metric('live_feed_dropped_frames_total', 'counter', 'Frames skipped for slow MJPEG viewers.',
+               [('', dict(camera=camera_id), values['live_feed_dropped_frames']) for camera_id, values in camera_metrics.items()])
+    return '\n'.join(lines) + '\n'
+
+# References:
+# https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+# https://prometheus.io/docs/practices/histograms/
+# https://github.com/HdrHistogram/HdrHistogram/blob/master/src/main/java/org/HdrHistogram/AbstractHistogram.java
+# http://hdrhistogram.org/
+# https://docs.python.org/3/library/time.html#time.perf_counter
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
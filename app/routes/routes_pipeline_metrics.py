@@ -0,0 +1,40 @@
+import hmac
+from flask import Blueprint, Response, request, abort
+from flask_login import current_user
+from app.metrics.pipeline_metrics import collect_camera_metrics, render_prometheus_text, PROMETHEUS_EXPORTER
+from app.routes.routes_video_streaming_services import camera_manager
+from config import METRICS_TOKEN
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+blueprint_pipeline_metrics = Blueprint('blueprint_pipeline_metrics', __name__)
+
+# constants
+PROMETHEUS_MIME_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+AUTHORIZATION_PREFIX = 'Bearer '
+
+
+# scrapers send configured token, people have to be logged in as admin
+def is_metrics_access_allowed():
+    authorization = request.headers.get('Authorization', '')
+    if METRICS_TOKEN and authorization.startswith(AUTHORIZATION_PREFIX):
+        return hmac.compare_digest(authorization[len(AUTHORIZATION_PREFIX):], METRICS_TOKEN)
+    return current_user.is_authenticated and current_user.has_role('admin')
+
+# pipeline metrics of all cameras in Prometheus text format
+@blueprint_pipeline_metrics.route('/metrics')
+def metrics():
+    if not is_metrics_access_allowed():
+        abort(403)
+    camera_metrics = collect_camera_metrics(camera_manager.get_all_cameras(), exporter=PROMETHEUS_EXPORTER)
+    return Response(render_prometheus_text(camera_metrics), mimetype=PROMETHEUS_MIME_TYPE)
+
+# References:
+# https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+# https://prometheus.io/docs/prometheus/latest/configuration/configuration/#scrape_config
+# https://flask.palletsprojects.com/en/2.3.x/blueprints/
+# https://docs.python.org/3/library/hmac.html#hmac.compare_digest
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -1,7 +1,7 @@
-from app.camera.camera import VideoCamera
+from app.camera.camera_manager import CameraManager
 from app.database_models.models import User, MotionEvent
 from flask_login import login_required,  current_user
-from flask import session, Blueprint, current_app, Response, jsonify, request
+from flask import session, Blueprint, current_app, Response, jsonify, request, abort, send_file
 from app.handlers.event_data_handler import save_motion_event_to_database
 from app.google_drive.video_upload_to_drive import  store_video_to_google_drive
 from app.google_drive.drive_token_manager import  retrieve_google_drive_credentials
@@ -10,12 +10,17 @@ from app.google_drive.video_file_manager import retrieve_video_file_path
 from app.google_drive.drive_utilities import retrieve_google_drive_video_url
 import threading
 import time
+import io
 from app.email_notifications.email_notifications_all import send_email_with_preference_for_all_notifications
 import atexit
 import os
 from app import db
 import cv2
-from app.algorithms_object_detection.object_detection_utilities import perform_image_processing_in_thread, object_recognition
+from app.algorithms_object_detection.object_detection_utilities import object_recognition
+from app.camera.clip_finalisation import READY_STATE
+from app.computer_vision.encode_profiles import ENCODE_PROFILES, DEFAULT_STREAM_PROFILE
+from app.computer_vision.frame_pyramid import ANALYSIS_FRAME_SIZE, scale_regions
+from app.metrics.pipeline_metrics import timed_stage
 from app.handlers.local_video_handler import save_video_in_local_directory
 from config import BASE_DIRECTORY
 from app.metadata.metadata_embedding import embed_metadata_on_video
@@ -33,100 +38,163 @@ logging.basicConfig(level=logging.DEBUG, format='%(asctime)s [%(levelname)s] %(m
 
 blueprint_streaming_services = Blueprint('blueprint_streaming_services', __name__)
 
-# initializes video camera outside of app context
-video_camera = None
+# keeps all camera pipelines of this process, keyed by (user, camera source)
+camera_manager = CameraManager()
 
 # constants 
 SLEEP_DURATION = 1  
 WAIT_TIMEOUT = 14  # timeout for waiting allows video to properly finalize
 VIDEO_MIME_TYPE = 'multipart/x-mixed-replace; boundary=frame'
-SLEEP_DURATION_TO_AVOID_BUSY = 0.1
+CAMERA_SOURCE_FIELD = 'camera_source'  # form field with device index or stream url
+PROFILE_PARAMETER = 'profile'  # query parameter selecting encode profile of MJPEG live feed (thumbnail, mobile, desktop, archive)
+LIVE_PLAYLIST_MIME_TYPE = 'application/vnd.apple.mpegurl'
+LIVE_INIT_SEGMENT_MIME_TYPE = 'video/mp4'
+LIVE_SEGMENT_MIME_TYPE = 'video/iso.segment'
+LIVE_STREAM_START_TIMEOUT = 5  # seconds playlist request waits for first segment
+LIVE_SEGMENT_MAX_AGE = 60  # segments never change, browsers and proxies can cache them
 
 # called when program is shut down to clean up resources
 @atexit.register
 def shutdown():
-    global video_camera
-    if video_camera:
-        video_camera.__del__()
+    camera_manager.release_all_cameras()
+
+# returns camera of user for given source, new cameras get their own motion events monitor
+def get_or_create_camera(user_id, app, camera_source=None, credentials=None):
+    video_camera, created = camera_manager.get_or_create_camera(app, user_id, camera_source, credentials)
+    if created:
+        # start new thread for handling database and email notifications 
+        threading.Thread(target=monitor_and_handle_motion_events, args=(user_id, app, video_camera), daemon=True).start()
+    return video_camera
+
+# returns encode profile requested by viewer, 400 for unknown profile
+def get_requested_profile_name():
+    profile_name = request.args.get(PROFILE_PARAMETER, DEFAULT_STREAM_PROFILE)
+    if profile_name not in ENCODE_PROFILES:
+        abort(400)
+    return profile_name
 
-# serves video stream to users
+# serves video stream of default camera to users
 @blueprint_streaming_services.route('/video_streamer')
 @login_required  
 def video_streamer():
+    profile_name = get_requested_profile_name()
     # creates HTTP response that calls video_live_stream; mimetype is streaming multipart content separated by a boundary marker 'frame'
-    response = Response(video_live_stream(user_id=current_user.user_id, app=current_app._get_current_object()),
+    response = Response(video_live_stream(user_id=current_user.user_id, app=current_app._get_current_object(), profile_name=profile_name),
                         mimetype=VIDEO_MIME_TYPE)
     return response  # returns streaming response object
 
+# serves video stream of one camera of the user
+@blueprint_streaming_services.route('/video_streamer/<camera_id>')
+@login_required
+def video_streamer_for_camera(camera_id):
+    video_camera = camera_manager.get_camera(camera_id)
+
+    # users can only watch their own cameras
+    if video_camera is None or video_camera.user_id != current_user.user_id:
+        abort(404)
+
+    response = Response(video_live_stream(user_id=current_user.user_id, app=current_app._get_current_object(), camera_source=video_camera.camera_source,
+                                          profile_name=get_requested_profile_name()),
+                        mimetype=VIDEO_MIME_TYPE)
+    return response
+
+# returns H.264 live stream of camera of current user, 404 if camera does not exist or stream is not available
+def get_live_stream_of_camera(camera_id):
+    video_camera = camera_manager.get_camera(camera_id)
+    if video_camera is None or video_camera.user_id != current_user.user_id:
+        abort(404)
+
+    live_stream = video_camera.get_live_stream()
+    if live_stream is None:
+        abort(404)
+    return live_stream
+
+# segments are sent as static bytes, range requests are answered by send_file
+def send_live_stream_segment(segment, mimetype):
+    if segment is None:
+        abort(404)
+    return send_file(io.BytesIO(segment), mimetype=mimetype, conditional=True, max_age=LIVE_SEGMENT_MAX_AGE)
+
+# serves HLS playlist of camera, segments are encoded once per camera and shared by all viewers
+@blueprint_streaming_services.route('/live/<camera_id>/index.m3u8')
+@login_required
+def live_stream_playlist(camera_id):
+    live_stream = get_live_stream_of_camera(camera_id)
+
+    # first request starts encoder, playlist is available after first segment
+    playlist = live_stream.get_playlist()
+    if playlist is None and live_stream.wait_for_segments(LIVE_STREAM_START_TIMEOUT):
+        playlist = live_stream.get_playlist()
+    if playlist is None:
+        abort(503)
+
+    response = Response(playlist, mimetype=LIVE_PLAYLIST_MIME_TYPE)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@blueprint_streaming_services.route('/live/<camera_id>/init_<int:version>.mp4')
+@login_required
+def live_stream_init_segment(camera_id, version):
+    return send_live_stream_segment(get_live_stream_of_camera(camera_id).get_init_segment(version), LIVE_INIT_SEGMENT_MIME_TYPE)
+
+@blueprint_streaming_services.route('/live/<camera_id>/segment_<int:sequence_number>.m4s')
+@login_required
+def live_stream_segment(camera_id, sequence_number):
+    return send_live_stream_segment(get_live_stream_of_camera(camera_id).get_segment(sequence_number), LIVE_SEGMENT_MIME_TYPE)
+
+# lists cameras of current user with their stream urls
+@blueprint_streaming_services.route('/cameras')
+@login_required
+def list_cameras():
+    cameras = [
+        {
+            'camera_id': camera_id,
+            'camera_source': str(video_camera.camera_source),
+            'camera_on': video_camera.camera_on,
+            'stream_url': f'/video_streamer/{camera_id}',
+            'live_stream_url': f'/live/{camera_id}/index.m3u8'
+        }
+        for camera_id, video_camera in camera_manager.get_cameras_for_user(current_user.user_id).items()
+    ]
+    return jsonify(cameras=cameras)
+
 
 @blueprint_streaming_services.route('/enable_camera', methods=['POST'])
 def enable_camera():
-    global video_camera
-    user_id = current_user.get_id()
-    
-    # verify if camera object is initialized, if not, initialize it
-    if video_camera is None:
+    camera_source = request.form.get(CAMERA_SOURCE_FIELD)  # retrieves optional camera source from form data
+
+    try:
+        # verify if camera object is initialized, if not, initialize it
         creds = session.get('credentials')  # retrieves user credentials from session
         user_id = current_user.user_id  # retrieves current user's user_id
-        
-        # initializes a new VideoCamera instance
-        video_camera = VideoCamera(app=current_app._get_current_object(), user_id=user_id, credentials=creds)
-
-    # starts audio recording thread
-    def sound_recording_thread():
-        try:
-            while True:
-                # if camera is recording, read audio frames and add them to audio frames list
-                if video_camera.is_video_recording:
-                    sound_frame = video_camera.sound_stream.read(video_camera.chunk_size, exception_on_overflow=False)
-                    video_camera.audio_frames.append(sound_frame)
-                else:
-                    time.sleep(SLEEP_DURATION_TO_AVOID_BUSY)  # otherwise sleep to avoid busy-waiting while not recording
-        except Exception as e:
-            logging.error("Error in audio recording thread: " + str(e))
-
-    # starts audio recording thread
-    sound_thread = threading.Thread(target=sound_recording_thread)
-    sound_thread.start()
+        video_camera = get_or_create_camera(user_id, current_app._get_current_object(), camera_source, creds)
+    except RuntimeError as e:
+        logging.error(f"Error! Can not create camera: {e}")
+        return jsonify(error=str(e)), 503
 
     try:
-        video_camera._start_live_feed()
-
-        # starts image analysis thread with updated arguments
-        image_analysis_thread = threading.Thread(
-            target=perform_image_processing_in_thread, 
-            args=(
-                video_camera, 
-                video_camera.PATH_FOR_SAVING_IMAGE,
-                video_camera.PATH_FOR_SAVING_PROCESSED_IMAGE,  
-                video_camera.detection_model,  
-                video_camera.category_index,   
-                video_camera.DETECTION_THRESHOLD  
-            )
-        )
-        image_analysis_thread.daemon = True
-        image_analysis_thread.start()
+        video_camera._start_live_feed()  # also starts object detection queue of the camera
 
-        return jsonify(result="Camera is turned on.")
+        return jsonify(result="Camera is turned on.", camera_id=video_camera.camera_id)
     except Exception as e:
-        video_camera = None
+        camera_manager.remove_camera(video_camera.camera_id)
         logging.error(f"Error starting camera live feed: {e}")
         return jsonify(error="Error starting camera live feed"), 500
 
 @blueprint_streaming_services.route('/disable_camera', methods=['POST'])
 def disable_camera():
-    global video_camera
+    camera_source = request.form.get(CAMERA_SOURCE_FIELD)
+
     # disable live feed if camera object exists
+    video_camera = camera_manager.get_camera_for_user(current_user.user_id, camera_source)
     if video_camera:
-        video_camera._stop_live_feed()
-        video_camera = None  # sets to None for proper re-initialization
+        camera_manager.remove_camera(video_camera.camera_id)  # removes camera for proper re-initialization
 
     return jsonify(result="Camera is turned off.")
 
 
 @blueprint_streaming_services.route('/setup_motion_detection_mode', methods=['POST'])
 def setup_motion_detection_mode():
-    global video_camera  
     motion_mode = request.form.get('mode')  # retrieves selected detection mode from form data
     
     user_id = current_user.get_id()  # retrieves current user's ID
@@ -137,9 +205,11 @@ def setup_motion_detection_mode():
         user.motion_detection_mode = motion_mode
         db.session.commit()  # saves updated user information in db
         
-        # if camera exists,  updates mode in camera instance
-        if video_camera:  
-            video_camera.setup_motion_detection_mode(motion_mode)
+        # if cameras exist, updates mode in every camera of the user
+        user_cameras = camera_manager.get_cameras_for_user(user.user_id)
+        if user_cameras:  
+            for video_camera in user_cameras.values():
+                video_camera.setup_motion_detection_mode(motion_mode)
             
             return jsonify(result=f"Mode is set to {motion_mode}")  # responds with success message
         else:
@@ -190,51 +260,56 @@ including but not limited to academic papers, articles, blog posts, and YouTube
 Note: Some parts were copied and closely adopted.
 """
 
-def video_live_stream(credentials=None, user_id=None, app=None):
-    global video_camera  
+def video_live_stream(credentials=None, user_id=None, app=None, camera_source=None, profile_name=DEFAULT_STREAM_PROFILE):
     # if camera is not initialized, initializes it 
-    if not video_camera:
-        # creates VideoCamera instance
-        video_camera = VideoCamera(app=app, user_id=user_id, credentials=credentials)
-        # start new thread for handling database and email notifications 
-        threading.Thread(target=monitor_and_handle_motion_events, args=(user_id, app)).start()
-
-    while True:  # continuously streams video frames
-        # check if video_camera object exists, if not displays message
-        if not video_camera:
-            time.sleep(SLEEP_DURATION)
-            continue
-
-        with app.app_context():  # use app context for thread safety
-            # gets current frame from video camera
-            frame, _ = video_camera.retrieve_frame()
-            if frame:
-                # if frame is available, yield it as part of response (multip-part format)
-                yield (b'--frame\r\n' + b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n\r\n')
-            else:
-                # if frame is unavailable, sleep 
-                time.sleep(SLEEP_DURATION)
-
-
-def monitor_and_handle_motion_events(user_id, app):
-    global video_camera
-    # continuously monitors and processes motion events
-    while True:
-        # if video_camera instance is None or missing  'events_motion_buffer' attribute.
-        if video_camera is None or not hasattr(video_camera, 'events_motion_buffer'):
-            time.sleep(SLEEP_DURATION) # pause before checking
-            continue 
+    video_camera = get_or_create_camera(user_id, app, camera_source, credentials)
+    camera_id = video_camera.camera_id
+    subscribed_camera, subscriber = None, None
 
+    try:
+        while True:  # continuously streams video frames
+            # check if camera still exists (it is removed when disabled), if not displays message
+            video_camera = camera_manager.get_camera(camera_id)
+            if not video_camera:
+                time.sleep(SLEEP_DURATION)
+                continue
+
+            # camera is recreated when it is enabled again, viewer moves to the new camera
+            if video_camera is not subscribed_camera:
+                if subscribed_camera is not None:
+                    subscribed_camera.unsubscribe_from_live_feed(subscriber)
+                subscribed_camera, subscriber = video_camera, video_camera.subscribe_to_live_feed(profile_name)
+
+            with app.app_context():  # use app context for thread safety
+                # gets frame encoded once for all viewers, slow viewers skip frames instead of slowing camera down
+                frame = video_camera.retrieve_subscribed_frame(subscriber, SLEEP_DURATION)
+                if frame:
+                    # if frame is available, yield it as part of response (multip-part format)
+                    yield (b'--frame\r\n' + b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n\r\n')
+                elif not video_camera.camera_on:
+                    # if live feed is off, sleep 
+                    time.sleep(SLEEP_DURATION)
+    finally:
+        # runs when viewer closes connection
+        if subscribed_camera is not None:
+            subscribed_camera.unsubscribe_from_live_feed(subscriber)
+
+
+def monitor_and_handle_motion_events(user_id, app, video_camera):
+    # continuously monitors and processes motion events while camera is registered
+    while camera_manager.get_camera(video_camera.camera_id) is video_camera:
         # checks for motion events in buffer
         if video_camera.events_motion_buffer:
             # wait until video_ready_threading_event is set (allows to block thread until event is triggered)
-            video_camera.video_ready_threading_event.wait()
+            # continuous recording does not wait for recorded videos, events wait for their segments
+            if video_camera.segment_recorder is None and not video_camera.video_ready_threading_event.wait(SLEEP_DURATION):
+                continue
  
             # processes each motion event in buffer
             while video_camera.events_motion_buffer:
                 # pops 1st event from buffer and processes it 
                 event = video_camera.events_motion_buffer.pop(0)
-                process_motion_detection_event(event, user_id, app)
+                process_motion_detection_event(event, user_id, app, video_camera)
 
             # clears video_ready_threading_event to show that all events have been processed
             video_camera.video_ready_threading_event.clear()
@@ -242,78 +317,118 @@ def monitor_and_handle_motion_events(user_id, app):
         time.sleep(SLEEP_DURATION) # pauses loop to avoid running it
 
 
-def process_motion_detection_event(event, user_id, app, wait_timeout=WAIT_TIMEOUT):
+def process_motion_detection_event(event, user_id, app, video_camera, wait_timeout=WAIT_TIMEOUT):
     # gets position, size, and image path 
     position_name = event['position_name']
     size_name = event['size_name']
     image_path = event['image_path']
-    
-    waiting_time = 0 # initializes waiting timer
+    frame_sequence = event.get('frame_sequence')
+    motion_regions = event.get('motion_regions')
+    video_file_name = event.get('video_file_name')
+    bookmark = event.get('bookmark')
+
+    try:
+        process_recorded_motion_event(user_id, app, video_camera, image_path, position_name, size_name, frame_sequence, wait_timeout, motion_regions, video_file_name, bookmark)
+    finally:
+        # frees shared memory slot of the event even if processing failed
+        if video_camera is not None:
+            video_camera.release_event_frame(frame_sequence)
 
-    # this loop allows video camera to complete video recording, otherwise videos don't finalize properly resulting in unplayble videos
-    while video_camera is not None and not video_camera.video_recording_complete and waiting_time < wait_timeout:
-        time.sleep(SLEEP_DURATION)  # waits before checking again
-        waiting_time += 1
 
-    # checks if recording is finished after waiting loop
-    if video_camera is not None and video_camera.video_recording_complete:
+def process_recorded_motion_event(user_id, app, video_camera, image_path, position_name, size_name, frame_sequence, wait_timeout, motion_regions=None, video_file_name=None, bookmark=None):
+    if video_camera is None:
+        return
+
+    if bookmark is not None:
+        # continuous recording, clip is joined from segments without encoding
+        current_video_path = video_camera.wait_for_bookmarked_clip(bookmark, wait_timeout)
+        video_metadata_embedded = False
+    elif video_file_name is not None:
+        # waits for finalisation job of the recording this event belongs to, camera may already record next clip
+        job = video_camera.wait_for_finished_recording(video_file_name, wait_timeout)
+        if job is None:
+            logging.error(f"Error! Recording {video_file_name} was not finalised in {wait_timeout} seconds.")
+            return
+        current_video_path = job.final_video_path if job.state == READY_STATE else None
+        video_metadata_embedded = job.metadata_embedded
+    else:
+        waiting_time = 0 # initializes waiting timer
+
+        # this loop allows video camera to complete video recording, otherwise videos don't finalize properly resulting in unplayble videos
+        while not video_camera.video_recording_complete and waiting_time < wait_timeout:
+            time.sleep(SLEEP_DURATION)  # waits before checking again
+            waiting_time += 1
+
+        # checks if recording is finished after waiting loop
+        if not video_camera.video_recording_complete:
+            return
         # gets path to current video file
         current_video_path = video_camera.get_current_final_video_path()
- 
-        # if current video path is valid, object detection starts
-        if current_video_path:
-            detected_objects = process_object_detection(image_path, video_camera)
+        video_metadata_embedded = video_camera.video_metadata_embedded
+
+    # if current video path is valid, object detection starts
+    if current_video_path:
+        save_detected_motion_event(user_id, app, video_camera, image_path, position_name, size_name, frame_sequence, motion_regions, current_video_path, video_metadata_embedded)
+
+
+# runs object detection and saves event once its video is ready, waiting for recording is not part of this stage
+@timed_stage('process_motion_detection_event')
+def save_detected_motion_event(user_id, app, video_camera, image_path, position_name, size_name, frame_sequence, motion_regions, current_video_path, video_metadata_embedded):
+    detected_objects = process_object_detection(image_path, video_camera, frame_sequence, motion_regions)
   
-            # converts absolute path to relative path for video and image
-            relative_path_for_video = os.path.relpath(current_video_path, BASE_DIRECTORY)
-            relative_path_for_image = os.path.relpath(image_path, BASE_DIRECTORY)  
+    # converts absolute path to relative path for video and image
+    relative_path_for_video = os.path.relpath(current_video_path, BASE_DIRECTORY)
+    relative_path_for_image = os.path.relpath(image_path, BASE_DIRECTORY)  
 
 
-            with app.app_context():
-                try:
-                    # using app context saves event to db 
-                    event_id = save_motion_event_to_database(
-                        video_path=relative_path_for_video, 
-                        image_path=relative_path_for_image, 
-                        position_name=position_name,
-                        size_name=size_name,
-                        detected_objects=detected_objects, 
-                        user_id=user_id
-                    )
-
-                    # if event was saved display success message; if not, display error message
-                    if event_id is None:
-                        logging.error("Did not save event to database.")
-                    else:
-                        logging.info(f"Event with ID: {event_id} was saved.")
-                    
-                    # Embed metadata into the video file.
-                    metadata = {'position': position_name, 'size': size_name}
-                    path_to_video_with_metadata = embed_metadata_on_video(current_video_path, metadata)
-                    
-                    # if metadata embedding was not successful, exit
-                    if not path_to_video_with_metadata:
-                        return  
-
-                    # converts to relative path before updating db
-                    relative_path_to_video_with_metadata = os.path.relpath(path_to_video_with_metadata, BASE_DIRECTORY)
-
-                    # updates db with relative video path
-                    event = MotionEvent.query.get(event_id)
-                    if event:
-                        event.video_path = relative_path_to_video_with_metadata
-                        db.session.commit()
+    with app.app_context():
+        try:
+            # using app context saves event to db 
+            event_id = save_motion_event_to_database(
+                video_path=relative_path_for_video, 
+                image_path=relative_path_for_image, 
+                position_name=position_name,
+                size_name=size_name,
+                detected_objects=detected_objects, 
+                user_id=user_id
+            )
 
-                    # manages video upload to google if activated otherwise saves video locally
-                    manage_google_drive_video_upload(event_id, user_id, relative_path_to_video_with_metadata)
-                    # sends email to user
-                    send_email_notification(user_id, app, image_path)
+            # if event was saved display success message; if not, display error message
+            if event_id is None:
+                logging.error("Did not save event to database.")
+            else:
+                logging.info(f"Event with ID: {event_id} was saved.")
+            
+            # Embed metadata into the video file, video written by muxer already has it.
+            if video_metadata_embedded:
+                path_to_video_with_metadata = current_video_path
+            else:
+                metadata = {'position': position_name, 'size': size_name}
+                path_to_video_with_metadata = embed_metadata_on_video(current_video_path, metadata)
+            
+            # if metadata embedding was not successful, exit
+            if not path_to_video_with_metadata:
+                return  
 
-                except Exception as e:
-                    logging.error(f"Error! Can not process motion event: {e}", exc_info=True)
+            # converts to relative path before updating db
+            relative_path_to_video_with_metadata = os.path.relpath(path_to_video_with_metadata, BASE_DIRECTORY)
 
+            # updates db with relative video path
+            event = MotionEvent.query.get(event_id)
+            if event:
+                event.video_path = relative_path_to_video_with_metadata
+                db.session.commit()
 
-def send_email_notification(user_id, app, image_path):
+            # manages video upload to google if activated otherwise saves video locally
+            manage_google_drive_video_upload(event_id, user_id, relative_path_to_video_with_metadata)
+            # sends email to user
+            send_email_notification(user_id, app, image_path, video_camera)
+
+        except Exception as e:
+            logging.error(f"Error! Can not process motion event: {e}", exc_info=True)
+
+
+def send_email_notification(user_id, app, image_path, video_camera):
     # gets user based on user_id
     user = User.query.get(user_id)
     
@@ -367,14 +482,31 @@ def manage_google_drive_video_upload(event_id, user_id, current_video_path):
             logging.info(f"Video was saved at local path: {local_path_for_video}")
 
 
-def process_object_detection(image_path, video_camera):
-    # reads image from path
-    frame = cv2.imread(image_path)
+def process_object_detection(image_path, video_camera, frame_sequence=None, motion_regions=None):
+    # reuses result of object detection queue if image was already processed
+    detected_objects = video_camera.object_detection_queue.get_detected_objects(image_path)
+    if detected_objects is not None:
+        return detected_objects
+
+    # reads frame from shared frame bus (no decoding), falls back to saved image
+    frame = video_camera.get_event_frame(frame_sequence)
+    if frame is None:
+        frame = cv2.imread(image_path)
+    if frame is None:
+        logging.error(f"Error! Frame of motion event was not found: {image_path}")
+        return []
+
+    # motion regions are in analysis frame coordinates, saved image has native resolution
+    if motion_regions:
+        motion_regions = scale_regions(motion_regions, ANALYSIS_FRAME_SIZE, (frame.shape[1], frame.shape[0]))
     _, detected_objects = object_recognition(
         frame,  # input image frame
         video_camera.detection_model, # trained detection model
         video_camera.category_index, # category index
-        video_camera.DETECTION_THRESHOLD # threshold for detection of object
+        video_camera.DETECTION_THRESHOLD, # threshold for detection of object
+        draw_detections=False, # boxes are not needed, frame stays unchanged
+        inference_service=video_camera.inference_service, # batches frame with frames of other cameras
+        motion_regions=motion_regions # detector runs on crops around motion, None means full frame
     )
     return detected_objects  # returns list of detected objects in image
 
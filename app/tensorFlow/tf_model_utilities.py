@@ -1,8 +1,10 @@
-import tensorflow as tf
-from object_detection.utils import label_map_util
-from object_detection.utils import visualization_utils as vis_util
 import logging
 import os
+import threading
+from google.protobuf import text_format
+from object_detection.protos import string_int_label_map_pb2
+from app.tensorFlow.tflite_model_utilities import load_tflite_model
+from config import DETECTION_BACKEND, TFLITE_QUANTIZATION, TFLITE_NUM_THREADS, PATH_FOR_SAVING_IMAGE
 
 
 """ START - Documentation and research materials were used in the development of the code, 
@@ -19,6 +21,8 @@ LABEL_MAP_PATH = os.path.join(PROJECT_DIR, 'models/research/object_detection/dat
 def load_tensorflow_model(model_directory):
     try:
         logging.info(f"Loading TensorFlow object detection model ssd_mobilenet_v2 trained on COCO from {model_directory}")
+        # TensorFlow is imported only when model is loaded, so web UI and CLI start without it
+        import tensorflow as tf
         model = tf.saved_model.load(model_directory)
         logging.info("The model was loaded successfully.")
         return model
@@ -26,9 +30,92 @@ def load_tensorflow_model(model_directory):
         logging.error(f"Error! Can not load TensorFlow model: {str(e)}")
         return None
 
-# load TensorFlow detection model and category index
-DETECTION_MODEL = load_tensorflow_model(MODEL_DIR)
-CATEGORY_INDEX = label_map_util.create_category_index_from_labelmap(LABEL_MAP_PATH, use_display_name=True)
+# constants for detection backends
+SAVED_MODEL_BACKEND = 'saved_model'
+TFLITE_BACKEND = 'tflite'
+
+# loads detection model with selected backend, TFLite falls back to SavedModel if conversion fails
+def load_detection_model(detection_backend=DETECTION_BACKEND):
+    if detection_backend == TFLITE_BACKEND:
+        model = load_tflite_model(TFLITE_QUANTIZATION, TFLITE_NUM_THREADS, calibration_image_directory=PATH_FOR_SAVING_IMAGE)
+        if model is not None:
+            return model
+        logging.error("Error! TFLite backend is not available, loading SavedModel instead.")
+    return load_tensorflow_model(MODEL_DIR)
+
+# reads label map into {id: {'id': id, 'name': name}} without importing TensorFlow (same result as label_map_util)
+def load_category_index(label_map_path, use_display_name=True):
+    label_map = string_int_label_map_pb2.StringIntLabelMap()
+    with open(label_map_path, 'r') as label_map_file:
+        text_format.Merge(label_map_file.read(), label_map)
+
+    category_index = {}
+    for item in label_map.item:
+        name = item.display_name if use_display_name and item.HasField('display_name') else item.name
+        category_index[item.id] = {'id': item.id, 'name': name}
+    return category_index
+
+
+# states of detection model handle
+MODEL_NOT_LOADED = 'not_loaded'
+MODEL_LOADING = 'loading'
+MODEL_READY = 'ready'
+MODEL_FAILED = 'failed'
+
+
+# loads detection model in background thread on first use, callers check readiness instead of waiting for TensorFlow
+class DetectionModelHandle(object):
+    def __init__(self, loader=load_detection_model):
+        self.loader = loader
+        self.model = None
+        self.state = MODEL_NOT_LOADED
+        self.lock = threading.Lock()
+        self.ready_event = threading.Event()  # set when loading finished (successfully or not)
+
+    # starts loading in background, does nothing if model is loading or loaded
+    def start_loading(self):
+        with self.lock:
+            if self.state != MODEL_NOT_LOADED:
+                return
+            self.state = MODEL_LOADING
+        threading.Thread(target=self._load_model, name='detection_model_loader', daemon=True).start()
+
+    def _load_model(self):
+        try:
+            self.model = self.loader()
+        except Exception as e:
+            logging.error(f"Error! Can not load detection model: {str(e)}")
+            self.model = None
+        self.state = MODEL_READY if self.model is not None else MODEL_FAILED
+        self.ready_event.set()
+
+    def is_ready(self):
+        return self.state == MODEL_READY
+
+    # returns loaded model, starts loading if needed, waits only if timeout is given
+    def get_model(self, timeout=None):
+        self.start_loading()
+        if timeout is not None:
+            self.ready_event.wait(timeout)
+        return self.model
+
+    # runs detection, raises error if model is not ready yet
+    def __call__(self, input_tensor):
+        if not self.is_ready():
+            raise RuntimeError(f"Detection model is not ready (state: {self.state}).")
+        return self.model(input_tensor)
+
+    # gives access to attributes of loaded model (e.g. signatures)
+    def __getattr__(self, name):
+        model = self.__dict__.get('model')
+        if model is None:
+            raise AttributeError(name)
+        return getattr(model, name)
+
+
+# detection model is loaded on first use, category index is small and read at import
+DETECTION_MODEL = DetectionModelHandle()
+CATEGORY_INDEX = load_category_index(LABEL_MAP_PATH, use_display_name=True)
 
 # References:
 # https://tensorflow-object-detection-api-tutorial.readthedocs.io/en/latest/install.html
@@ -45,6 +132,9 @@ CATEGORY_INDEX = label_map_util.create_category_index_from_labelmap(LABEL_MAP_PA
 # https://kitflix.com/python-code-for-object-detection-using-tensorflow/
 # https://www.tensorflow.org/tutorials/keras/save_and_load
 # https://www.projectpro.io/recipes/load-tensorflow-model
+# https://www.tensorflow.org/lite/guide/inference
+# https://github.com/tensorflow/models/blob/master/research/object_detection/utils/label_map_util.py
+# https://docs.python.org/3/library/threading.html#event-objects
 
 
 
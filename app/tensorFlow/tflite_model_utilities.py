@@ -0,0 +1,196 @@
+import os
+import glob
+import logging
+import threading
+import cv2
+import numpy as np
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links.
+Note: Some parts were copied and closely adopted.
+"""
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+# checkpoint and pipeline of the detector, the same files the SavedModel was exported from
+MODEL_BASE_DIR = os.path.join(PROJECT_DIR, 'models/ssd_mobilenet_v2_fpnlite_320x320_coco17_tpu-8')
+PIPELINE_CONFIG_PATH = os.path.join(MODEL_BASE_DIR, 'pipeline.config')
+CHECKPOINT_DIR = os.path.join(MODEL_BASE_DIR, 'checkpoint')
+TFLITE_CACHE_DIR = os.path.join(MODEL_BASE_DIR, 'tflite')
+TFLITE_MODEL_NAME = 'ssd_mobilenet_v2_fpnlite_320x320_{}.tflite'
+
+# constants
+FLOAT16_QUANTIZATION = 'float16'
+INT8_QUANTIZATION = 'int8'
+QUANTIZATION_TYPES = (FLOAT16_QUANTIZATION, INT8_QUANTIZATION)
+MAX_DETECTIONS = 100  # same number of detections as the SavedModel
+NUMBER_OF_CALIBRATION_FRAMES = 100  # frames used to calibrate int8 quantization
+CALIBRATION_IMAGE_PATTERN = '*.jpg'
+LABEL_ID_OFFSET = 1  # TFLite detection post-processing returns classes without background, label map starts at 1
+BOX_COORDINATES = 4
+
+
+# reads pipeline config of the detector
+def read_pipeline_config():
+    from google.protobuf import text_format
+    from object_detection.protos import pipeline_pb2
+
+    pipeline_config = pipeline_pb2.TrainEvalPipelineConfig()
+    with open(PIPELINE_CONFIG_PATH, 'r') as pipeline_file:
+        text_format.Parse(pipeline_file.read(), pipeline_config)
+    return pipeline_config
+
+# reads fixed input size of detector from pipeline config
+def get_model_input_size():
+    image_resizer = read_pipeline_config().model.ssd.image_resizer.fixed_shape_resizer
+    return image_resizer.height, image_resizer.width
+
+# exports checkpoint as SavedModel with TFLite detection post-processing op (uses vendored export_tflite_graph_lib_tf2)
+def export_tflite_saved_model(output_directory):
+    from object_detection import export_tflite_graph_lib_tf2
+
+    export_tflite_graph_lib_tf2.export_tflite_model(read_pipeline_config(), CHECKPOINT_DIR, output_directory, MAX_DETECTIONS, use_regular_nms=False)
+    return os.path.join(output_directory, 'saved_model')
+
+# yields preprocessed frames for int8 calibration, saved motion images are used if there are any
+def create_representative_dataset(input_height, input_width, calibration_image_directory=None):
+    image_paths = []
+    if calibration_image_directory:
+        image_paths = sorted(glob.glob(os.path.join(calibration_image_directory, CALIBRATION_IMAGE_PATTERN)))[:NUMBER_OF_CALIBRATION_FRAMES]
+
+    def representative_dataset():
+        if image_paths:
+            for image_path in image_paths:
+                frame = cv2.imread(image_path)
+                if frame is not None:
+                    yield [preprocess_frame(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), input_height, input_width)]
+        else:
+            # without real frames calibration falls back to random frames (lower int8 accuracy)
+            random_generator = np.random.default_rng(0)
+            for _ in range(NUMBER_OF_CALIBRATION_FRAMES):
+                yield [preprocess_frame(random_generator.integers(0, 256, (input_height, input_width, 3), dtype=np.uint8), input_height, input_width)]
+
+    return representative_dataset
+
+# converts exported SavedModel to TFLite model with float16 or int8 weights
+def convert_to_tflite(saved_model_directory, quantization, input_height, input_width, calibration_image_directory=None):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_directory)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == FLOAT16_QUANTIZATION:
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == INT8_QUANTIZATION:
+        # input and output stay float32, detection post-processing op is not quantized
+        converter.representative_dataset = create_representative_dataset(input_height, input_width, calibration_image_directory)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8, tf.lite.OpsSet.TFLITE_BUILTINS]
+    else:
+        raise ValueError(f"Unknown quantization type: {quantization}")
+
+    return converter.convert()
+
+# returns path of cached TFLite model, converts checkpoint first time it is used
+def get_tflite_model_path(quantization, cache_directory=TFLITE_CACHE_DIR, calibration_image_directory=None):
+    tflite_model_path = os.path.join(cache_directory, TFLITE_MODEL_NAME.format(quantization))
+    if os.path.exists(tflite_model_path):
+        return tflite_model_path
+
+    logging.info(f"Converting detection model to TFLite ({quantization}), this is done only once.")
+    os.makedirs(cache_directory, exist_ok=True)
+    saved_model_directory = export_tflite_saved_model(os.path.join(cache_directory, 'export'))
+    input_height, input_width = get_model_input_size()
+    tflite_model = convert_to_tflite(saved_model_directory, quantization, input_height, input_width, calibration_image_directory)
+
+    # writes to temporary file first so an interrupted conversion does not leave a broken cache
+    temporary_path = tflite_model_path + '.tmp'
+    with open(temporary_path, 'wb') as tflite_file:
+        tflite_file.write(tflite_model)
+    os.replace(temporary_path, tflite_model_path)
+    return tflite_model_path
+
+# resizes RGB frame to model input and scales pixels to [-1, 1] like SSD MobileNet preprocessing
+def preprocess_frame(frame, input_height, input_width):
+    resized_frame = cv2.resize(frame, (input_width, input_height), interpolation=cv2.INTER_LINEAR)
+    return (resized_frame.astype(np.float32) * (2.0 / 255.0) - 1.0)[np.newaxis]
+
+
+# runs TFLite detector and returns outputs in the same format as the SavedModel
+class TFLiteDetectionModel(object):
+    def __init__(self, model_path, number_of_threads=None):
+        import tensorflow as tf
+
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=number_of_threads)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()[0]
+        _, self.input_height, self.input_width, _ = self.input_details['shape']
+        self.output_details = self.interpreter.get_output_details()
+
+        # interpreter is not thread safe, cameras share one instance
+        self.lock = threading.Lock()
+
+    # accepts uint8 RGB batch [N, H, W, 3] (tensor or array), frames are run one by one because model input is [1, 320, 320, 3]
+    def __call__(self, input_tensor):
+        frames = np.asarray(input_tensor)
+        frame_detections = [self._detect(frame) for frame in frames]
+        return {key: np.concatenate([detections[key] for detections in frame_detections]) for key in frame_detections[0]}
+
+    def _detect(self, frame):
+        input_frame = self._quantize_input(preprocess_frame(frame, self.input_height, self.input_width))
+
+        with self.lock:
+            self.interpreter.set_tensor(self.input_details['index'], input_frame)
+            self.interpreter.invoke()
+            outputs = [self.interpreter.get_tensor(output_detail['index']) for output_detail in self.output_details]
+
+        boxes, classes, scores, number_of_detections = identify_detection_outputs(outputs)
+        return {
+            'detection_boxes': boxes.astype(np.float32),
+            'detection_scores': scores.astype(np.float32),
+            'detection_classes': classes.astype(np.float32) + LABEL_ID_OFFSET,
+            'num_detections': number_of_detections.reshape(1).astype(np.float32)
+        }
+
+    # int8 models with quantized input need scale and zero point applied
+    def _quantize_input(self, input_frame):
+        input_type = self.input_details['dtype']
+        if input_type == np.float32:
+            return input_frame
+        scale, zero_point = self.input_details['quantization']
+        return np.clip(np.round(input_frame / scale + zero_point), np.iinfo(input_type).min, np.iinfo(input_type).max).astype(input_type)
+
+
+# TFLite output order depends on converter version, outputs are identified by shape and values
+def identify_detection_outputs(outputs):
+    boxes = next(output for output in outputs if output.ndim == 3 and output.shape[-1] == BOX_COORDINATES)
+    number_of_detections = next(output for output in outputs if output.ndim == 1)
+    scores, classes = [output for output in outputs if output is not boxes and output is not number_of_detections]
+
+    # class ids are whole numbers, scores are not
+    if not np.all(np.mod(classes, 1) == 0) and np.all(np.mod(scores, 1) == 0):
+        scores, classes = classes, scores
+    return boxes, classes, scores, number_of_detections
+
+# loads TFLite detector, returns None if model can not be converted or loaded
+def load_tflite_model(quantization=FLOAT16_QUANTIZATION, number_of_threads=None, calibration_image_directory=None):
+    try:
+        logging.info(f"Loading TFLite ({quantization}) object detection model ssd_mobilenet_v2 trained on COCO")
+        model = TFLiteDetectionModel(get_tflite_model_path(quantization, calibration_image_directory=calibration_image_directory), number_of_threads)
+        logging.info("The TFLite model was loaded successfully.")
+        return model
+    except Exception as e:
+        logging.error(f"Error! Can not load TFLite model: {str(e)}")
+        return None
+
+# References:
+# https://www.tensorflow.org/lite/guide/inference#load_and_run_a_model_in_python
+# https://www.tensorflow.org/lite/performance/post_training_quantization
+# https://www.tensorflow.org/lite/performance/post_training_float16_quant
+# https://www.tensorflow.org/api_docs/python/tf/lite/Interpreter
+# https://github.com/tensorflow/models/blob/master/research/object_detection/g3doc/running_on_mobile_tf2.md
+# https://github.com/tensorflow/models/blob/master/research/object_detection/export_tflite_graph_tf2.py
+# https://github.com/tensorflow/models/blob/master/research/object_detection/models/ssd_mobilenet_v2_fpn_keras_feature_extractor.py
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links.
+Note: Some parts were copied and closely adopted.
+"""
@@ -2,7 +2,7 @@ from flask_admin.contrib.sqla import ModelView
 from flask_login import current_user
 from flask import redirect, url_for, request
 from flask_admin.form import rules
-from flask_admin import AdminIndexView
+from flask_admin import AdminIndexView, BaseView, expose
 from app.forms.forms_custom_user import UserCustomForm
 from app.views.formatters_utilities import events_formatter, roles_formatter
 
@@ -272,6 +272,28 @@ class MyAdminIndexView(AdminIndexView):
     def is_visible(self):
         return False
 
+
+# latency of pipeline stages and counters of every camera
+class PipelineMetricsView(BaseView):
+    @expose('/')
+    def index(self):
+        # imported here, camera pipeline is not loaded before admin views are created
+        from app.metrics.pipeline_metrics import pipeline_metrics, collect_camera_metrics, ADMIN_PAGE_EXPORTER
+        from app.routes.routes_video_streaming_services import camera_manager
+
+        return self.render('admin/pipeline_metrics.html',
+                           metrics_enabled=pipeline_metrics.enabled,
+                           stage_statistics=pipeline_metrics.get_stage_statistics(),
+                           camera_metrics=collect_camera_metrics(camera_manager.get_all_cameras(), exporter=ADMIN_PAGE_EXPORTER))
+
+    # check if user is authenticated
+    def is_accessible(self):
+        return current_user.is_authenticated and current_user.has_role('admin')
+
+    # redirects to login page if user is not authorized
+    def inaccessible_callback(self, name, **kwargs):
+        return redirect(url_for('blueprint_user_authentication.login', next=request.url))
+
 # References:
 # https://flask-admin.readthedocs.io/en/latest/
 # https://flask-admin.readthedocs.io/en/latest/api/mod_base/
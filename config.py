@@ -51,6 +51,53 @@ if not os.path.exists(PATH_FOR_SAVING_PROCESSED_IMAGE):
 SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIRECTORY, 'db', 'motion.db')
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# motion analysis backend, 'thread' computes masks in camera analysis threads, 'process' uses worker processes
+MOTION_ANALYSIS_BACKEND = os.environ.get('MOTION_ANALYSIS_BACKEND', 'thread')
+MOTION_ANALYSIS_PROCESSES = int(os.environ.get('MOTION_ANALYSIS_PROCESSES', max(1, (os.cpu_count() or 2) - 1)))
+
+# batched object detection shared by all cameras
+DETECTION_BATCH_SIZE = int(os.environ.get('DETECTION_BATCH_SIZE', 8))
+DETECTION_BATCH_MAX_WAIT = float(os.environ.get('DETECTION_BATCH_MAX_WAIT', 0.02))
+
+# object detection backend, 'saved_model' or 'tflite' (converted once from checkpoint and cached)
+DETECTION_BACKEND = os.environ.get('DETECTION_BACKEND', 'saved_model')
+TFLITE_QUANTIZATION = os.environ.get('TFLITE_QUANTIZATION', 'float16')  # 'float16' or 'int8'
+TFLITE_NUM_THREADS = int(os.environ.get('TFLITE_NUM_THREADS', os.cpu_count() or 1))
+
+# 'pyav' writes video, audio and metadata into final MP4 while recording, 'ffmpeg' merges files with ffmpeg after recording
+VIDEO_MUXER = os.environ.get('VIDEO_MUXER', 'pyav')
+
+# pre-roll, video kept as JPEG frames before motion is detected and written at start of every recording
+PRE_ROLL_SECONDS = float(os.environ.get('PRE_ROLL_SECONDS', 3.0))
+PRE_ROLL_MAX_BYTES = int(os.environ.get('PRE_ROLL_MAX_BYTES', 0))  # 0 derives budget from frame size, fps and pre-roll seconds
+PRE_ROLL_JPEG_QUALITY = int(os.environ.get('PRE_ROLL_JPEG_QUALITY', 80))
+
+# 'event' records separate video per motion event, 'continuous' records fragmented MP4 segments all the time and bookmarks events in them
+RECORDING_MODE = os.environ.get('RECORDING_MODE', 'event')
+SEGMENT_DIRECTORY = os.path.join(VIDEO_DIRECTORY, 'segments')
+SEGMENT_DURATION = float(os.environ.get('SEGMENT_DURATION', 6.0))  # seconds per segment file
+SEGMENT_RETENTION_HOURS = float(os.environ.get('SEGMENT_RETENTION_HOURS', 24.0))  # older segments are deleted
+EVENT_CLIP_DURATION = float(os.environ.get('EVENT_CLIP_DURATION', 10.0))  # seconds after motion included in event clip
+
+# adaptive analysis, idle scene gets cheap low resolution check at reduced rate, full analysis starts when motion is suspected
+ADAPTIVE_ANALYSIS = os.environ.get('ADAPTIVE_ANALYSIS', 'true').lower() == 'true'
+# default budget of every camera, can be changed per camera (CameraManager.get_or_create_camera)
+ANALYSIS_BUDGET = {
+    'idle_analysis_fps': float(os.environ.get('IDLE_ANALYSIS_FPS', 5.0)),
+    'idle_analysis_scale': float(os.environ.get('IDLE_ANALYSIS_SCALE', 0.25)),
+    'confirmation_frames': int(os.environ.get('MOTION_CONFIRMATION_FRAMES', 2)),
+    'cool_down_time': float(os.environ.get('MOTION_COOL_DOWN_TIME', 5.0))
+}
+# motion masks (background models, frame differencing) are computed on grey frame scaled by this factor, contours are scaled back
+MOTION_MASK_SCALE = float(os.environ.get('MOTION_MASK_SCALE', 0.5))
+
+# per stage latency histograms, exported at /metrics (Prometheus) and on admin page, disabled instrumentation costs one check per stage
+PIPELINE_METRICS = os.environ.get('PIPELINE_METRICS', 'true').lower() == 'true'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # bearer token for scrapers, without it only admins can read /metrics
+
+# 'region_of_interest' runs detector on padded crops around motion, 'full_frame' runs it on whole frame
+OBJECT_DETECTION_MODE = os.environ.get('OBJECT_DETECTION_MODE', 'region_of_interest')
+
 # flask session configuration
 SESSION_TYPE = 'filesystem'
 SESSION_FILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'flask_session')
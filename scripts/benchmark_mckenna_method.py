@@ -0,0 +1,95 @@
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from app.algorithms_motion_detection.mckenna_method import McKennaMethod, STATISTICS_PRECISIONS
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+FRAME_SIZES = ((640, 360), (1280, 720))
+WARM_UP_FRAMES = 3  # first frames allocate model buffers and are not measured
+NOISE_LEVEL = 3
+
+
+# previous McKenna implementation (global means and variances, new arrays every frame), kept as baseline
+class GlobalMcKennaMethod(object):
+    def __init__(self, alpha=0.8, beta=0.1, chromaticity_edge_thresholds=(3, 1)):
+        self.alpha, self.beta = alpha, beta
+        self.chromaticity_edge_thresholds = chromaticity_edge_thresholds
+        self.mean_gaussian, self.variance_gaussian, self.mean_edge, self.variance_edge = None, None, None, None
+
+    def process_one_frame(self, frame):
+        frame = frame.astype(np.float32) / 255.0
+        chromaticity_value = frame[:, :, [0, 2]] / (frame[:, :, 1][:, :, np.newaxis] + 1e-6)
+        x_edges, y_edges = np.gradient(frame, axis=(0, 1))
+        if self.mean_gaussian is None:
+            self.mean_gaussian = np.mean(chromaticity_value, axis=(0, 1))
+            self.variance_gaussian = np.var(chromaticity_value, axis=(0, 1))
+            self.mean_edge = np.mean(np.stack([x_edges, y_edges]), axis=(0, 1, 2))
+            self.variance_edge = np.var(np.stack([x_edges, y_edges]), axis=(0, 1, 2))
+        self.mean_gaussian = self.alpha * np.mean(chromaticity_value, axis=(0, 1)) + (1 - self.alpha) * self.mean_gaussian
+        self.variance_gaussian = self.alpha * np.var(chromaticity_value, axis=(0, 1)) + (1 - self.alpha) * self.variance_gaussian
+        self.mean_edge = self.beta * np.mean(np.stack([x_edges, y_edges]), axis=(0, 1, 2)) + (1 - self.beta) * self.mean_edge
+        self.variance_edge = self.beta * np.var(np.stack([x_edges, y_edges]), axis=(0, 1, 2)) + (1 - self.beta) * self.variance_edge
+        chromaticity_difference = np.abs(chromaticity_value - self.mean_gaussian)
+        edge_difference_sum = np.sum(np.stack([np.abs(x_edges - self.mean_edge), np.abs(y_edges - self.mean_edge)]), axis=-1)[..., np.newaxis]
+        mask = (chromaticity_difference > self.chromaticity_edge_thresholds[0] * self.variance_gaussian) | \
+               (edge_difference_sum > self.chromaticity_edge_thresholds[1] * np.mean(self.variance_edge))
+        return np.repeat(mask.any(axis=-1).astype(np.uint8)[..., np.newaxis], 3, axis=-1)
+
+
+# noisy copies of one random background
+def create_frames(frame_size, number_of_frames, seed=0):
+    random_generator = np.random.default_rng(seed)
+    width, height = frame_size
+    background = random_generator.integers(NOISE_LEVEL, 256 - NOISE_LEVEL, (height, width, 3), dtype=np.int16)
+    return [(background + random_generator.integers(-NOISE_LEVEL, NOISE_LEVEL + 1, background.shape)).astype(np.uint8)
+            for _ in range(number_of_frames)]
+
+# returns mean milliseconds and mean MB temporarily allocated per frame (tracemalloc peak during call)
+def measure(method, frames):
+    for frame in frames[:WARM_UP_FRAMES]:
+        method.process_one_frame(frame)
+
+    latencies, allocated_bytes = [], []
+    tracemalloc.start()
+    for frame in frames[WARM_UP_FRAMES:]:
+        tracemalloc.reset_peak()
+        current_bytes = tracemalloc.get_traced_memory()[0]
+        start_time = time.perf_counter()
+        method.process_one_frame(frame)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        allocated_bytes.append(tracemalloc.get_traced_memory()[1] - current_bytes)
+    tracemalloc.stop()
+    return np.mean(latencies), np.mean(allocated_bytes) / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares time and per frame allocations of McKenna implementations.')
+    parser.add_argument('--frames', type=int, default=50)
+    arguments = parser.parse_args()
+
+    print(f"{'frame size':<12}{'method':<18}{'mean ms':>10}{'alloc MB':>10}{'fewer allocs':>14}")
+    for frame_size in FRAME_SIZES:
+        frames = create_frames(frame_size, arguments.frames + WARM_UP_FRAMES)
+        methods = {'global (before)': GlobalMcKennaMethod()}
+        methods.update({f'per pixel {precision}': McKennaMethod(precision=precision) for precision in STATISTICS_PRECISIONS})
+
+        baseline_megabytes = None
+        for method_name, method in methods.items():
+            mean_milliseconds, allocated_megabytes = measure(method, frames)
+            baseline_megabytes = baseline_megabytes or allocated_megabytes
+            reduction = baseline_megabytes / max(allocated_megabytes, 1e-6)
+            print(f"{'%dx%d' % frame_size:<12}{method_name:<18}{mean_milliseconds:>10.2f}{allocated_megabytes:>10.2f}{reduction:>13.0f}x")
+
+if __name__ == "__main__":
+    main()
+
+# References:
+# https://docs.python.org/3/library/tracemalloc.html#tracemalloc.reset_peak
+# https://numpy.org/doc/stable/reference/ufuncs.html#output-arguments
+# https://docs.python.org/3/library/time.html#time.perf_counter
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
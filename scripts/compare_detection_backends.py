@@ -0,0 +1,114 @@
+import argparse
+import glob
+import os
+import time
+import cv2
+import numpy as np
+import tensorflow as tf
+from app.tensorFlow.tf_model_utilities import load_tensorflow_model, MODEL_DIR, CATEGORY_INDEX
+from app.tensorFlow.tflite_model_utilities import load_tflite_model, QUANTIZATION_TYPES
+from app.algorithms_object_detection.object_detection_utilities import filter_detections
+from config import PATH_FOR_SAVING_IMAGE
+
+""" START - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
+
+# constants
+DETECTION_THRESHOLD = 0.4  # same threshold as VideoCamera.DETECTION_THRESHOLD
+IOU_THRESHOLD = 0.5  # detections of same class overlapping more than this are counted as the same object
+WARM_UP_RUNS = 3  # first calls are not measured (graph tracing, memory allocation)
+LATENCY_PERCENTILE = 95
+
+
+# intersection over union of two [y_min, x_min, y_max, x_max] boxes
+def calculate_iou(box_1, box_2):
+    y_min, x_min = max(box_1[0], box_2[0]), max(box_1[1], box_2[1])
+    y_max, x_max = min(box_1[2], box_2[2]), min(box_1[3], box_2[3])
+    intersection = max(0.0, y_max - y_min) * max(0.0, x_max - x_min)
+    union = (box_1[2] - box_1[0]) * (box_1[3] - box_1[1]) + (box_2[2] - box_2[0]) * (box_2[3] - box_2[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+# counts detections matching reference detections (same class, IoU above threshold)
+def count_matching_detections(reference_detections, detections):
+    unmatched_reference = list(reference_detections)
+    matches = 0
+    for detection in detections:
+        for reference in unmatched_reference:
+            if reference['class_name'] == detection['class_name'] and calculate_iou(reference['bounding_box'], detection['bounding_box']) >= IOU_THRESHOLD:
+                unmatched_reference.remove(reference)
+                matches += 1
+                break
+    return matches
+
+# runs model on all frames, returns latencies in milliseconds and filtered detections
+def run_backend(detection_model, frames):
+    input_tensors = [tf.convert_to_tensor(frame[np.newaxis], dtype=tf.uint8) for frame in frames]
+    for input_tensor in input_tensors[:WARM_UP_RUNS]:
+        detection_model(input_tensor)
+
+    latencies, detections = [], []
+    for input_tensor in input_tensors:
+        start_time = time.perf_counter()
+        object_detections = detection_model(input_tensor)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        detections.append(filter_detections(object_detections, CATEGORY_INDEX, DETECTION_THRESHOLD))
+    return latencies, detections
+
+# reads images as RGB frames
+def load_frames(image_directory, max_frames):
+    frames = []
+    for image_path in sorted(glob.glob(os.path.join(image_directory, '*.jpg')))[:max_frames]:
+        frame = cv2.imread(image_path)
+        if frame is not None:
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares latency and detections of SavedModel and TFLite backends.')
+    parser.add_argument('--images', default=PATH_FOR_SAVING_IMAGE, help='directory with .jpg frames')
+    parser.add_argument('--max-frames', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=os.cpu_count())
+    parser.add_argument('--quantization', choices=QUANTIZATION_TYPES, nargs='+', default=list(QUANTIZATION_TYPES))
+    arguments = parser.parse_args()
+
+    frames = load_frames(arguments.images, arguments.max_frames)
+    if not frames:
+        print(f"No .jpg frames found in {arguments.images}")
+        return
+
+    backends = {'saved_model': load_tensorflow_model(MODEL_DIR)}
+    for quantization in arguments.quantization:
+        backends[f'tflite_{quantization}'] = load_tflite_model(quantization, arguments.threads, calibration_image_directory=arguments.images)
+
+    reference_detections = None
+    print(f"{'backend':<16}{'mean ms':>10}{'p95 ms':>10}{'detections':>12}{'recall':>10}{'precision':>11}")
+    for backend_name, detection_model in backends.items():
+        if detection_model is None:
+            print(f"{backend_name:<16} not available")
+            continue
+
+        latencies, detections = run_backend(detection_model, frames)
+        # first available backend (SavedModel) is the reference for accuracy
+        if reference_detections is None:
+            reference_detections = detections
+
+        matches = sum(count_matching_detections(reference, detected) for reference, detected in zip(reference_detections, detections))
+        number_of_reference = sum(len(reference) for reference in reference_detections)
+        number_of_detections = sum(len(detected) for detected in detections)
+        recall = matches / number_of_reference if number_of_reference else 1.0
+        precision = matches / number_of_detections if number_of_detections else 1.0
+
+        print(f"{backend_name:<16}{np.mean(latencies):>10.1f}{np.percentile(latencies, LATENCY_PERCENTILE):>10.1f}"
+              f"{number_of_detections:>12}{recall:>10.2f}{precision:>11.2f}")
+
+if __name__ == "__main__":
+    main()
+
+# References:
+# https://docs.python.org/3/library/argparse.html
+# https://docs.python.org/3/library/time.html#time.perf_counter
+# https://en.wikipedia.org/wiki/Jaccard_index
+# https://www.tensorflow.org/lite/performance/measurement
+
+""" END - Documentation and research materials were used in the development of the code,
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. """
@@ -0,0 +1,88 @@
+import unittest
+import numpy as np
+from app.computer_vision.adaptive_analysis_scheduler import AdaptiveAnalysisScheduler, IDLE_STATE, SUSPECTED_STATE, ACTIVE_STATE
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestAdaptiveAnalysisScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = AdaptiveAnalysisScheduler(idle_analysis_fps=5.0, confirmation_frames=2, suspicion_timeout=1.0, cool_down_time=5.0)
+        self.empty_frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        self.moving_frame = self.empty_frame.copy()
+        self.moving_frame[100:200, 200:300] = 255
+
+    def suspect_motion(self):
+        self.scheduler.should_analyse_frame(self.empty_frame, 0.0)
+        return self.scheduler.should_analyse_frame(self.moving_frame, 0.2)
+
+    def test_idle_frames_are_checked_at_reduced_rate(self):
+        self.assertFalse(self.scheduler.should_analyse_frame(self.empty_frame, 0.0))
+        self.assertFalse(self.scheduler.should_analyse_frame(self.moving_frame, 0.1))
+
+        statistics = self.scheduler.get_statistics()
+        self.assertEqual(statistics['probed_frames'], 1)
+        self.assertEqual(statistics['skipped_frames'], 1)
+        self.assertEqual(self.scheduler.state, IDLE_STATE)
+
+    def test_change_in_idle_check_makes_motion_suspected(self):
+        self.assertTrue(self.suspect_motion())
+
+        self.assertEqual(self.scheduler.state, SUSPECTED_STATE)
+        self.assertFalse(self.scheduler.is_active())
+        self.assertTrue(self.scheduler.should_analyse_frame(self.empty_frame, 0.21))
+
+    def test_confirmed_motion_makes_scheduler_active(self):
+        self.suspect_motion()
+
+        self.scheduler.report_motion(True, 0.3)
+        self.assertEqual(self.scheduler.state, SUSPECTED_STATE)
+        self.scheduler.report_motion(True, 0.4)
+
+        self.assertTrue(self.scheduler.is_active())
+
+    def test_unconfirmed_suspicion_goes_back_to_idle(self):
+        self.suspect_motion()
+
+        self.scheduler.report_motion(False, 0.5)
+        self.assertEqual(self.scheduler.state, SUSPECTED_STATE)
+        self.scheduler.report_motion(False, 1.5)
+
+        self.assertEqual(self.scheduler.state, IDLE_STATE)
+
+    def test_active_state_is_kept_for_cool_down_time(self):
+        self.suspect_motion()
+        self.scheduler.report_motion(True, 0.3)
+        self.scheduler.report_motion(True, 0.4)
+
+        self.scheduler.report_motion(False, 4.0)
+        self.assertEqual(self.scheduler.state, ACTIVE_STATE)
+        self.scheduler.report_motion(False, 5.5)
+
+        self.assertEqual(self.scheduler.state, IDLE_STATE)
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
@@ -0,0 +1,110 @@
+import unittest
+import wave
+import time
+import tempfile
+import sys
+import os
+import numpy as np
+from unittest.mock import MagicMock, patch
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.camera.audio_capture import AudioRingBuffer, AudioCaptureDevice, WaveFileSink
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestAudioCapture(unittest.TestCase):
+
+    def test_ring_buffer_keeps_newest_samples(self):
+        ring_buffer = AudioRingBuffer(100, 2, 100)
+
+        for chunk_number in range(5):
+            samples = np.full(2 * 30, chunk_number, dtype=np.int16)
+            ring_buffer.write(samples, end_time=float(chunk_number + 1) * 0.3)
+
+        self.assertEqual(len(ring_buffer), 100)
+        self.assertEqual(ring_buffer.samples.shape, (100, 2))
+
+        samples, first_sample_time = ring_buffer.get_samples_since(1.0)
+        self.assertEqual(samples.shape, (50, 2))
+        self.assertAlmostEqual(first_sample_time, 1.0)
+        self.assertEqual(samples[:20, 0].tolist(), [3] * 20)
+        self.assertEqual(samples[20:, 0].tolist(), [4] * 30)
+
+    def test_ring_buffer_returns_at_most_buffered_samples(self):
+        ring_buffer = AudioRingBuffer(100, 1, 100)
+        ring_buffer.write(np.arange(40, dtype=np.int16), end_time=10.0)
+
+        samples, first_sample_time = ring_buffer.get_samples_since(0.0)
+
+        self.assertEqual(samples[:, 0].tolist(), list(range(40)))
+        self.assertAlmostEqual(first_sample_time, 9.6)
+
+    def test_wave_file_sink_writes_while_recording(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sound_raw.wav')
+            sink = WaveFileSink(path, 8000, 1, 2)
+            sink.write_audio(np.zeros(800, dtype=np.int16).tobytes())
+            sink.write_audio(np.zeros(800, dtype=np.int16).tobytes())
+
+            self.assertTrue(sink.close())
+            with wave.open(path, 'rb') as wave_file:
+                self.assertEqual(wave_file.getnframes(), 1600)
+
+    @patch('app.camera.audio_capture.pyaudio.PyAudio')
+    def test_one_reader_feeds_pre_roll_and_sinks(self, mock_pyaudio):
+        sound_stream = MagicMock()
+        sound_stream.read.side_effect = lambda chunk_size, exception_on_overflow=False: (time.sleep(0.01), np.ones(chunk_size, dtype=np.int16).tobytes())[1]
+        mock_pyaudio.return_value.get_default_input_device_info.return_value = {'index': 0}
+        mock_pyaudio.return_value.get_device_info_by_index.return_value = {'defaultSampleRate': 8000, 'maxInputChannels': 1}
+        mock_pyaudio.return_value.get_sample_size.return_value = 2
+        mock_pyaudio.return_value.open.return_value = sound_stream
+
+        audio_capture = AudioCaptureDevice(chunk_size=80, pre_roll_duration=1.0)
+        self.assertTrue(audio_capture.start())
+        try:
+            time.sleep(0.2)
+            sink = MagicMock()
+            audio_capture.attach(sink, start_time=time.time() - 0.5)
+            time.sleep(0.1)
+            audio_capture.detach(sink)
+        finally:
+            audio_capture.stop()
+
+        # first write is pre-roll from ring buffer, then chunks read by the single reader
+        pre_roll, first_sample_time = sink.write_audio.call_args_list[0][0]
+        self.assertGreater(len(pre_roll), 2 * 80)
+        self.assertGreater(sink.write_audio.call_count, 1)
+        self.assertLess(first_sample_time, time.time())
+        sound_stream.close.assert_called_once()
+        self.assertFalse(audio_capture.is_running())
+
+    @patch('app.camera.audio_capture.pyaudio.PyAudio')
+    def test_missing_device_is_reported(self, mock_pyaudio):
+        mock_pyaudio.return_value.get_default_input_device_info.side_effect = IOError("no device")
+
+        self.assertFalse(AudioCaptureDevice().start())
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
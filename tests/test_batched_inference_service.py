@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+import tensorflow as tf
+from app.algorithms_object_detection.batched_inference_service import BatchedInferenceService, model_supports_batching
+
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+# fake detection model, score of every frame is its first pixel value so results can be matched to frames
+def fake_detection_model(input_tensor):
+    batch = input_tensor.numpy()
+    batch_size = batch.shape[0]
+    return {
+        'detection_boxes': tf.constant(np.zeros((batch_size, 1, 4), dtype=np.float32)),
+        'detection_scores': tf.constant(batch[:, 0, 0, 0].reshape(batch_size, 1).astype(np.float32)),
+        'detection_classes': tf.constant(np.ones((batch_size, 1), dtype=np.float32))
+    }
+
+
+class TestBatchedInferenceService(unittest.TestCase):
+    def setUp(self):
+        self.frames = [np.full((4, 4, 3), value, dtype=np.uint8) for value in (1, 2, 3)]
+
+    def test_frames_are_run_in_one_batch(self):
+        detection_model = MagicMock(side_effect=fake_detection_model)
+        inference_service = BatchedInferenceService(detection_model, max_batch_size=3, max_batch_wait_time=1.0)
+        self.addCleanup(inference_service.stop)
+
+        futures = [inference_service.submit(frame) for frame in self.frames]
+        scores = [future.result(timeout=5)['detection_scores'][0, 0] for future in futures]
+
+        self.assertEqual(scores, [1, 2, 3])
+        detection_model.assert_called_once()
+        self.assertEqual(detection_model.call_args[0][0].shape[0], 3)
+
+    def test_falls_back_to_single_frames(self):
+        def single_frame_model(input_tensor):
+            if input_tensor.shape[0] != 1:
+                raise ValueError('batch size must be 1')
+            return fake_detection_model(input_tensor)
+
+        inference_service = BatchedInferenceService(single_frame_model, max_batch_size=3, max_batch_wait_time=1.0)
+        self.addCleanup(inference_service.stop)
+
+        futures = [inference_service.submit(frame) for frame in self.frames]
+        scores = [future.result(timeout=5)['detection_scores'][0, 0] for future in futures]
+
+        self.assertEqual(scores, [1, 2, 3])
+        self.assertFalse(inference_service.supports_batching)
+
+    def test_model_with_batch_size_one_signature(self):
+        detection_model = MagicMock()
+        detection_model.signatures = {
+            'serving_default': MagicMock(structured_input_signature=((), {'input_tensor': tf.TensorSpec([1, None, None, 3], tf.uint8)}))
+        }
+
+        self.assertFalse(model_supports_batching(detection_model))
+
+if __name__ == '__main__':
+    unittest.main()
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
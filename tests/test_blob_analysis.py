@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from app.computer_vision.blob_analysis import find_motion_blobs
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestBlobAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.mask = np.zeros((180, 320), dtype=np.uint8)
+        self.mask[10:20, 10:30] = 255  # 200 pixels
+        self.mask[100:150, 200:260] = 255  # 3000 pixels
+        self.mask[170, 5] = 255  # single pixel
+
+    def test_blobs_are_found_in_one_pass(self):
+        motion_blobs = find_motion_blobs(self.mask)
+        self.assertEqual(len(motion_blobs), 3)
+        self.assertEqual(sorted(motion_blobs.areas.tolist()), [1.0, 200.0, 3000.0])
+        self.assertIn((200, 100, 60, 50), motion_blobs.get_regions())
+
+    def test_small_blobs_are_dropped(self):
+        motion_blobs = find_motion_blobs(self.mask, min_area=10)
+        self.assertEqual(len(motion_blobs), 2)
+        self.assertEqual(motion_blobs.get_biggest_blob(), (200, 100, 60, 50, 3000.0))
+
+    def test_blobs_are_scaled_to_frame(self):
+        motion_blobs = find_motion_blobs(self.mask, min_area=10).scale_to((640, 360))
+        self.assertEqual(motion_blobs.get_biggest_blob(), (400, 200, 120, 100, 12000.0))
+        np.testing.assert_allclose(motion_blobs.centroids[np.argmax(motion_blobs.areas)], (459.0, 249.0))
+
+    def test_empty_mask(self):
+        motion_blobs = find_motion_blobs(np.zeros((90, 160), dtype=np.uint8))
+        self.assertEqual(len(motion_blobs), 0)
+        self.assertIsNone(motion_blobs.get_biggest_blob())
+        self.assertEqual(motion_blobs.get_regions(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from app.camera.camera_manager import CameraManager, parse_camera_source, create_camera_id
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestCameraManager(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('app.camera.camera_manager.VideoCamera')
+        self.mocked_video_camera = patcher.start()
+        self.mocked_video_camera.side_effect = lambda **kwargs: MagicMock(**kwargs)
+        self.addCleanup(patcher.stop)
+        self.camera_manager = CameraManager(max_number_of_cameras=2, analysis_workers=1)
+        self.addCleanup(self.camera_manager.release_all_cameras)
+
+    def test_camera_is_created_once_per_user_and_source(self):
+        video_camera, created = self.camera_manager.get_or_create_camera(MagicMock(), 1, '0')
+        same_camera, created_again = self.camera_manager.get_or_create_camera(MagicMock(), 1, 0)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertIs(video_camera, same_camera)
+        self.assertEqual(self.mocked_video_camera.call_args.kwargs['camera_source'], 0)
+
+    def test_cameras_share_analysis_pool(self):
+        self.camera_manager.get_or_create_camera(MagicMock(), 1, 0)
+        self.camera_manager.get_or_create_camera(MagicMock(), 1, 1)
+
+        executors = [call.kwargs['analysis_executor'] for call in self.mocked_video_camera.call_args_list]
+        self.assertIs(executors[0], executors[1])
+
+    def test_maximum_number_of_cameras(self):
+        self.camera_manager.get_or_create_camera(MagicMock(), 1, 0)
+        self.camera_manager.get_or_create_camera(MagicMock(), 2, 0)
+
+        with self.assertRaises(RuntimeError):
+            self.camera_manager.get_or_create_camera(MagicMock(), 3, 0)
+
+    def test_cameras_for_user(self):
+        self.camera_manager.get_or_create_camera(MagicMock(), 1, 0)
+        self.camera_manager.get_or_create_camera(MagicMock(), 2, 0)
+
+        user_cameras = self.camera_manager.get_cameras_for_user(1)
+
+        self.assertEqual(list(user_cameras.keys()), [create_camera_id(1, 0)])
+
+    def test_remove_camera_stops_live_feed(self):
+        video_camera, _ = self.camera_manager.get_or_create_camera(MagicMock(), 1, 0)
+
+        self.camera_manager.remove_camera(create_camera_id(1, 0))
+
+        video_camera._stop_live_feed.assert_called_once()
+        self.assertIsNone(self.camera_manager.get_camera_for_user(1, 0))
+
+    def test_parse_camera_source(self):
+        self.assertEqual(parse_camera_source(None), 0)
+        self.assertEqual(parse_camera_source('2'), 2)
+        self.assertEqual(parse_camera_source('rtsp://camera/stream'), 'rtsp://camera/stream')
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
@@ -0,0 +1,88 @@
+import unittest
+import threading
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.camera.clip_finalisation import ClipFinalisationJob, ClipFinalisationPool, RELEASING_STATE, MUXING_STATE, READY_STATE, FAILED_STATE
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestClipFinalisation(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ClipFinalisationPool(1)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_job_goes_through_states(self):
+        job = ClipFinalisationJob('video.mp4', None)
+
+        def finalise(job):
+            job.change_state(RELEASING_STATE)
+            job.change_state(MUXING_STATE)
+            job.final_video_path = 'video_combined.mp4'
+
+        self.pool.submit(job, finalise)
+
+        self.assertTrue(job.wait(5))
+        self.assertEqual(job.state, READY_STATE)
+        self.assertEqual(job.final_video_path, 'video_combined.mp4')
+        self.assertGreaterEqual(job.get_finalisation_time(), 0)
+
+    def test_invalid_state_change(self):
+        job = ClipFinalisationJob('video.mp4', None)
+
+        with self.assertRaises(ValueError):
+            job.change_state(MUXING_STATE)
+
+    def test_failed_job_calls_callback(self):
+        job = ClipFinalisationJob('video.mp4', None)
+        finished_jobs = []
+
+        def finalise(job):
+            job.change_state(RELEASING_STATE)
+            raise RuntimeError("ffmpeg failed")
+
+        self.pool.submit(job, finalise, finished_jobs.append).result(5)
+
+        self.assertTrue(job.is_finished())
+        self.assertEqual(job.state, FAILED_STATE)
+        self.assertIn("ffmpeg failed", job.error)
+        self.assertEqual(finished_jobs, [job])
+
+    def test_slow_job_does_not_block_caller(self):
+        release_event = threading.Event()
+        job = ClipFinalisationJob('video.mp4', None)
+
+        self.pool.submit(job, lambda job: release_event.wait(5))
+
+        self.assertFalse(job.wait(0.1))
+        release_event.set()
+        self.assertTrue(job.wait(5))
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
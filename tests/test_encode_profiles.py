@@ -0,0 +1,64 @@
+import unittest
+import cv2
+import numpy as np
+from app.computer_vision.encode_profiles import EncodeProfile, ENCODE_PROFILES
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestEncodeProfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = np.random.default_rng(0).integers(0, 255, (360, 640, 3), dtype=np.uint8)
+
+    def test_profile_resizes_frame(self):
+        jpeg = ENCODE_PROFILES['mobile'].encode(self.frame)
+        decoded_frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(decoded_frame.shape, (240, 426, 3))
+
+    def test_archive_profile_keeps_captured_size(self):
+        jpeg = ENCODE_PROFILES['archive'].encode(self.frame)
+        decoded_frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(decoded_frame.shape, self.frame.shape)
+
+    def test_lower_quality_gives_smaller_frames(self):
+        sizes = [len(ENCODE_PROFILES[name].encode(self.frame)) for name in ('thumbnail', 'mobile', 'desktop', 'archive')]
+        self.assertEqual(sizes, sorted(sizes))
+
+    def test_max_fps_skips_frames(self):
+        encode_profile = EncodeProfile('test', jpeg_quality=70, max_fps=2)
+        self.assertTrue(encode_profile.is_frame_due(None, 10.0))
+        self.assertFalse(encode_profile.is_frame_due(10.0, 10.4))
+        self.assertTrue(encode_profile.is_frame_due(10.0, 10.5))
+        self.assertTrue(EncodeProfile('test', jpeg_quality=70).is_frame_due(10.0, 10.01))
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
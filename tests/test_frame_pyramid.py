@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+from app.computer_vision.frame_pyramid import FramePyramid, letterbox, map_letterboxed_boxes_to_frame, scale_regions
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestFramePyramid(unittest.TestCase):
+
+    def setUp(self):
+        self.native_frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+        self.frame_pyramid = FramePyramid(self.native_frame)
+
+    def test_levels_have_their_sizes(self):
+        self.assertEqual(self.frame_pyramid.get_analysis_frame().shape, (360, 640, 3))
+        self.assertEqual(self.frame_pyramid.get_blurred_gray_frame().shape, (360, 640))
+        self.assertEqual(self.frame_pyramid.get_mask_level(0).shape, (180, 320))
+        self.assertEqual(self.frame_pyramid.get_mask_level(1).shape, (90, 160))
+
+    def test_levels_are_computed_once(self):
+        self.assertIs(self.frame_pyramid.get_analysis_frame(), self.frame_pyramid.get_analysis_frame())
+        self.assertIs(self.frame_pyramid.get_mask_level(1), self.frame_pyramid.get_mask_level(1))
+
+    def test_analysis_frame_of_same_size_is_copy(self):
+        native_frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        analysis_frame = FramePyramid(native_frame).get_analysis_frame()
+        analysis_frame[:] = 255
+        self.assertEqual(native_frame.max(), 0)
+
+    def test_regions_are_scaled_to_native_frame(self):
+        self.assertEqual(self.frame_pyramid.scale_regions_to_native([(10, 20, 30, 40)]), [(20, 40, 60, 80)])
+        self.assertEqual(scale_regions([(20, 40, 60, 80)], (1280, 720), (640, 360)), [(10, 20, 30, 40)])
+
+    def test_mask_frames_use_mask_scale(self):
+        self.assertEqual(self.frame_pyramid.get_blurred_mask_frame(0.5).shape, (180, 320))
+        self.assertEqual(self.frame_pyramid.get_blurred_mask_frame(0.25).shape, (90, 160))
+        self.assertEqual(self.frame_pyramid.get_mask_color_frame(0.5).shape, (180, 320, 3))
+        self.assertIs(self.frame_pyramid.get_blurred_mask_frame(1.0), self.frame_pyramid.get_blurred_gray_frame())
+        self.assertIs(self.frame_pyramid.get_blurred_mask_frame(0.5), self.frame_pyramid.get_blurred_mask_frame(0.5))
+
+
+class TestLetterbox(unittest.TestCase):
+
+    def test_letterbox_keeps_proportions(self):
+        image, (scale, x_offset, y_offset) = letterbox(np.full((360, 640, 3), 200, dtype=np.uint8), 320)
+
+        self.assertEqual(image.shape, (320, 320, 3))
+        self.assertEqual((scale, x_offset, y_offset), (0.5, 0, 70))
+        self.assertEqual(image[:70].max(), 0)
+        self.assertEqual(image[70:250].min(), 200)
+
+    def test_boxes_are_mapped_back_to_frame(self):
+        _, letterbox_geometry = letterbox(np.zeros((360, 640, 3), dtype=np.uint8), 320)
+
+        # box covering whole picture area of letterboxed image is whole frame
+        boxes = map_letterboxed_boxes_to_frame([[70 / 320, 0.0, 250 / 320, 1.0]], letterbox_geometry, 640, 360, 320)
+
+        np.testing.assert_allclose(boxes, [[0.0, 0.0, 1.0, 1.0]], atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
@@ -0,0 +1,98 @@
+import unittest
+import numpy as np
+from app.camera.frame_ring_buffer import FrameRingBuffer, FrameRingConsumer
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestFrameRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.ring_buffer = FrameRingBuffer(4, 36, 64)
+
+    def write_frames(self, number_of_frames):
+        for value in range(number_of_frames):
+            self.ring_buffer.write_frame(np.full((36, 64, 3), value, dtype=np.uint8))
+
+    def test_read_latest_frame(self):
+        consumer = FrameRingConsumer(self.ring_buffer, 'streaming')
+        self.write_frames(3)
+
+        frame = consumer.read_latest_frame(timeout=0)
+
+        self.assertEqual(frame[0, 0, 0], 2)
+        self.assertEqual(consumer.last_sequence, 2)
+
+    def test_latest_reader_counts_skipped_frames(self):
+        consumer = FrameRingConsumer(self.ring_buffer, 'analysis')
+        self.write_frames(1)
+        consumer.read_latest_frame(timeout=0)
+        self.write_frames(3)
+
+        consumer.read_latest_frame(timeout=0)
+
+        self.assertEqual(consumer.dropped_frames, 2)
+        self.assertEqual(consumer.consumed_frames, 2)
+
+    def test_next_reader_reads_in_order(self):
+        consumer = FrameRingConsumer(self.ring_buffer, 'recording')
+        self.write_frames(3)
+
+        values = [consumer.read_next_frame(timeout=0)[0, 0, 0] for _ in range(3)]
+
+        self.assertEqual(values, [0, 1, 2])
+        self.assertEqual(consumer.dropped_frames, 0)
+
+    def test_next_reader_skips_overwritten_frames(self):
+        consumer = FrameRingConsumer(self.ring_buffer, 'recording')
+        self.write_frames(1)
+        consumer.read_next_frame(timeout=0)
+        self.write_frames(10)
+
+        frame = consumer.read_next_frame(timeout=0)
+
+        # newest 3 of 4 slots are still readable, one slot is kept free for the writer
+        self.assertEqual(consumer.last_sequence, 8)
+        self.assertEqual(frame[0, 0, 0], 7)
+        self.assertEqual(consumer.dropped_frames, 7)
+
+    def test_no_new_frame(self):
+        consumer = FrameRingConsumer(self.ring_buffer, 'streaming')
+
+        self.assertIsNone(consumer.read_latest_frame(timeout=0))
+
+    def test_frame_in_writing_is_not_read(self):
+        output_frame = np.zeros((36, 64, 3), dtype=np.uint8)
+        sequence, _ = self.ring_buffer.acquire_slot_for_writing()
+
+        self.assertFalse(self.ring_buffer.read_frame(sequence, output_frame))
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
@@ -0,0 +1,87 @@
+import io
+import unittest
+import numpy as np
+from app.camera.live_stream import LiveStream
+from app.camera.video_muxer import is_muxer_available
+
+if is_muxer_available():
+    import av
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestLiveStream(unittest.TestCase):
+
+    def setUp(self):
+        self.live_stream = LiveStream(playlist_length=2)
+
+    def test_playlist_lists_newest_segments(self):
+        self.live_stream.set_init_segment(b'init')
+        self.assertIsNone(self.live_stream.get_playlist())
+
+        for index in range(4):
+            self.live_stream.add_fragment(f'fragment {index}'.encode(), index * 1.5)
+
+        playlist = self.live_stream.get_playlist()
+        self.assertIn('#EXT-X-MEDIA-SEQUENCE:1', playlist)
+        self.assertIn('#EXT-X-TARGETDURATION:2', playlist)
+        self.assertIn('#EXT-X-MAP:URI="init_1.mp4"', playlist)
+        self.assertIn('#EXTINF:1.500,\nsegment_2.m4s', playlist)
+        self.assertNotIn('segment_3.m4s', playlist)  # duration is known when next fragment arrives
+        self.assertEqual(self.live_stream.get_segment(2), b'fragment 2')
+        self.assertEqual(self.live_stream.get_init_segment(1), b'init')
+
+    def test_new_init_segment_drops_old_segments(self):
+        self.live_stream.set_init_segment(b'init')
+        self.live_stream.add_fragment(b'fragment 0', 0.0)
+        self.live_stream.add_fragment(b'fragment 1', 1.0)
+
+        self.live_stream.set_init_segment(b'new init')
+
+        self.assertIsNone(self.live_stream.get_segment(0))
+        self.assertIsNone(self.live_stream.get_init_segment(1))
+        self.assertFalse(self.live_stream.wait_for_segments(0.01))
+
+    @unittest.skipIf(not is_muxer_available(), "PyAV is not installed")
+    def test_own_encoder_runs_while_somebody_watches(self):
+        background = np.random.default_rng(0).integers(0, 255, (360, 640, 3), dtype=np.uint8)
+        self.live_stream.report_viewer()
+        self.live_stream.start_encoder(640, 360, 10.0)
+
+        for index in range(25):
+            self.live_stream.write(np.roll(background, index * 3, axis=1), 1000.0 + index / 10)
+
+        self.assertTrue(self.live_stream.wait_for_segments(1))
+        segment = self.live_stream.get_segment(0)
+        with av.open(io.BytesIO(self.live_stream.get_init_segment(1) + segment)) as container:
+            self.assertEqual(len(list(container.decode(video=0))), 10)
+
+        # encoder stops when nobody requested stream for viewer timeout
+        self.live_stream.last_request_time = 0.0
+        self.live_stream.write(background)
+        self.assertFalse(self.live_stream.is_encoding())
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
@@ -1,7 +1,8 @@
 import unittest
 from unittest.mock import MagicMock, patch
+import cv2
 import numpy as np
-from app.algorithms_motion_detection.lukas_kanade_orb_method import LukasKanadeOrb 
+from app.algorithms_motion_detection.lukas_kanade_orb_method import LukasKanadeOrb, GridLukasKanadeOrb, ORB_FEATURES
 
 """ START - Documentation and research materials were used in the development of the code, 
 including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
@@ -45,6 +46,48 @@ class TestLukasKanadeOrb(unittest.TestCase):
         self.assertTrue(substantial_motion)  
 
 
+class TestGridLukasKanadeOrb(unittest.TestCase):
+    def setUp(self):
+        texture = cv2.GaussianBlur(np.random.default_rng(0).integers(0, 255, (400, 700), dtype=np.uint8), (5, 5), 0)
+        self.frames = [texture[20:380, 20:660].copy() for _ in range(3)] + [texture[20:380, 26:666].copy()]
+        lucas_kanade_parameters = dict(winSize=(21, 21), maxLevel=3, criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 15, 0.02))
+        self.tracker = GridLukasKanadeOrb(cv2.ORB_create(nfeatures=ORB_FEATURES), lucas_kanade_parameters, 2.0, target_keypoints=64, grid_size=(4, 4))
+
+    def test_keypoints_are_spread_over_grid(self):
+        self.tracker.detect_initial_keypoints(self.frames[0])
+        cell_indexes = self.tracker._get_cell_indexes(self.tracker.previous_points.reshape(-1, 2), self.frames[0].shape)
+        self.assertLessEqual(np.bincount(cell_indexes).max(), self.tracker.points_per_cell)
+        self.assertGreater(len(np.unique(cell_indexes)), 8)
+
+    def test_motion_is_detected_only_when_scene_moves(self):
+        self.tracker.detect_initial_keypoints(self.frames[0])
+        motion = [self.tracker.track_points_of_interest(previous_frame, frame)[0] for previous_frame, frame in zip(self.frames, self.frames[1:])]
+        self.assertEqual(motion, [False, False, True])
+
+    def test_pyramid_of_previous_frame_is_reused(self):
+        self.tracker.detect_initial_keypoints(self.frames[0])
+        with patch('cv2.buildOpticalFlowPyramid', side_effect=cv2.buildOpticalFlowPyramid) as build_pyramid:
+            for previous_frame, frame in zip(self.frames, self.frames[1:]):
+                self.tracker.track_points_of_interest(previous_frame, frame)
+        # first call builds both pyramids, every next call only the current one
+        self.assertEqual(build_pyramid.call_count, len(self.frames))
+
+    def test_lost_points_are_replaced_in_empty_cells(self):
+        self.tracker.detect_initial_keypoints(self.frames[0])
+        self.tracker.previous_points = self.tracker.previous_points[:2]
+        _, points = self.tracker.track_points_of_interest(self.frames[0], self.frames[1])
+        self.assertGreater(len(points), 2)
+
+    def test_points_failing_forward_backward_check_are_dropped(self):
+        self.tracker.detect_initial_keypoints(self.frames[0])
+        # unrelated image, points cannot be tracked back to where they started
+        noise = np.random.default_rng(1).integers(0, 255, self.frames[0].shape, dtype=np.uint8)
+        self.tracker.target_keypoints = 0  # no re-detection, only surviving points are left
+        number_of_points = len(self.tracker.previous_points)
+        _, points = self.tracker.track_points_of_interest(self.frames[0], noise)
+        self.assertLess(len(points), number_of_points / 2)
+
+
 if __name__ == '__main__':
     unittest.main()
     
@@ -1,5 +1,6 @@
 import unittest
-from unittest.mock import patch
+import tracemalloc
+import cv2
 import numpy as np
 from app.algorithms_motion_detection.mckenna_method import McKennaMethod  
 
@@ -16,20 +17,63 @@ class TestMcKennaMethod(unittest.TestCase):
         self.mckenna = McKennaMethod(self.alpha, self.beta, self.thresholds)
 
     def test_mckenna_model_update(self):
-        frame_1 = np.random.rand(360, 640, 3).astype(np.float32) * 255
-        frame_2 = np.random.rand(360, 640, 3).astype(np.float32) * 255
+        random_generator = np.random.default_rng(0)
+        frame_1 = random_generator.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+        frame_2 = random_generator.integers(0, 255, (360, 640, 3), dtype=np.uint8)
 
-        with patch('numpy.gradient', return_value=[np.zeros_like(frame_1), np.zeros_like(frame_1)]):
-            self.mckenna.process_one_frame(frame_1) 
-            
-        initial_mean = self.mckenna.mean_gaussian.copy()
-        initial_variance = self.mckenna.variance_gaussian.copy()
+        self.mckenna.process_one_frame(frame_1)
+        mean_gaussian, variance_gaussian = self.mckenna.mean_gaussian, self.mckenna.variance_gaussian
+        mean_edge, variance_edge = self.mckenna.mean_edge, self.mckenna.variance_edge
+        initial_mean, initial_variance = mean_gaussian.copy(), variance_gaussian.copy()
+        initial_mean_edge, initial_variance_edge = mean_edge.copy(), variance_edge.copy()
 
-        with patch('numpy.gradient', return_value=[np.zeros_like(frame_2), np.zeros_like(frame_2)]):
-            self.mckenna.process_one_frame(frame_2)  
+        self.mckenna.process_one_frame(frame_2)
 
-        self.assertNotEqual(np.all(initial_mean == self.mckenna.mean_gaussian), True)
-        self.assertNotEqual(np.all(initial_variance == self.mckenna.variance_gaussian), True)
+        # model arrays are updated in place
+        self.assertIs(self.mckenna.mean_gaussian, mean_gaussian)
+        self.assertIs(self.mckenna.variance_gaussian, variance_gaussian)
+        self.assertIs(self.mckenna.mean_edge, mean_edge)
+
+        # running mean and variance move towards chromaticity and edges of new frame by learning rates
+        chromaticity, edges = self.mckenna.chromaticity_value, self.mckenna.edges
+        np.testing.assert_allclose(mean_gaussian, (1 - self.alpha) * initial_mean + self.alpha * chromaticity, rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(variance_gaussian, (1 - self.alpha) * initial_variance + self.alpha * (chromaticity - initial_mean) ** 2, rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(mean_edge, (1 - self.beta) * initial_mean_edge + self.beta * edges, rtol=1e-5, atol=1e-4)
+        np.testing.assert_allclose(variance_edge, (1 - self.beta) * initial_variance_edge + self.beta * (edges - initial_mean_edge) ** 2, rtol=1e-5, atol=1e-3)
+
+    def create_noisy_frames(self, number_of_frames):
+        random_generator = np.random.default_rng(0)
+        background = random_generator.integers(10, 245, (360, 640, 3), dtype=np.int16)
+        return [(background + random_generator.integers(-3, 4, background.shape)).astype(np.uint8) for _ in range(number_of_frames)]
+
+    def test_per_pixel_model_detects_only_changed_region(self):
+        for precision in ('float32', 'float16'):
+            mckenna = McKennaMethod(precision=precision)
+            frames = self.create_noisy_frames(20)
+            for frame in frames:
+                mckenna.process_one_frame(frame)
+
+            frame = frames[-1].copy()
+            cv2.rectangle(frame, (100, 100), (200, 200), (0, 0, 255), -1)
+            mask = mckenna.process_one_frame(frame)
+            self.assertEqual(mask.shape, (360, 640, 3))
+            self.assertEqual(mask[110:190, 110:190].min(), 1)
+            self.assertLess(mask[250:, 300:].mean(), 0.01)
+
+    def test_buffers_are_reused_between_frames(self):
+        mckenna = McKennaMethod()
+        frames = self.create_noisy_frames(4)
+        first_mask = mckenna.process_one_frame(frames[0])
+        mckenna.process_one_frame(frames[1])
+
+        tracemalloc.start()
+        mask = mckenna.process_one_frame(frames[2])
+        allocated_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertIs(mask, first_mask)
+        # previous implementation allocated more than 20 float32 frames per call
+        self.assertLess(allocated_bytes, frames[2].nbytes)
 
 
 if __name__ == '__main__':
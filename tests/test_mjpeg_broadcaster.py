@@ -0,0 +1,98 @@
+import threading
+import unittest
+from app.camera.mjpeg_broadcaster import MjpegBroadcaster
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestMjpegBroadcaster(unittest.TestCase):
+
+    def setUp(self):
+        self.broadcaster = MjpegBroadcaster(queue_size=2, poll_timeout=0.5)
+
+    def test_all_subscribers_get_same_bytes(self):
+        first_viewer = self.broadcaster.subscribe('desktop')
+        second_viewer = self.broadcaster.subscribe('desktop')
+
+        self.broadcaster.publish('desktop', b'frame 0')
+
+        self.assertIs(first_viewer.get_frame(0.1), second_viewer.get_frame(0.1))
+        self.assertEqual(self.broadcaster.get_statistics()['published_frames'], {'desktop': 1})
+
+    def test_slow_subscriber_drops_oldest_frames(self):
+        slow_viewer = self.broadcaster.subscribe('desktop')
+        fast_viewer = self.broadcaster.subscribe('desktop')
+
+        for index in range(5):
+            self.broadcaster.publish('desktop', f'frame {index}'.encode())
+            self.assertEqual(fast_viewer.get_frame(0.1), f'frame {index}'.encode())
+
+        # publishing never blocked, slow viewer only keeps newest frames
+        self.assertEqual(slow_viewer.get_frame(0.1), b'frame 3')
+        self.assertEqual(slow_viewer.get_frame(0.1), b'frame 4')
+        self.assertIsNone(slow_viewer.get_frame(0.01))
+        self.assertEqual(slow_viewer.dropped_frames, 3)
+        self.assertEqual(fast_viewer.dropped_frames, 0)
+
+    def test_unsubscribed_viewer_gets_no_frames(self):
+        viewer = self.broadcaster.subscribe('desktop')
+        self.broadcaster.unsubscribe(viewer)
+
+        self.broadcaster.publish('desktop', b'frame 0')
+
+        self.assertIsNone(viewer.get_frame(0.01))
+        self.assertEqual(self.broadcaster.number_of_subscribers(), 0)
+
+    def test_waits_for_viewers(self):
+        self.assertEqual(self.broadcaster.wait_for_viewers(0.01), [])
+
+        threading.Timer(0.05, self.broadcaster.subscribe, args=('mobile',)).start()
+
+        self.assertEqual(self.broadcaster.wait_for_viewers(1), ['mobile'])
+
+    def test_subscribers_only_get_frames_of_their_profile(self):
+        mobile_viewer = self.broadcaster.subscribe('mobile')
+
+        self.broadcaster.publish('desktop', b'desktop frame')
+        self.broadcaster.publish('mobile', b'mobile frame')
+
+        self.assertEqual(mobile_viewer.get_frame(0.1), b'mobile frame')
+        self.assertIsNone(mobile_viewer.get_frame(0.01))
+
+    def test_read_latest_frame_waits_for_next_frame(self):
+        self.broadcaster.publish('desktop', b'old frame')
+        threading.Timer(0.05, self.broadcaster.publish, args=('desktop', b'new frame')).start()
+
+        self.assertEqual(self.broadcaster.read_latest_frame('desktop', 1), b'new frame')
+        self.assertEqual(self.broadcaster.get_watched_profiles(), ['desktop'])  # polling keeps frames coming
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
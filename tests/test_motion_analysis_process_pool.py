@@ -0,0 +1,161 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import cv2
+import numpy as np
+from concurrent.futures import TimeoutError
+from app.computer_vision.motion_analysis_process_pool import MotionAnalysisProcessPool, DEFAULT_CAMERA_SETTINGS
+from app.computer_vision.motion_detection_processor import ModeProcessor, compute_mgo2_motion_mask, MGO2_MODE, MAX_BACKEND_FAILURES
+
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestMotionAnalysisProcessPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.process_pool = MotionAnalysisProcessPool(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.process_pool.shutdown()
+
+    def test_worker_mask_matches_local_mask(self):
+        client = self.process_pool.create_client('camera_1', DEFAULT_CAMERA_SETTINGS)
+        self.addCleanup(client.release)
+        local_background_subtractor = cv2.createBackgroundSubtractorMOG2(history=400, varThreshold=40, detectShadows=False)
+
+        random_generator = np.random.default_rng(0)
+        gray_frames = [random_generator.integers(0, 255, (60, 80), dtype=np.uint8) for _ in range(4)]
+        frame = np.zeros((60, 80, 3), dtype=np.uint8)
+
+        for index in range(2, 4):
+            worker_mask, motion_detected_by_tracking = client.compute_motion_mask(
+                MGO2_MODE, gray_frames[index], frame, None, gray_frames[index - 1], gray_frames[index - 2]
+            )
+            local_mask = compute_mgo2_motion_mask(local_background_subtractor, gray_frames[index], gray_frames[index - 1], gray_frames[index - 2])
+
+            # worker keeps its own background model of the camera between requests
+            np.testing.assert_array_equal(worker_mask, local_mask)
+            self.assertFalse(motion_detected_by_tracking)
+
+    def test_unknown_mode_raises_error(self):
+        client = self.process_pool.create_client('camera_2')
+        self.addCleanup(client.release)
+        gray_frame = np.zeros((20, 20), dtype=np.uint8)
+
+        with self.assertRaises(RuntimeError):
+            client.compute_motion_mask('unknown', gray_frame, np.zeros((20, 20, 3), dtype=np.uint8), None, gray_frame, gray_frame)
+
+    def test_timed_out_request_blocks_client_until_released(self):
+        client = self.process_pool.create_client('camera_3')
+        self.addCleanup(client.release)
+        gray_frame = np.zeros((20, 20), dtype=np.uint8)
+
+        # request is never sent, so worker does not answer
+        with patch.object(self.process_pool.request_queues[client.worker_index], 'put'), \
+                patch('app.computer_vision.motion_analysis_process_pool.RESULT_TIMEOUT', 0.01):
+            with self.assertRaises(TimeoutError):
+                client.compute_motion_mask(MGO2_MODE, gray_frame, None, None, gray_frame, gray_frame)
+
+        # shared memory may still be used by worker, so nothing is sent until it answers
+        self.assertIsNone(client.compute_motion_mask(MGO2_MODE, gray_frame, None, None, gray_frame, gray_frame))
+        client.release()
+        self.assertEqual(self.process_pool.pending_results, {})
+
+    def test_late_result_does_not_corrupt_next_mask(self):
+        client = self.process_pool.create_client('camera_4', DEFAULT_CAMERA_SETTINGS)
+        self.addCleanup(client.release)
+        local_background_subtractor = cv2.createBackgroundSubtractorMOG2(history=400, varThreshold=40, detectShadows=False)
+        random_generator = np.random.default_rng(1)
+        gray_frames = [random_generator.integers(0, 255, (60, 80), dtype=np.uint8) for _ in range(4)]
+        frame = np.zeros((60, 80, 3), dtype=np.uint8)
+
+        # worker still computes first request when caller gives up
+        with patch('app.computer_vision.motion_analysis_process_pool.RESULT_TIMEOUT', 0):
+            with self.assertRaises(TimeoutError):
+                client.compute_motion_mask(MGO2_MODE, gray_frames[2], frame, None, gray_frames[1], gray_frames[0])
+        compute_mgo2_motion_mask(local_background_subtractor, gray_frames[2], gray_frames[1], gray_frames[0])
+
+        client.late_future.result(timeout=5)
+        worker_mask, _ = client.compute_motion_mask(MGO2_MODE, gray_frames[3], frame, None, gray_frames[2], gray_frames[1])
+        local_mask = compute_mgo2_motion_mask(local_background_subtractor, gray_frames[3], gray_frames[2], gray_frames[1])
+        np.testing.assert_array_equal(worker_mask, local_mask)
+
+
+class TestModeProcessorBackend(unittest.TestCase):
+    def setUp(self):
+        self.mgo2_background_subtractor = MagicMock()
+        self.mgo2_background_subtractor.apply.return_value = np.zeros((10, 10), dtype=np.uint8)
+        self.motion_analysis_backend = MagicMock()
+        self.mode_processor = ModeProcessor(self.mgo2_background_subtractor, MagicMock(), MagicMock(), None, {}, 0.4, motion_analysis_backend=self.motion_analysis_backend)
+        self.gray_frame = np.zeros((10, 10), dtype=np.uint8)
+
+    def test_backend_mask_is_used(self):
+        backend_mask = np.ones((10, 10), dtype=np.uint8)
+        self.motion_analysis_backend.compute_motion_mask.return_value = (backend_mask, False)
+        callback_for_detect_motion = MagicMock(return_value='motion')
+
+        motion_data = self.mode_processor.process_mgo2_and_three_frame_diff_mode(self.gray_frame, self.gray_frame, self.gray_frame, callback_for_detect_motion, None)
+
+        self.assertEqual(motion_data, 'motion')
+        self.assertIs(callback_for_detect_motion.call_args[0][0], backend_mask)
+        self.mgo2_background_subtractor.apply.assert_not_called()
+
+    def test_backend_failure_falls_back_to_calling_thread(self):
+        self.motion_analysis_backend.compute_motion_mask.side_effect = RuntimeError('worker stopped')
+        callback_for_detect_motion = MagicMock(return_value=None)
+
+        self.mode_processor.process_mgo2_and_three_frame_diff_mode(self.gray_frame, self.gray_frame, self.gray_frame, callback_for_detect_motion, None)
+
+        # one failure does not disable backend
+        self.mgo2_background_subtractor.apply.assert_called_once()
+        self.assertIs(self.mode_processor.motion_analysis_backend, self.motion_analysis_backend)
+
+    def test_repeated_backend_failures_release_backend(self):
+        self.motion_analysis_backend.compute_motion_mask.side_effect = RuntimeError('worker stopped')
+        callback_for_detect_motion = MagicMock(return_value=None)
+
+        for _ in range(MAX_BACKEND_FAILURES):
+            self.mode_processor.process_mgo2_and_three_frame_diff_mode(self.gray_frame, self.gray_frame, self.gray_frame, callback_for_detect_motion, None)
+
+        self.assertIsNone(self.mode_processor.motion_analysis_backend)
+        self.motion_analysis_backend.release.assert_called_once()
+
+    def test_busy_backend_is_not_counted_as_failure(self):
+        self.motion_analysis_backend.compute_motion_mask.return_value = None
+        callback_for_detect_motion = MagicMock(return_value=None)
+
+        for _ in range(MAX_BACKEND_FAILURES):
+            self.mode_processor.process_mgo2_and_three_frame_diff_mode(self.gray_frame, self.gray_frame, self.gray_frame, callback_for_detect_motion, None)
+
+        self.assertEqual(self.mgo2_background_subtractor.apply.call_count, MAX_BACKEND_FAILURES)
+        self.assertIs(self.mode_processor.motion_analysis_backend, self.motion_analysis_backend)
+
+if __name__ == '__main__':
+    unittest.main()
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
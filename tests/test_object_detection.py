@@ -1,7 +1,8 @@
 import unittest
 import numpy as np
-from app.algorithms_object_detection.object_detection_utilities import object_recognition, draw_boxes_labels_on_detections  
+from app.algorithms_object_detection.object_detection_utilities import object_recognition, draw_boxes_labels_on_detections, ObjectDetectionQueue, filter_detections
 from unittest.mock import MagicMock, patch
+from app.tensorFlow.tf_model_utilities import DetectionModelHandle
 
 """ START - Documentation and research materials were used in the development of the code, 
 including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
@@ -39,6 +40,16 @@ class TestObjectDetection(unittest.TestCase):
         self.assertEqual(detections, [])
 
 
+    def test_detection_model_is_not_ready(self):
+        loader = MagicMock()
+        detection_model = DetectionModelHandle(loader)  # loading was not started
+
+        result_frame, detections = object_recognition(self.sample_frame, detection_model, self.category_index, self.detection_threshold)
+
+        self.assertIs(result_frame, self.sample_frame)
+        self.assertEqual(detections, [])
+        loader.assert_not_called()
+
     def test_empty_draw_detections(self):
         image_np = np.zeros((100, 100, 3), dtype=np.uint8)
         detections = []
@@ -68,12 +79,91 @@ class TestObjectDetection(unittest.TestCase):
         self.assertEqual(len(detections), 0)  
 
 
-class TestProcessingImagesInThread(unittest.TestCase):
-    @patch('app.algorithms_object_detection.object_detection_utilities.time') 
-    @patch('app.algorithms_object_detection.object_detection_utilities.os.listdir')  
-    def test_processing_images_in_thread(self, mock_listdir, mock_time):
-        mock_listdir.return_value = ['image1.jpg', 'image2.jpg']
-        pass
+class TestFilterDetections(unittest.TestCase):
+    def test_filters_by_score_and_class(self):
+        category_index = {1: {'name': 'person'}, 2: {'name': 'car'}, 3: {'name': 'dog'}}
+        object_detections = {
+            'detection_boxes': np.array([[[0.1, 0.1, 0.2, 0.2], [0.3, 0.3, 0.4, 0.4], [0.5, 0.5, 0.6, 0.6], [0.7, 0.7, 0.8, 0.8]]]),
+            'detection_scores': np.array([[0.9, 0.8, 0.3, 0.7]]),
+            'detection_classes': np.array([[1.0, 2.0, 3.0, 3.0]])
+        }
+
+        detections = filter_detections(object_detections, category_index, 0.5)
+
+        self.assertEqual([detection['class_name'] for detection in detections], ['person', 'dog'])
+        self.assertEqual([detection['object_type'] for detection in detections], ['Human', 'Animal'])
+        np.testing.assert_array_equal(detections[1]['bounding_box'], [0.7, 0.7, 0.8, 0.8])
+
+
+class TestObjectDetectionQueue(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.zeros((64, 64, 3), dtype=np.uint8)
+        detection_model = MagicMock(return_value={
+            'detection_boxes': np.array([[[0.1, 0.1, 0.5, 0.5]]]),
+            'detection_scores': np.array([[0.9]]),
+            'detection_classes': np.array([[1]])
+        })
+        self.detection_queue = ObjectDetectionQueue(detection_model, {1: {'name': 'person'}}, 0.5, 'processed', max_queue_size=2, registry_size=2)
+
+    @patch('app.algorithms_object_detection.object_detection_utilities.cv2.imwrite')
+    def test_queued_frame_is_processed(self, mock_imwrite):
+        self.assertTrue(self.detection_queue.submit('image1.jpg', self.frame))
+        self.assertTrue(self.detection_queue.process_next_job(timeout=0))
+
+        detected_objects = self.detection_queue.get_detected_objects('image1.jpg')
+        self.assertEqual(detected_objects[0]['object_type'], 'Human')
+        mock_imwrite.assert_called_once()
+
+    @patch('app.algorithms_object_detection.object_detection_utilities.cv2.imwrite')
+    def test_duplicate_images_are_rejected(self, mock_imwrite):
+        self.assertTrue(self.detection_queue.submit('image1.jpg', self.frame))
+        self.assertFalse(self.detection_queue.submit('image1.jpg', self.frame))
+
+        self.detection_queue.process_next_job(timeout=0)
+        self.assertFalse(self.detection_queue.submit('image1.jpg', self.frame))
+
+    def test_full_queue_rejects_jobs(self):
+        self.detection_queue.submit('image1.jpg', self.frame)
+        self.detection_queue.submit('image2.jpg', self.frame)
+
+        self.assertFalse(self.detection_queue.submit('image3.jpg', self.frame))
+        self.assertEqual(self.detection_queue.get_statistics()['rejected_jobs'], 1)
+
+    @patch('app.algorithms_object_detection.object_detection_utilities.cv2.imwrite')
+    def test_registry_evicts_oldest_images(self, mock_imwrite):
+        for image_key in ('image1.jpg', 'image2.jpg', 'image3.jpg'):
+            self.detection_queue.submit(image_key, self.frame)
+            self.detection_queue.process_next_job(timeout=0)
+
+        self.assertIsNone(self.detection_queue.get_detected_objects('image1.jpg'))
+        self.assertIsNotNone(self.detection_queue.get_detected_objects('image3.jpg'))
+
+    @patch('app.algorithms_object_detection.object_detection_utilities.cv2.imwrite')
+    def test_jobs_wait_while_model_is_loading(self, mock_imwrite):
+        loaded_model = self.detection_queue.detection_model
+        detection_model = DetectionModelHandle(loader=lambda: loaded_model)
+        detection_model.state = 'loading'  # loading started, but did not finish yet
+        self.detection_queue.detection_model = detection_model
+
+        self.detection_queue.submit('image1.jpg', self.frame)
+        self.assertTrue(self.detection_queue.process_next_job(timeout=0))
+        self.assertIsNone(self.detection_queue.get_detected_objects('image1.jpg'))
+
+        # job was queued again and is processed once model is loaded
+        detection_model._load_model()
+        self.assertTrue(self.detection_queue.process_next_job(timeout=0))
+        self.assertEqual(self.detection_queue.get_detected_objects('image1.jpg')[0]['object_type'], 'Human')
+
+    def test_jobs_are_rejected_when_model_failed_to_load(self):
+        detection_model = DetectionModelHandle(loader=MagicMock(return_value=None))
+        detection_model._load_model()
+        self.detection_queue.detection_model = detection_model
+
+        self.detection_queue.submit('image1.jpg', self.frame)
+        self.detection_queue.process_next_job(timeout=0)
+
+        self.assertEqual(self.detection_queue.get_statistics()['rejected_jobs'], 1)
+        self.assertEqual(self.detection_queue.get_statistics()['queued_jobs'], 0)
 
 
 if __name__ == '__main__':
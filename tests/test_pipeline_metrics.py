@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import MagicMock
+from app.metrics.pipeline_metrics import LatencyHistogram, PipelineMetrics, NULL_TIMER, collect_camera_metrics, render_prometheus_text
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestPipelineMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = PipelineMetrics(enabled=True)
+
+    def test_recorded_values_stay_in_their_bucket(self):
+        for microseconds in (0, 31, 32, 33, 1000, 123456, 10 ** 7):
+            bucket_index = LatencyHistogram.get_bucket_index(microseconds)
+            self.assertLessEqual(microseconds, LatencyHistogram.get_bucket_upper_bound(bucket_index))
+            if bucket_index > 0:
+                self.assertGreater(microseconds, LatencyHistogram.get_bucket_upper_bound(bucket_index - 1))
+
+    def test_quantiles_are_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        for milliseconds in range(1, 1001):
+            histogram.record(milliseconds / 1000)
+        statistics = histogram.get_statistics()
+        self.assertEqual(statistics['count'], 1000)
+        self.assertAlmostEqual(statistics['p50'], 0.5, delta=0.5 * 0.0625)
+        self.assertAlmostEqual(statistics['p99'], 0.99, delta=0.99 * 0.0625)
+        self.assertEqual(statistics['max'], 1.0)
+
+    def test_empty_histogram_reports_zero(self):
+        self.assertEqual(LatencyHistogram().get_quantile(0.99), 0.0)
+
+    def test_disabled_metrics_do_not_record(self):
+        metrics = PipelineMetrics(enabled=False)
+        self.assertIs(metrics.time_stage('retrieve_frame', 'camera'), NULL_TIMER)
+        with metrics.time_stage('retrieve_frame', 'camera'):
+            pass
+        self.assertEqual(metrics.get_stage_statistics(), {})
+
+    def test_stage_timer_records_per_camera(self):
+        for camera_id in ('camera_1', 'camera_1', 'camera_2'):
+            with self.metrics.time_stage('analyse_frame', camera_id):
+                pass
+        statistics = self.metrics.get_stage_statistics()
+        self.assertEqual(statistics[('analyse_frame', 'camera_1')]['count'], 2)
+        self.assertEqual(statistics[('analyse_frame', 'camera_2')]['count'], 1)
+
+    def test_frame_rate_between_exports(self):
+        self.assertEqual(self.metrics.update_frame_rate('camera', 100, current_time=10.0), 0.0)
+        self.assertEqual(self.metrics.update_frame_rate('camera', 160, current_time=12.0), 30.0)
+
+    def test_exporters_keep_own_frame_rate_window(self):
+        self.metrics.update_frame_rate('camera', 100, current_time=10.0, exporter='prometheus')
+        self.metrics.update_frame_rate('camera', 100, current_time=10.0, exporter='admin_page')
+        # admin page refresh does not reset window of Prometheus scrape
+        self.metrics.update_frame_rate('camera', 130, current_time=11.0, exporter='admin_page')
+        self.assertEqual(self.metrics.update_frame_rate('camera', 160, current_time=12.0, exporter='prometheus'), 30.0)
+
+    def test_prometheus_text_contains_stage_and_camera_metrics(self):
+        with self.metrics.time_stage('record_frame', 'camera'):
+            pass
+        video_camera = MagicMock()
+        video_camera.frame_consumers = ['recorder']
+        video_camera.get_pipeline_statistics.return_value = {
+            'captured_frames': 42, 'capture_failures': 1,
+            'recorder': {'dropped_frames': 3, 'lag_frames': 2},
+            'mjpeg_broadcaster': {'subscribers': 2, 'dropped_frames': 5}
+        }
+        video_camera.object_detection_queue.get_statistics.return_value = {'queued_jobs': 4, 'rejected_jobs': 0}
+
+        text = render_prometheus_text(collect_camera_metrics({'camera': video_camera}, self.metrics), self.metrics)
+        self.assertIn('# TYPE securevision_stage_latency_seconds summary', text)
+        self.assertIn('securevision_stage_latency_seconds_count{stage="record_frame",camera="camera"} 1', text)
+        self.assertIn('securevision_captured_frames_total{camera="camera"} 42', text)
+        self.assertIn('securevision_dropped_frames_total{camera="camera",consumer="recorder"} 3', text)
+        self.assertIn('securevision_queue_depth{camera="camera",queue="object_detection"} 4', text)
+        self.assertIn('securevision_live_feed_viewers{camera="camera"} 2', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
@@ -0,0 +1,87 @@
+import unittest
+import numpy as np
+from app.camera.pre_roll_buffer import PreRollBuffer, decode_frame, calculate_pre_roll_max_bytes
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestPreRollBuffer(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.full((360, 640, 3), 120, dtype=np.uint8)
+
+    def test_frames_are_kept_as_jpeg(self):
+        pre_roll_buffer = PreRollBuffer(max_duration=3.0)
+        pre_roll_buffer.append(self.frame, timestamp=0.0)
+
+        (timestamp, encoded_frame), = pre_roll_buffer.drain()
+
+        self.assertEqual(timestamp, 0.0)
+        self.assertLess(len(encoded_frame), self.frame.nbytes / 10)
+        self.assertLessEqual(np.abs(decode_frame(encoded_frame).astype(int) - 120).max(), 2)
+
+    def test_old_frames_are_dropped_by_time(self):
+        pre_roll_buffer = PreRollBuffer(max_duration=1.0)
+        for timestamp in (0.0, 0.5, 1.0, 1.5, 2.0):
+            pre_roll_buffer.append(self.frame, timestamp)
+
+        self.assertEqual([timestamp for timestamp, _ in pre_roll_buffer.drain()], [1.0, 1.5, 2.0])
+
+    def test_old_frames_are_dropped_by_size(self):
+        pre_roll_buffer = PreRollBuffer(max_duration=10.0)
+        pre_roll_buffer.append(self.frame, 0.0)
+        pre_roll_buffer.max_bytes = pre_roll_buffer.get_statistics()['bytes'] * 2
+
+        for timestamp in (1.0, 2.0, 3.0):
+            pre_roll_buffer.append(self.frame, timestamp)
+
+        statistics = pre_roll_buffer.get_statistics()
+        self.assertEqual(statistics['frames'], 2)
+        self.assertEqual(statistics['duration'], 1.0)
+
+    def test_full_hd_frames_fill_whole_duration(self):
+        # gradient with sensor noise, compresses like a camera frame
+        random_generator = np.random.default_rng(0)
+        gradient = np.linspace(0, 255, 1920)[None, :, None] + np.linspace(0, 60, 1080)[:, None, None]
+        frame = np.clip(gradient + random_generator.integers(-6, 7, (1080, 1920, 3)), 0, 255).astype(np.uint8)
+        pre_roll_buffer = PreRollBuffer(max_duration=3.0, max_bytes=calculate_pre_roll_max_bytes(1920, 1080, 30.0, 3.0), max_frames=91)
+
+        for index in range(120):
+            pre_roll_buffer.append(frame, index / 30.0)
+
+        statistics = pre_roll_buffer.get_statistics()
+        self.assertEqual(statistics['frames'], 91)
+        self.assertAlmostEqual(statistics['duration'], 3.0)
+
+    def test_drain_empties_buffer(self):
+        pre_roll_buffer = PreRollBuffer()
+        pre_roll_buffer.append(self.frame)
+        pre_roll_buffer.drain()
+
+        self.assertEqual(len(pre_roll_buffer), 0)
+        self.assertEqual(pre_roll_buffer.get_statistics()['bytes'], 0)
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
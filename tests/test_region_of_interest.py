@@ -0,0 +1,124 @@
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+from app.algorithms_object_detection.region_of_interest import pad_region, create_detection_crops, map_boxes_to_frame, suppress_duplicate_detections
+from app.algorithms_object_detection.object_detection_utilities import detect_objects_in_crops, object_recognition
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestRegionOfInterest(unittest.TestCase):
+    def test_region_is_padded_to_square_inside_frame(self):
+        crop = pad_region((600, 300, 40, 20), 640, 360)
+
+        self.assertEqual(crop[2] - crop[0], crop[3] - crop[1])
+        self.assertLessEqual(crop[2], 640)
+        self.assertLessEqual(crop[3], 360)
+        self.assertGreaterEqual(crop[2] - crop[0], 96)
+
+    def test_overlapping_regions_are_merged(self):
+        crops = create_detection_crops([(100, 100, 20, 20), (110, 110, 20, 20), (500, 50, 20, 20)], 640, 360)
+
+        self.assertEqual(len(crops), 2)
+
+    def test_number_of_crops_is_limited(self):
+        regions = [(x, 10, 10, 10) for x in range(0, 640, 120)] + [(x, 250, 10, 10) for x in range(0, 640, 120)]
+
+        crops = create_detection_crops(regions, 1920, 1080, max_number_of_crops=3, max_crop_area_ratio=1.0)
+
+        self.assertLessEqual(len(crops), 3)
+
+    def test_large_motion_uses_full_frame(self):
+        self.assertEqual(create_detection_crops([(0, 0, 600, 340)], 640, 360), [])
+
+    def test_boxes_are_mapped_to_frame(self):
+        boxes = map_boxes_to_frame([[0.0, 0.0, 0.5, 0.5]], (100, 50, 200, 150), 400, 200)
+
+        np.testing.assert_allclose(boxes, [[0.25, 0.25, 0.5, 0.375]])
+
+    def test_duplicate_detections_are_suppressed(self):
+        detections = [
+            {'class_name': 'person', 'score': 0.6, 'bounding_box': np.array([0.1, 0.1, 0.5, 0.5])},
+            {'class_name': 'person', 'score': 0.9, 'bounding_box': np.array([0.12, 0.1, 0.5, 0.52])},
+            {'class_name': 'dog', 'score': 0.7, 'bounding_box': np.array([0.1, 0.1, 0.5, 0.5])}
+        ]
+
+        kept_detections = suppress_duplicate_detections(detections)
+
+        self.assertEqual([(detection['class_name'], detection['score']) for detection in kept_detections], [('person', 0.9), ('dog', 0.7)])
+
+
+class TestRegionOfInterestDetection(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        self.category_index = {1: {'name': 'person'}}
+        # detector finds person in center of every input
+        self.detection_model = MagicMock(return_value={
+            'detection_boxes': np.array([[[0.25, 0.25, 0.75, 0.75]]]),
+            'detection_scores': np.array([[0.9]]),
+            'detection_classes': np.array([[1]])
+        })
+
+    def test_crops_are_resized_for_detector(self):
+        detect_objects_in_crops(self.frame, [(0, 0, 100, 100), (300, 100, 400, 200)], self.detection_model, self.category_index, 0.5)
+
+        self.assertEqual(self.detection_model.call_count, 2)
+        self.assertEqual(tuple(self.detection_model.call_args[0][0].shape), (1, 320, 320, 3))
+
+    def test_crops_are_batched_by_inference_service(self):
+        inference_service = MagicMock()
+        inference_service.submit.return_value.result.return_value = self.detection_model.return_value
+
+        detections = detect_objects_in_crops(self.frame, [(0, 0, 100, 100), (300, 100, 400, 200)], self.detection_model, self.category_index, 0.5, inference_service)
+
+        self.assertEqual(inference_service.submit.call_count, 2)
+        self.assertEqual(len(detections), 2)
+
+    def test_merged_crop_keeps_proportions(self):
+        # wide crop is letterboxed, person in center of detector input is in center of crop
+        detections = detect_objects_in_crops(self.frame, [(100, 100, 300, 200)], self.detection_model, self.category_index, 0.5)
+
+        crop_frame = self.detection_model.call_args[0][0][0]
+        self.assertEqual(tuple(crop_frame.shape), (320, 320, 3))
+        np.testing.assert_allclose(detections[0]['bounding_box'] * [360, 640, 360, 640], [100, 150, 200, 250], atol=1)
+
+    def test_detections_are_in_frame_coordinates(self):
+        _, detections = object_recognition(self.frame, self.detection_model, self.category_index, 0.5, draw_detections=False, motion_regions=[(300, 150, 40, 40)])
+
+        y_min, x_min, y_max, x_max = detections[0]['bounding_box']
+        # box is around the motion region, not in the center of the frame
+        self.assertTrue(y_min * 360 < 170 < y_max * 360)
+        self.assertTrue(x_min * 640 < 320 < x_max * 640)
+        self.assertLess(x_max - x_min, 0.5)
+
+    def test_without_motion_regions_full_frame_is_used(self):
+        object_recognition(self.frame, self.detection_model, self.category_index, 0.5, draw_detections=False)
+
+        # full frame is letterboxed to detector input size
+        self.assertEqual(tuple(self.detection_model.call_args[0][0].shape), (1, 320, 320, 3))
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+from app.camera.video_muxer import is_muxer_available
+from app.camera.segment_recorder import SegmentRecorder, SegmentIndex, FragmentSplitter, extract_clip, INDEX_FILE_NAME
+from app.camera.iso_bmff import read_box_header, get_video_track, get_fragment_decode_times
+
+if is_muxer_available():
+    import av
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+@unittest.skipIf(not is_muxer_available(), "PyAV is not installed")
+class TestSegmentRecorder(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.directory = self.temporary_directory.name
+        self.background = np.random.default_rng(0).integers(0, 255, (360, 640, 3), dtype=np.uint8)
+
+    def record(self, segment_recorder, start_time, number_of_frames, fps=10.0):
+        for index in range(number_of_frames):
+            segment_recorder.write(np.roll(self.background, index * 3, axis=1), start_time + index / fps)
+
+    def test_segments_are_indexed_and_cut_at_keyframes(self):
+        segment_recorder = SegmentRecorder(self.directory, 640, 360, 10.0, segment_duration=2.0)
+        self.record(segment_recorder, segment_recorder.start_time, 65)
+        segment_recorder.release()
+
+        segments = SegmentIndex(os.path.join(self.directory, INDEX_FILE_NAME)).get_entries('segment')
+        self.assertEqual(len(segments), 4)
+        for previous_segment, segment in zip(segments, segments[1:]):
+            self.assertEqual(previous_segment['end_time'], segment['start_time'])
+            self.assertAlmostEqual(segment['start_time'] - previous_segment['start_time'], 2.0, delta=0.2)
+
+        # every segment starts with a fragment (moof) and init segment has the video track
+        with open(os.path.join(self.directory, segments[1]['file']), 'rb') as segment_file:
+            self.assertEqual(read_box_header(segment_file.read(8))[0], b'moof')
+        with open(os.path.join(self.directory, segments[0]['init']), 'rb') as init_file:
+            self.assertEqual(get_video_track(init_file.read())[0], 1)
+
+    def test_bookmarked_clip_is_joined_from_segments(self):
+        segment_recorder = SegmentRecorder(self.directory, 640, 360, 10.0, segment_duration=2.0)
+        start_time = segment_recorder.start_time
+        bookmark = segment_recorder.add_bookmark(start_time + 2.5, start_time + 3.5, {'position': 'Left'})
+        self.record(segment_recorder, start_time, 65)
+
+        self.assertTrue(segment_recorder.wait_for_segments(bookmark['end_time'], 1))
+        segment_recorder.release()
+        clip_path = os.path.join(self.directory, 'clip.mp4')
+        self.assertEqual(extract_clip(self.directory, bookmark['start_time'], bookmark['end_time'], clip_path), clip_path)
+
+        with av.open(clip_path) as container:
+            frame_times = [float(frame.time) for frame in container.decode(video=0)]
+        self.assertEqual(len(frame_times), 20)
+        self.assertLessEqual(frame_times[0], 2.5)
+        self.assertGreaterEqual(frame_times[-1], 3.5)
+
+    def test_old_segments_are_deleted(self):
+        segment_recorder = SegmentRecorder(self.directory, 640, 360, 10.0, segment_duration=1.0, retention_time=2.0)
+        self.record(segment_recorder, segment_recorder.start_time, 45)
+        segment_recorder.release()
+
+        segment_recorder.prune_old_segments(segment_recorder.start_time + 5.0)
+
+        segments = segment_recorder.index.get_entries('segment')
+        self.assertTrue(all(segment['end_time'] >= segment_recorder.start_time + 3.0 for segment in segments))
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted([segment['file'] for segment in segments] + [INDEX_FILE_NAME, segment_recorder.init_segment_name]))
+
+    def test_wait_for_segments_times_out(self):
+        segment_recorder = SegmentRecorder(self.directory, 640, 360, 10.0)
+
+        started_time = time.time()
+        self.assertFalse(segment_recorder.wait_for_segments(started_time + 60, 0.1))
+        self.assertLess(time.time() - started_time, 1.0)
+        segment_recorder.release()
+
+
+class TestFragmentSplitter(unittest.TestCase):
+    def create_box(self, box_type, payload):
+        return (8 + len(payload)).to_bytes(4, 'big') + box_type + payload
+
+    def test_boxes_written_in_pieces_are_split(self):
+        init_segments, fragments = [], []
+        splitter = FragmentSplitter(init_segments.append, lambda fragment, decode_time: fragments.append(fragment))
+        tfhd = self.create_box(b'tfhd', bytes(4) + (1).to_bytes(4, 'big'))
+        tfdt = self.create_box(b'tfdt', bytes([1, 0, 0, 0]) + (9000).to_bytes(8, 'big'))
+        moof = self.create_box(b'moof', self.create_box(b'traf', tfhd + tfdt))
+        data = self.create_box(b'ftyp', b'isom') + self.create_box(b'moov', b'') + moof + self.create_box(b'mdat', b'frame')
+
+        for offset in range(0, len(data), 7):
+            splitter.write(data[offset:offset + 7])
+
+        self.assertEqual(len(init_segments), 1)
+        self.assertEqual(fragments, [moof + self.create_box(b'mdat', b'frame')])
+        self.assertEqual(get_fragment_decode_times(moof), {1: 9000})
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
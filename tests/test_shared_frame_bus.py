@@ -0,0 +1,95 @@
+import multiprocessing
+import unittest
+import numpy as np
+from app.camera.shared_frame_bus import SharedFrameBus
+
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+# runs in spawned process, reads frame in place and reports its sum
+def sum_frame_in_other_process(shared_frame_bus, frame_sequence, result_queue):
+    frame = shared_frame_bus.view(frame_sequence)
+    result_queue.put(int(frame.sum()))
+    shared_frame_bus.release(frame_sequence)
+    shared_frame_bus.close()
+
+
+class TestSharedFrameBus(unittest.TestCase):
+    def setUp(self):
+        self.shared_frame_bus = SharedFrameBus(number_of_slots=2, frame_height=4, frame_width=6)
+        self.addCleanup(self.shared_frame_bus.close)
+
+    def test_publish_and_view(self):
+        frame = np.full((4, 6, 3), 7, dtype=np.uint8)
+        frame_sequence = self.shared_frame_bus.publish(frame)
+
+        frame_view = self.shared_frame_bus.view(frame_sequence)
+
+        np.testing.assert_array_equal(frame_view, frame)
+        self.assertFalse(frame_view.flags.writeable)
+
+    def test_retained_frame_is_not_overwritten(self):
+        retained_sequence = self.shared_frame_bus.publish_and_retain(np.full((4, 6, 3), 1, dtype=np.uint8))
+
+        for value in range(2, 5):
+            self.shared_frame_bus.publish(np.full((4, 6, 3), value, dtype=np.uint8))
+
+        self.assertEqual(self.shared_frame_bus.view(retained_sequence)[0, 0, 0], 1)
+        self.assertEqual(self.shared_frame_bus.get_reference_count(retained_sequence), 1)
+
+    def test_publish_fails_when_all_slots_are_retained(self):
+        self.shared_frame_bus.publish_and_retain(np.zeros((4, 6, 3), dtype=np.uint8))
+        first_sequence = self.shared_frame_bus.publish_and_retain(np.zeros((4, 6, 3), dtype=np.uint8))
+
+        self.assertIsNone(self.shared_frame_bus.publish(np.zeros((4, 6, 3), dtype=np.uint8)))
+        self.assertEqual(self.shared_frame_bus.dropped_frames, 1)
+
+        # released slot can be reused
+        self.shared_frame_bus.release(first_sequence)
+        self.assertIsNotNone(self.shared_frame_bus.publish(np.zeros((4, 6, 3), dtype=np.uint8)))
+        self.assertIsNone(self.shared_frame_bus.view(first_sequence))
+
+    def test_frame_is_read_in_other_process(self):
+        frame_sequence = self.shared_frame_bus.publish(np.full((4, 6, 3), 2, dtype=np.uint8))
+        # reference is taken for the other process before it starts
+        self.shared_frame_bus.retain(frame_sequence)
+
+        context = multiprocessing.get_context('spawn')
+        result_queue = context.Queue()
+        process = context.Process(target=sum_frame_in_other_process, args=(self.shared_frame_bus, frame_sequence, result_queue))
+        process.start()
+        frame_sum = result_queue.get(timeout=30)
+        process.join(timeout=30)
+
+        self.assertEqual(frame_sum, 4 * 6 * 3 * 2)
+        self.assertEqual(self.shared_frame_bus.get_reference_count(frame_sequence), 0)
+
+if __name__ == '__main__':
+    unittest.main()
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
@@ -0,0 +1,72 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+from app.tensorFlow.tf_model_utilities import DetectionModelHandle, load_category_index, LABEL_MAP_PATH, MODEL_READY, MODEL_FAILED, MODEL_NOT_LOADED
+
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+class TestDetectionModelHandle(unittest.TestCase):
+    def test_model_is_loaded_in_background(self):
+        loading_can_finish = threading.Event()
+        model = MagicMock(return_value={'detection_scores': []})
+
+        def loader():
+            loading_can_finish.wait(5)
+            return model
+
+        model_handle = DetectionModelHandle(loader)
+        self.assertEqual(model_handle.state, MODEL_NOT_LOADED)
+
+        model_handle.start_loading()
+        # calls before model is ready fail fast instead of blocking
+        self.assertFalse(model_handle.is_ready())
+        with self.assertRaises(RuntimeError):
+            model_handle('input')
+
+        loading_can_finish.set()
+        self.assertIs(model_handle.get_model(timeout=5), model)
+        self.assertEqual(model_handle.state, MODEL_READY)
+        self.assertEqual(model_handle('input'), {'detection_scores': []})
+
+    def test_failed_loading(self):
+        model_handle = DetectionModelHandle(lambda: None)
+
+        self.assertIsNone(model_handle.get_model(timeout=5))
+        self.assertEqual(model_handle.state, MODEL_FAILED)
+
+    def test_load_category_index(self):
+        category_index = load_category_index(LABEL_MAP_PATH)
+
+        self.assertEqual(category_index[1], {'id': 1, 'name': 'person'})
+        self.assertEqual(category_index[18]['name'], 'dog')
+
+if __name__ == '__main__':
+    unittest.main()
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
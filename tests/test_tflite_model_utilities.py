@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import tensorflow as tf
+from app.tensorFlow.tflite_model_utilities import TFLiteDetectionModel, identify_detection_outputs, preprocess_frame
+
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+# tiny model with the same inputs and outputs as TFLite SSD detector, returns one detection of class 0 (person without background)
+class FakeDetector(tf.Module):
+    @tf.function(input_signature=[tf.TensorSpec([1, 8, 8, 3], tf.float32)])
+    def detect(self, image):
+        score = tf.reshape(tf.reduce_mean(image) * 0.0 + 0.75, [1, 1])
+        boxes = tf.constant([[[0.1, 0.2, 0.3, 0.4]]])
+        classes = tf.zeros([1, 1])
+        number_of_detections = tf.ones([1])
+        return boxes, classes, score, number_of_detections
+
+
+class TestTFLiteDetectionModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        converter = tf.lite.TFLiteConverter.from_concrete_functions([FakeDetector().detect.get_concrete_function()])
+        cls.model_directory = tempfile.TemporaryDirectory()
+        cls.model_path = os.path.join(cls.model_directory.name, 'fake_detector.tflite')
+        with open(cls.model_path, 'wb') as tflite_file:
+            tflite_file.write(converter.convert())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.model_directory.cleanup()
+
+    def test_outputs_have_saved_model_format(self):
+        detection_model = TFLiteDetectionModel(self.model_path, number_of_threads=1)
+        frames = np.zeros((2, 20, 30, 3), dtype=np.uint8)
+
+        object_detections = detection_model(tf.convert_to_tensor(frames))
+
+        self.assertEqual(object_detections['detection_boxes'].shape, (2, 1, 4))
+        np.testing.assert_allclose(object_detections['detection_scores'], [[0.75], [0.75]])
+        # classes are shifted to label map ids
+        np.testing.assert_array_equal(object_detections['detection_classes'], [[1], [1]])
+
+    def test_identify_outputs_in_any_order(self):
+        boxes = np.zeros((1, 2, 4))
+        classes = np.array([[0.0, 17.0]])
+        scores = np.array([[0.9, 0.3]])
+        number_of_detections = np.array([2.0])
+
+        identified_outputs = identify_detection_outputs([number_of_detections, classes, boxes, scores])
+
+        self.assertIs(identified_outputs[0], boxes)
+        self.assertIs(identified_outputs[1], classes)
+        self.assertIs(identified_outputs[2], scores)
+
+    def test_preprocess_frame(self):
+        frame = np.full((10, 10, 3), 255, dtype=np.uint8)
+
+        input_frame = preprocess_frame(frame, 4, 6)
+
+        self.assertEqual(input_frame.shape, (1, 4, 6, 3))
+        np.testing.assert_allclose(input_frame, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file
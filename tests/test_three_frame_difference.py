@@ -1,8 +1,10 @@
 import unittest
 from unittest.mock import patch
+import cv2
 import numpy as np
 import app.computer_vision.motion_analysis_utilities as mai  
 import app.algorithms_motion_detection.three_frame_method as tfm  
+from app.algorithms_motion_detection.three_frame_method import ThreeFrameDifferencer
 
 """ START - Documentation and research materials were used in the development of the code, 
 including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
@@ -26,6 +28,44 @@ class TestThreeFrameDifferencing(unittest.TestCase):
             self.assertIsNotNone(result)
             self.assertEqual(result.shape, frame.shape)
 
+
+class TestThreeFrameDifferencer(unittest.TestCase):
+    def setUp(self):
+        random_generator = np.random.default_rng(0)
+        self.gray_frames = [random_generator.integers(0, 255, (90, 160), dtype=np.uint8) for _ in range(8)]
+
+    # history is shifted like VideoCamera does, three frame difference uses frames t, t-2 and t-3
+    def iterate_camera_history(self):
+        previous_frame, previous_frame_1, previous_frame_2 = self.gray_frames[0], self.gray_frames[0], self.gray_frames[0]
+        for gray_frame in self.gray_frames[1:]:
+            yield gray_frame, previous_frame_1, previous_frame_2
+            previous_frame_2, previous_frame_1, previous_frame = previous_frame_1, previous_frame, gray_frame
+
+    def test_masks_match_three_frame_differencing_method(self):
+        three_frame_differencer = ThreeFrameDifferencer()
+        for gray_frame, previous_frame_1, previous_frame_2 in self.iterate_camera_history():
+            expected_mask = tfm.three_frame_differencing_method(gray_frame, previous_frame_1, previous_frame_2)
+            np.testing.assert_array_equal(three_frame_differencer.apply(gray_frame, previous_frame_1, previous_frame_2), expected_mask)
+
+    def test_every_frame_is_blurred_once(self):
+        three_frame_differencer = ThreeFrameDifferencer()
+        with patch('cv2.GaussianBlur', side_effect=cv2.GaussianBlur) as gaussian_blur:
+            for frames in self.iterate_camera_history():
+                three_frame_differencer.apply(*frames)
+        self.assertEqual(gaussian_blur.call_count, len(self.gray_frames))
+
+    def test_frames_changed_in_place_are_blurred_again(self):
+        three_frame_differencer = ThreeFrameDifferencer(cache_history=False)
+        gray_frame, previous_frame_1, previous_frame_2 = (np.empty_like(self.gray_frames[0]) for _ in range(3))
+        for frames in self.iterate_camera_history():
+            for view, frame in zip((gray_frame, previous_frame_1, previous_frame_2), frames):
+                np.copyto(view, frame)
+            mask = three_frame_differencer.apply(gray_frame, previous_frame_1, previous_frame_2)
+            np.testing.assert_array_equal(mask, tfm.three_frame_differencing_method(*frames))
+
+    def test_missing_previous_frames(self):
+        self.assertIsNone(ThreeFrameDifferencer().apply(self.gray_frames[0], None, None))
+
 class TestImageProcess(unittest.TestCase):
     def test_process_first_frame(self):
         frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
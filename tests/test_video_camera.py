@@ -1,6 +1,8 @@
 import unittest
+import time
 from unittest.mock import patch, MagicMock
 from app.camera.camera import VideoCamera
+from app.camera.video_muxer import StreamingVideoMuxer
 import numpy as np
 
 """ START - Documentation and research materials were used in the development of the code, 
@@ -22,6 +24,22 @@ class TestVideoCamera(unittest.TestCase):
         mocked_video_capture.assert_called_once_with(0)
         
         
+    @patch('cv2.VideoCapture')
+    def test_initialize_camera_with_source(self, mocked_video_capture):
+        self.video_camera.camera_source = 'rtsp://camera/stream'
+        self.video_camera._initialize_camera()
+        mocked_video_capture.assert_called_once_with('rtsp://camera/stream')
+
+    def test_schedule_frame_analysis_once(self):
+        analysis_executor = MagicMock()
+        analysis_executor.submit.return_value.done.return_value = False
+        self.video_camera.analysis_executor = analysis_executor
+
+        self.video_camera._schedule_frame_analysis()
+        self.video_camera._schedule_frame_analysis()
+
+        analysis_executor.submit.assert_called_once()
+        
     @patch('cv2.VideoCapture.isOpened', return_value=True)
     def test_initialize_camera2(self, mocked_is_opened):
         self.video_camera._initialize_camera()
@@ -57,6 +75,65 @@ class TestVideoCamera(unittest.TestCase):
         self.assertIsNotNone(frame)
 
 
+    @patch('cv2.VideoCapture.read')
+    def test_subscribed_viewers_share_one_encoded_frame(self, mock_video_cap_read):
+        mock_video_cap_read.return_value = (True, np.zeros((360, 640, 3), dtype=np.uint8))
+        self.video_camera.camera_on = True
+        self.video_camera._initialize_camera()
+        first_viewer = self.video_camera.subscribe_to_live_feed()
+        second_viewer = self.video_camera.subscribe_to_live_feed()
+        mobile_viewer = self.video_camera.subscribe_to_live_feed('mobile')
+
+        frame = self.video_camera.retrieve_subscribed_frame(first_viewer, 0.1)
+
+        self.assertIsNotNone(frame)
+        self.assertIs(second_viewer.get_frame(0.1), frame)
+        self.assertLess(len(mobile_viewer.get_frame(0.1)), len(frame))
+        mock_video_cap_read.assert_called_once()
+        self.assertRaises(ValueError, self.video_camera.subscribe_to_live_feed, 'unknown')
+
+
+    def test_frame_buffers_follow_native_resolution(self):
+        self.video_camera.cap = MagicMock()
+        self.video_camera.cap.get.side_effect = lambda prop: {3: 2560.0, 4: 1440.0}[prop]  # width, height
+
+        self.video_camera._use_native_frame_size()
+
+        # bigger frames are scaled down to max width
+        self.assertEqual((self.video_camera.frame_width, self.video_camera.frame_height), (1920, 1080))
+        self.assertEqual(self.video_camera.frame_ring_buffer.frame_shape, (1080, 1920, 3))
+        self.assertEqual(self.video_camera.frame_consumers['analysis'].frame.shape, (1080, 1920, 3))
+        # pre-roll budget grows with frame size
+        self.assertGreater(self.video_camera.pre_record_motion_buffer.max_bytes, 8 * 1024 * 1024)
+
+
+    @patch('cv2.imwrite')
+    def test_motion_image_is_saved_at_native_resolution(self, mock_imwrite):
+        native_frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        frame, _ = self.video_camera._analyse_frame(native_frame)
+        self.video_camera.object_detection_queue = MagicMock()
+
+        self.video_camera._save_motion_detected_image(frame)
+
+        self.assertEqual(frame.shape, (360, 640, 3))
+        self.assertIs(mock_imwrite.call_args[0][1], native_frame)
+
+
+    @patch('cv2.imwrite')
+    def test_motion_rectangle_is_not_drawn_on_native_frame(self, mock_imwrite):
+        native_frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        frame, _ = self.video_camera._analyse_frame(native_frame)
+        self.video_camera.latest_motion_rectangle = (100, 50, 200, 100, 0.0)
+        self.video_camera.object_detection_queue = MagicMock()
+
+        self.video_camera._save_motion_detected_image(frame)
+
+        # saved image has rectangle, recorded frame and detector input stay clean
+        self.assertTrue(mock_imwrite.call_args[0][1].any())
+        self.assertFalse(native_frame.any())
+        self.assertIs(self.video_camera.object_detection_queue.submit.call_args[0][1], native_frame)
+
+
     @patch('cv2.imwrite')
     def test_save_motion_detected_image(self, mock_imwrite):
         fake_frame = np.zeros((640, 360, 3), dtype=np.uint8)
@@ -64,6 +141,71 @@ class TestVideoCamera(unittest.TestCase):
 
         mock_imwrite.assert_called()
 
+    @patch('app.camera.camera.process_and_buffer_motion_data')
+    @patch('cv2.imwrite')
+    def test_motion_image_is_published_to_shared_frame_bus(self, mock_imwrite, mock_process_and_buffer_motion_data):
+        fake_frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        fake_frame[100:150, 200:260] = 255
+        self.addCleanup(self.video_camera.release_shared_frame_bus)
+
+        self.video_camera._save_motion_detected_image(fake_frame)
+
+        frame_sequence = mock_process_and_buffer_motion_data.call_args[0][1]['frame_sequence']
+        np.testing.assert_array_equal(self.video_camera.get_event_frame(frame_sequence), fake_frame)
+
+        self.video_camera.release_event_frame(frame_sequence)
+        self.assertEqual(self.video_camera.shared_frame_bus.get_reference_count(frame_sequence), 0)
+
+    @patch('app.camera.camera.process_and_buffer_motion_data')
+    @patch('cv2.imwrite')
+    def test_clean_native_frame_is_published_to_shared_frame_bus(self, mock_imwrite, mock_process_and_buffer_motion_data):
+        native_frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        native_frame[200:300, 400:520] = 255
+        self.video_camera.frame_width, self.video_camera.frame_height = 1280, 720
+        frame, _ = self.video_camera._analyse_frame(native_frame)
+        self.video_camera.latest_motion_rectangle = (200, 100, 60, 50, 0.0)
+        self.video_camera.object_detection_queue = MagicMock()
+        self.addCleanup(self.video_camera.release_shared_frame_bus)
+
+        self.video_camera._save_motion_detected_image(frame)
+
+        # detector of route gets same frame as detection queue, without motion rectangle
+        frame_sequence = mock_process_and_buffer_motion_data.call_args[0][1]['frame_sequence']
+        np.testing.assert_array_equal(self.video_camera.get_event_frame(frame_sequence), native_frame)
+        self.video_camera.release_event_frame(frame_sequence)
+
+    def test_contours_of_downscaled_mask_are_scaled_to_frame(self):
+        frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        mask = np.zeros((180, 320), dtype=np.uint8)
+        mask[50:100, 100:160] = 255
+
+        self.assertTrue(self.video_camera._generate_combined_mask(mask, frame))
+        self.assertEqual(self.video_camera.latest_motion_rectangle[:4], (200, 100, 120, 100))
+        self.assertEqual(self.video_camera.latest_motion_regions, [(200, 100, 120, 100)])
+
+    @patch('app.camera.camera.process_and_buffer_motion_data')
+    @patch('cv2.imwrite')
+    def test_event_metadata_uses_blobs_of_motion_mask(self, mock_imwrite, mock_process_and_buffer_motion_data):
+        frame = np.full((360, 640, 3), 80, dtype=np.uint8)
+        mask = np.zeros((180, 320), dtype=np.uint8)
+        mask[50:100, 100:160] = 255
+        self.video_camera._generate_combined_mask(mask, frame)
+        self.video_camera.object_detection_queue = MagicMock()
+        self.addCleanup(self.video_camera.release_shared_frame_bus)
+
+        self.video_camera._save_motion_detected_image(frame)
+
+        motion_data = mock_process_and_buffer_motion_data.call_args[0][1]
+        self.assertEqual((motion_data['x'], motion_data['w'], motion_data['contour_area']), (200, 120, 12000.0))
+
+    @patch('cv2.imwrite')
+    def test_motion_masks_are_computed_at_mask_scale(self, mock_imwrite):
+        video_camera = VideoCamera(app=MagicMock(), user_id=1, motion_detection_mode='mgo2', motion_mask_scale=0.25)
+        video_camera.analysis_scheduler = None
+        for _ in range(2):
+            video_camera._analyse_frame(np.zeros((720, 1280, 3), dtype=np.uint8))
+        self.assertEqual(video_camera.previous_frame.shape, (90, 160))
+
     def test_detect_motion_manage_recording(self):
         fake_frame = np.zeros((640, 360, 3), dtype=np.uint8)
         dummy_mask = np.zeros((640, 360), dtype=np.uint8)
@@ -71,14 +213,122 @@ class TestVideoCamera(unittest.TestCase):
         motion_detected = self.video_camera._detect_motion_and_manage_recording(dummy_mask, fake_frame)
         self.assertFalse(motion_detected) 
          
+    @patch('cv2.imwrite')
+    def test_motion_is_confirmed_before_recording(self, mock_imwrite):
+        fake_frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        motion_mask = np.zeros((360, 640), dtype=np.uint8)
+        motion_mask[100:200, 200:300] = 255
+        self.video_camera._start_video_recording = MagicMock()
+        self.video_camera.analysis_scheduler.state = 'suspected'
+
+        self.video_camera._detect_motion_and_manage_recording(motion_mask, fake_frame)
+        self.video_camera._start_video_recording.assert_not_called()
+
+        self.video_camera._detect_motion_and_manage_recording(motion_mask, fake_frame)
+        self.video_camera._start_video_recording.assert_called_once()
+
+    @patch('cv2.imwrite')
+    def test_continuous_recording_bookmarks_motion(self, mock_imwrite):
+        fake_frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        motion_mask = np.zeros((360, 640), dtype=np.uint8)
+        motion_mask[100:200, 200:300] = 255
+        self.video_camera.segment_recorder = MagicMock()
+        self.video_camera._start_video_recording = MagicMock()
+        self.video_camera.analysis_scheduler.state = 'active'
+
+        self.video_camera._save_frame_to_video(True, fake_frame, 42.0)
+        self.video_camera._detect_motion_and_manage_recording(motion_mask, motion_mask[:, :, None].repeat(3, axis=2))
+
+        # segments are written at capture time of frame
+        self.video_camera.segment_recorder.write.assert_called_once_with(fake_frame, 42.0)
+        self.video_camera._start_video_recording.assert_not_called()
+        self.video_camera.segment_recorder.add_bookmark.assert_called_once()
+        self.assertEqual(len(self.video_camera.pre_record_motion_buffer), 0)
+
+    def test_stop_muxed_recording(self):
+        video_muxer = MagicMock(spec=StreamingVideoMuxer)
+        video_muxer.release.return_value = 'video_combined.mp4'
+        video_muxer.metadata = {'position': 'Left', 'size': 'Large'}
+        self.video_camera.out, self.video_camera.is_video_recording = video_muxer, True
+        self.video_camera.video_file_name = 'video.mp4'
+
+        job = self.video_camera._stop_recording()
+
+        self.assertIsNone(self.video_camera.out)
+        self.assertTrue(job.wait(5))
+        self.assertEqual(job.state, 'ready')
+        self.assertEqual(job.final_video_path, 'video_combined.mp4')
+        self.assertIs(self.video_camera.wait_for_finished_recording('video.mp4', 1), job)
+        self.assertEqual(self.video_camera.get_current_final_video_path(), 'video_combined.mp4')
+        self.assertTrue(self.video_camera.video_recording_complete)
+        self.assertTrue(self.video_camera.video_metadata_embedded)
+        self.assertEqual(self.video_camera.video_processing_state, 'ready')
+
+    def test_live_frames_are_muxed_at_capture_time(self):
+        video_muxer = MagicMock(spec=StreamingVideoMuxer)
+        self.video_camera.out, self.video_camera.is_video_recording = video_muxer, True
+        self.video_camera.recording_start_time = time.time()
+        frame = np.zeros((360, 640, 3), dtype=np.uint8)
+
+        self.video_camera._save_frame_to_video(True, frame, 123.5)
+
+        video_muxer.write.assert_called_once_with(frame, 123.5)
+
+    def test_live_stream_gets_capture_time(self):
+        self.video_camera.live_stream = MagicMock()
+        self.video_camera.live_stream.is_encoding.return_value = True
+        frame = np.zeros((360, 640, 3), dtype=np.uint8)
+
+        self.video_camera._save_frame_to_video(True, frame, 123.5)
+
+        self.video_camera.live_stream.write.assert_called_once_with(frame, 123.5)
+
+    def test_sound_is_attached_from_pre_roll_start(self):
+        audio_capture = MagicMock(sample_rate=8000, number_of_channels=1)
+        video_muxer = MagicMock(spec=StreamingVideoMuxer)
+        video_muxer.add_audio_stream.return_value = True
+        self.video_camera.audio_capture, self.video_camera.out = audio_capture, video_muxer
+
+        self.video_camera._start_sound_recording(start_time=97.0)
+        audio_capture.attach.assert_called_once_with(video_muxer, 97.0)
+
+        self.video_camera.is_video_recording = True
+        job = self.video_camera._stop_recording()
+        audio_capture.detach.assert_called_once_with(video_muxer)
+        self.assertIs(job.audio_sink, video_muxer)
+        self.assertTrue(job.wait(5))
+
     def test_pre_record_buffer(self):
         fake_frame = np.zeros((640, 360, 3), dtype=np.uint8)
 
-        for _ in range(50):  
+        for _ in range(self.video_camera.SIZE_OF_PRE_RECORD_BUFFER + 10):  
             self.video_camera._handle_pre_record_buffer(fake_frame)
 
         self.assertEqual(len(self.video_camera.pre_record_motion_buffer), self.video_camera.SIZE_OF_PRE_RECORD_BUFFER)
 
+    def test_pre_roll_frames_keep_capture_time(self):
+        frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        capture_time = time.time() - 1.0  # frame waited in ring buffer before it was recorded
+        self.video_camera._save_frame_to_video(True, frame, capture_time)
+
+        self.assertEqual(self.video_camera.pre_record_motion_buffer.drain()[0][0], capture_time)
+
+    @patch('app.camera.camera.cv2.VideoWriter')
+    @patch('app.camera.camera.VIDEO_MUXER', 'ffmpeg')
+    def test_pre_roll_frames_are_written_into_recording(self, mock_video_writer):
+        self.video_camera._start_sound_recording = MagicMock()
+        for value in range(3):
+            self.video_camera._save_frame_to_video(True, np.full((360, 640, 3), value * 100, dtype=np.uint8))
+
+        self.video_camera._start_video_recording()
+        self.video_camera.is_video_recording = True
+        self.video_camera._save_frame_to_video(True, np.zeros((360, 640, 3), dtype=np.uint8))
+
+        written_frames = [call[0][0] for call in mock_video_writer.return_value.write.call_args_list]
+        self.assertEqual(len(written_frames), 4)
+        self.assertEqual([int(frame.mean()) for frame in written_frames[:3]], [0, 100, 200])
+        self.assertEqual(len(self.video_camera.pre_record_motion_buffer), 0)
+
     @patch('cv2.VideoCapture.read')
     def test_gets_frame_no_camera(self, mock_video_cap_read):
         self.video_camera.camera_on = False
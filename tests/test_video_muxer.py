@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from app.camera.video_muxer import StreamingVideoMuxer, is_muxer_available
+
+if is_muxer_available():
+    import av
+
+""" START - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
+
+@unittest.skipIf(not is_muxer_available(), "PyAV is not installed")
+class TestStreamingVideoMuxer(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.video_path = os.path.join(self.temporary_directory.name, 'video_combined.mp4')
+
+    def write_recording(self, video_muxer, number_of_frames=10):
+        for value in range(number_of_frames):
+            video_muxer.write(np.full((360, 640, 3), value * 20, dtype=np.uint8))
+            video_muxer.write_audio(np.zeros(1024 * 2, dtype=np.int16).tobytes())
+
+    def test_video_audio_and_metadata_are_written_in_one_file(self):
+        video_muxer = StreamingVideoMuxer(self.video_path, 640, 360, 30.0)
+        self.assertTrue(video_muxer.add_audio_stream(44100, 2))
+        self.write_recording(video_muxer, 5)
+        self.assertTrue(video_muxer.set_metadata({'position': 'Left', 'size': 'Large'}))
+        self.write_recording(video_muxer, 5)
+
+        self.assertEqual(video_muxer.release(), self.video_path)
+
+        with av.open(self.video_path) as container:
+            self.assertEqual(json.loads(container.metadata['comment']), {'position': 'Left', 'size': 'Large'})
+            self.assertEqual(container.streams.video[0].frames, 10)
+            self.assertEqual(len(container.streams.audio), 1)
+
+    def test_header_is_written_without_metadata_after_waiting_time(self):
+        video_muxer = StreamingVideoMuxer(self.video_path, 640, 360, 30.0, metadata_wait_time=0)
+        self.write_recording(video_muxer, 3)
+
+        self.assertFalse(video_muxer.set_metadata({'position': 'Left'}))
+        self.assertFalse(video_muxer.add_audio_stream(44100, 1))
+        video_muxer.release()
+
+        with av.open(self.video_path) as container:
+            self.assertNotIn('comment', container.metadata)
+
+    def test_pre_roll_frames_are_placed_by_capture_time(self):
+        video_muxer = StreamingVideoMuxer(self.video_path, 640, 360, 30.0, start_time=100.0)
+        for index in range(3):
+            video_muxer.write(np.zeros((360, 640, 3), dtype=np.uint8), 100.0 + index)
+        video_muxer.release()
+
+        with av.open(self.video_path) as container:
+            timestamps = [float(frame.time) for frame in container.decode(video=0)]
+        self.assertEqual(timestamps, [0.0, 1.0, 2.0])
+
+    def test_sound_pre_roll_is_placed_by_capture_time(self):
+        video_muxer = StreamingVideoMuxer(self.video_path, 640, 360, 30.0, start_time=100.0)
+        video_muxer.add_audio_stream(8000, 1)
+        for index in range(3):
+            video_muxer.write(np.zeros((360, 640, 3), dtype=np.uint8), 100.0 + index)
+        # sound buffered half a second before first video frame, that half is dropped
+        video_muxer.write_audio(np.ones(8000 * 2, dtype=np.int16).tobytes(), 99.5)
+        video_muxer.release()
+
+        self.assertEqual(video_muxer.number_of_audio_samples, 8000 * 3 // 2)
+        with av.open(self.video_path) as container:
+            first_audio_frame = next(container.decode(audio=0))
+            self.assertLess(float(first_audio_frame.time), 0.1)
+
+    def test_frames_with_other_size_are_resized(self):
+        video_muxer = StreamingVideoMuxer(self.video_path, 640, 360, 30.0)
+        video_muxer.write(np.zeros((480, 640, 3), dtype=np.uint8))
+        video_muxer.release()
+
+        with av.open(self.video_path) as container:
+            self.assertEqual((container.streams.video[0].width, container.streams.video[0].height), (640, 360))
+
+# References:
+# https://docs.python.org/3/library/unittest.mock.html
+# https://docs.python.org/3/library/unittest.mock-examples.html
+# https://www.toptal.com/python/an-introduction-to-mocking-in-python
+# https://datageeks.medium.com/python-unittest-a-guide-to-patching-mocking-and-magicmocks-40f2c0738981
+# https://flask.palletsprojects.com/en/2.3.x/testing/
+# https://pytest-flask.readthedocs.io/en/latest/
+# https://circleci.com/blog/testing-flask-framework-with-pytest/
+# https://pypi.org/project/pytest-flask/
+# https://stackoverflow.com/questions/12187122/assert-a-function-method-was-not-called-using-mock
+# https://realpython.com/python-mock-library/
+# https://flask-restless.readthedocs.io/en/0.9.2/customizing.html
+# https://stackoverflow.com/questions/29834693/unit-test-behavior-with-patch-flask
+# https://stanford-code-the-change-guides.readthedocs.io/en/latest/guide_flask_unit_testing.html
+# https://stackoverflow.com/questions/20242862/why-python-mock-patch-doesnt-work
+# https://github.com/pydantic/pydantic/discussions/7741
+# https://www.fugue.co/blog/2016-02-11-python-mocking-101
+# https://fgimian.github.io/blog/2014/04/10/using-the-python-mock-library-to-fake-regular-functions-during-tests/
+
+""" END - Documentation and research materials were used in the development of the code, 
+including but not limited to academic papers, articles, blog posts, and YouTube video tutorials. Please see referenced links. 
+Note: Some parts were copied and closely adopted.
+"""
\ No newline at end of file